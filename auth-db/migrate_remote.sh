@@ -7,8 +7,8 @@
 #
 # Steps:
 #   1. Create auth DB schema
-#   2. Copy auth data from business DB → auth DB
-#   3. Verify data was copied correctly
+#   2. Copy auth data from business DB → auth DB (scripts/move_tables.py)
+#   3. Verify data was copied correctly (ordered chunk hashes)
 #   4. Drop auth tables from business DB
 #
 # Usage:
@@ -123,100 +123,55 @@ AUTH_TABLE_EXISTS=$(PGPASSWORD="$AUTH_PASSWORD" psql -h "$AUTH_HOST" -p "$AUTH_P
     "SELECT COUNT(*) FROM information_schema.tables WHERE table_schema = 'public' AND table_name = 'users'" 2>/dev/null)
 
 if [ "$AUTH_TABLE_EXISTS" -gt 0 ]; then
-    AUTH_EXISTING_COUNT=$(PGPASSWORD="$AUTH_PASSWORD" psql -h "$AUTH_HOST" -p "$AUTH_PORT" -U "$AUTH_USER" -d "$AUTH_DB" -t -A -c \
-        "SELECT COUNT(*) FROM users" 2>/dev/null)
-    if [ "$AUTH_EXISTING_COUNT" -gt 0 ]; then
-        echo -e "${RED}  Auth DB already has $AUTH_EXISTING_COUNT users. Aborting to avoid duplicates.${NC}"
-        echo "  If you want to re-run, drop the auth tables first or clear the data."
-        exit 1
-    fi
-    echo -e "  Schema already exists (empty tables). Skipping schema creation."
+    # move_tables.py skips tables an earlier run copied and refuses tables
+    # that have rows from anywhere else
+    echo -e "  Schema already exists. Skipping schema creation."
 else
-    # Run schema migration (without the admin user INSERT at the end)
-    PGPASSWORD="$AUTH_PASSWORD" psql -h "$AUTH_HOST" -p "$AUTH_PORT" -U "$AUTH_USER" -d "$AUTH_DB" \
-        -f "$SCRIPT_DIR/migrations/001_auth_schema.sql"
+    # Run schema migration without the admin user INSERT at the end: the
+    # admin comes over with the business DB's users, and move_tables.py
+    # refuses a users table that already has rows
+    sed '/^-- Default Admin User/,$d' "$SCRIPT_DIR/migrations/001_auth_schema.sql" | \
+        PGPASSWORD="$AUTH_PASSWORD" psql -h "$AUTH_HOST" -p "$AUTH_PORT" -U "$AUTH_USER" -d "$AUTH_DB" -f -
     echo -e "  ${GREEN}Schema created${NC}"
 fi
 
 echo ""
 
 # ============================================
-# Step 3: Copy data from business DB → auth DB
+# Step 3: Copy and verify data (business DB → auth DB)
 # ============================================
-echo -e "${YELLOW}Step 3: Copying auth data from business DB to auth DB...${NC}"
+# Streams binary COPY between the databases (no dump file), copying tables
+# in parallel once their FK parents are done, then compares ordered chunk
+# hashes of every table. Rerunning resumes with the tables not copied yet.
+echo -e "${YELLOW}Step 3: Copying and verifying auth data...${NC}"
 
-DUMP_FILE=$(mktemp /tmp/auth_migration_XXXXXX.sql)
-echo "  Using temp file: $DUMP_FILE"
-
-# Dump data from each auth table (order matters — users first due to FKs)
-for table in "${AUTH_TABLES[@]}"; do
-    echo -n "  Dumping $table... "
-
-    count=$(psql -h "$BIZ_HOST" -p "$BIZ_PORT" -U "$BIZ_USER" -d "$BIZ_DB" -t -A -c \
-        "SELECT COUNT(*) FROM $table" 2>/dev/null || echo "0")
-
-    if [ "$count" -gt 0 ]; then
-        pg_dump -h "$BIZ_HOST" -p "$BIZ_PORT" -U "$BIZ_USER" -d "$BIZ_DB" \
-            --data-only --table="public.$table" --no-owner --no-privileges \
-            >> "$DUMP_FILE" 2>/dev/null
-        echo -e "${GREEN}$count rows${NC}"
-    else
-        echo "0 rows (skipped)"
-    fi
-done
-
-echo ""
-echo -n "  Importing into auth DB... "
-
-PGPASSWORD="$AUTH_PASSWORD" psql -h "$AUTH_HOST" -p "$AUTH_PORT" -U "$AUTH_USER" -d "$AUTH_DB" \
-    -f "$DUMP_FILE" > /dev/null 2>&1
-
-echo -e "${GREEN}done${NC}"
-
-# Clean up temp file
-rm -f "$DUMP_FILE"
-
-echo ""
-
-# ============================================
-# Step 4: Verify data was copied
-# ============================================
-echo -e "${YELLOW}Step 4: Verifying data in auth DB...${NC}"
-
-MIGRATION_OK=true
-
-for table in "${AUTH_TABLES[@]}"; do
-    biz_count=$(psql -h "$BIZ_HOST" -p "$BIZ_PORT" -U "$BIZ_USER" -d "$BIZ_DB" -t -A -c \
-        "SELECT COUNT(*) FROM $table" 2>/dev/null || echo "0")
-    auth_count=$(PGPASSWORD="$AUTH_PASSWORD" psql -h "$AUTH_HOST" -p "$AUTH_PORT" -U "$AUTH_USER" -d "$AUTH_DB" -t -A -c \
-        "SELECT COUNT(*) FROM $table" 2>/dev/null || echo "0")
-
-    if [ "$biz_count" -eq "$auth_count" ]; then
-        echo -e "  $table: ${GREEN}$auth_count / $biz_count OK${NC}"
-    else
-        echo -e "  $table: ${RED}$auth_count / $biz_count MISMATCH${NC}"
-        MIGRATION_OK=false
-    fi
-done
-
-echo ""
+AUTH_CREDENTIALS="$AUTH_USER"
+if [ -n "$AUTH_PASSWORD" ]; then
+    AUTH_CREDENTIALS="$AUTH_USER:$AUTH_PASSWORD"
+fi
+TABLE_LIST=$(IFS=,; echo "${AUTH_TABLES[*]}")
 
-if [ "$MIGRATION_OK" = false ]; then
-    echo -e "${RED}Data verification failed! Row counts don't match.${NC}"
-    echo "The auth DB has the data that was copied, but counts differ."
-    echo "Please investigate before proceeding."
+# The business DB password comes from PGPASSWORD/.pgpass, as for psql
+if ! python3 "$SCRIPT_DIR/scripts/move_tables.py" \
+    --source "postgresql://$BIZ_USER@$BIZ_HOST:$BIZ_PORT/$BIZ_DB" \
+    --target "postgresql://$AUTH_CREDENTIALS@$AUTH_HOST:$AUTH_PORT/$AUTH_DB" \
+    --tables "$TABLE_LIST"; then
+    echo ""
+    echo -e "${RED}Copy or verification failed! See the table report above.${NC}"
+    echo "Re-run this script to resume with the tables that are not copied yet."
     echo ""
     echo "The business DB auth tables have NOT been dropped."
     exit 1
 fi
 
-echo -e "${GREEN}All row counts match!${NC}"
+echo ""
+echo -e "${GREEN}All tables verified!${NC}"
 echo ""
 
 # ============================================
-# Step 5: Drop auth tables from business DB
+# Step 4: Drop auth tables from business DB
 # ============================================
-echo -e "${YELLOW}Step 5: Ready to drop auth tables from business DB${NC}"
+echo -e "${YELLOW}Step 4: Ready to drop auth tables from business DB${NC}"
 echo ""
 echo "  This will:"
 echo "  - Drop FK constraints from creators, hotel_profiles, chat_messages"
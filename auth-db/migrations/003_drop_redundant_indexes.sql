@@ -0,0 +1,15 @@
+-- migrate:no-transaction
+-- Redundant indexes in the auth database, from auth-db/scripts/index_advisor.py
+-- on 2026-10-17. CONCURRENTLY: writes continue while each drops.
+
+-- duplicate: same as users_email_key
+-- was: CREATE INDEX idx_users_email ON public.users USING btree (email)
+DROP INDEX CONCURRENTLY IF EXISTS "public"."idx_users_email";
+
+-- duplicate: same as password_reset_tokens_token_key
+-- was: CREATE INDEX idx_password_reset_tokens_token ON public.password_reset_tokens USING btree (token)
+DROP INDEX CONCURRENTLY IF EXISTS "public"."idx_password_reset_tokens_token";
+
+-- duplicate: same as email_verification_tokens_token_key
+-- was: CREATE INDEX idx_email_verification_tokens_token ON public.email_verification_tokens USING btree (token)
+DROP INDEX CONCURRENTLY IF EXISTS "public"."idx_email_verification_tokens_token";
@@ -0,0 +1,181 @@
+-- migrate:no-transaction
+-- migrate:skip-if SELECT relkind = 'p' FROM pg_class WHERE oid = 'public.consent_history'::regclass
+-- ============================================
+-- Monthly partitions for consent_history
+-- ============================================
+-- consent_history becomes a partitioned table (range on created_at, one
+-- partition per month) without copying a row: the existing table is
+-- attached as consent_history_legacy, covering everything before the first
+-- monthly partition. Old months are detached and archived by
+-- auth-db/scripts/archive_consent_history.py, which also keeps future
+-- months created; the legacy partition goes the same way once all of it is
+-- past retention.
+--
+-- Nothing schedules that script, so inserts must not depend on it: a DEFAULT
+-- partition, consent_history_default, takes rows of any month without a
+-- partition. Whenever the script next runs, ensure_monthly_partitions creates
+-- the missing months and moves those rows into them. The price is that
+-- partitions are detached without CONCURRENTLY (not allowed next to a
+-- DEFAULT partition), a brief ACCESS EXCLUSIVE lock on consent_history.
+--
+-- Nothing below blocks consent writes for longer than the final swap, a
+-- catalog-only change:
+--   1. the unique index the new primary key needs, built concurrently
+--   2. a CHECK constraint proving the legacy range, validated without
+--      blocking writes, so attaching it needs no table scan
+--   3. the swap, in one statement: promote that index to the primary key,
+--      rename, create the partitioned table, attach the legacy table (its
+--      indexes and foreign key are adopted, not rebuilt), add the DEFAULT
+--      partition and create the upcoming months
+--
+-- The partition key has to be in the primary key: it becomes (id, created_at).
+--
+-- Once consent_history is partitioned the file is skipped (migrate:skip-if):
+-- the concurrent index build could not run against the partitioned table.
+-- The other statements check the table's state themselves, for a rerun after
+-- a failure part way.
+
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS consent_history_id_created_at_key
+  ON public.consent_history(id, created_at);
+
+-- The legacy range ends two months from now, leaving a month to spare if
+-- the swap runs later than this statement
+DO $$
+BEGIN
+  IF (SELECT relkind FROM pg_class WHERE oid = 'public.consent_history'::regclass) = 'r'
+     AND NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'consent_history_legacy_range') THEN
+    EXECUTE format(
+      'ALTER TABLE public.consent_history ADD CONSTRAINT consent_history_legacy_range CHECK (created_at < %L) NOT VALID',
+      date_trunc('month', now()) + interval '2 months'
+    );
+  END IF;
+END
+$$;
+
+DO $$
+BEGIN
+  IF (SELECT relkind FROM pg_class WHERE oid = 'public.consent_history'::regclass) = 'r' THEN
+    ALTER TABLE public.consent_history VALIDATE CONSTRAINT consent_history_legacy_range;
+  END IF;
+END
+$$;
+
+-- Creates the monthly partitions <parent>_YYYY_MM of this month and the next
+-- months_ahead ones that do not exist yet; returns how many it created.
+-- Months still inside another partition's range (the legacy one) are skipped.
+-- Rows the default partition caught are moved into their month's partition,
+-- starting from the oldest one.
+CREATE OR REPLACE FUNCTION public.ensure_monthly_partitions(parent regclass, months_ahead integer DEFAULT 6)
+RETURNS integer
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  base text;
+  key_column text;
+  default_partition regclass;
+  oldest timestamptz;
+  month_start date := date_trunc('month', now())::date;
+  last_month date := date_trunc('month', now())::date + make_interval(months => months_ahead);
+  partition_name text;
+  created integer := 0;
+BEGIN
+  SELECT relname INTO base FROM pg_class WHERE oid = parent;
+  SELECT a.attname, nullif(p.partdefid, 0)::regclass INTO key_column, default_partition
+  FROM pg_partitioned_table p
+  JOIN pg_attribute a ON a.attrelid = p.partrelid AND a.attnum = p.partattrs[0]
+  WHERE p.partrelid = parent;
+
+  IF default_partition IS NOT NULL THEN
+    EXECUTE format('SELECT min(%I) FROM %s', key_column, default_partition) INTO oldest;
+    month_start := least(month_start, date_trunc('month', oldest)::date);
+  END IF;
+
+  WHILE month_start <= last_month LOOP
+    partition_name := format('%s_%s', base, to_char(month_start, 'YYYY_MM'));
+    IF to_regclass(format('public.%I', partition_name)) IS NULL THEN
+      BEGIN
+        EXECUTE format(
+          'CREATE TABLE public.%I PARTITION OF %s FOR VALUES FROM (%L) TO (%L)',
+          partition_name, parent, month_start, month_start + interval '1 month'
+        );
+        created := created + 1;
+      EXCEPTION
+        WHEN invalid_object_definition THEN
+          NULL;  -- overlaps an existing partition
+        WHEN check_violation THEN
+          -- The default partition holds rows of this month: move them into
+          -- a table of their own and attach that
+          EXECUTE format('LOCK TABLE %s IN ACCESS EXCLUSIVE MODE', default_partition);
+          EXECUTE format(
+            'CREATE TABLE public.%I (LIKE %s INCLUDING DEFAULTS INCLUDING CONSTRAINTS)', partition_name, parent
+          );
+          EXECUTE format(
+            'WITH moved AS (DELETE FROM %s WHERE %I >= %L AND %I < %L RETURNING *) INSERT INTO public.%I SELECT * FROM moved',
+            default_partition, key_column, month_start, key_column, month_start + interval '1 month', partition_name
+          );
+          EXECUTE format(
+            'ALTER TABLE %s ATTACH PARTITION public.%I FOR VALUES FROM (%L) TO (%L)',
+            parent, partition_name, month_start, month_start + interval '1 month'
+          );
+          created := created + 1;
+      END;
+    END IF;
+    month_start := month_start + interval '1 month';
+  END LOOP;
+  RETURN created;
+END
+$$;
+
+DO $$
+DECLARE
+  boundary timestamptz;
+BEGIN
+  IF (SELECT relkind FROM pg_class WHERE oid = 'public.consent_history'::regclass) = 'p' THEN
+    RETURN;
+  END IF;
+
+  SELECT substring(pg_get_constraintdef(oid) FROM '''([^'']+)''')::timestamptz INTO boundary
+  FROM pg_constraint
+  WHERE conrelid = 'public.consent_history'::regclass AND conname = 'consent_history_legacy_range';
+
+  -- A partition cannot carry a primary key of its own next to the parent's:
+  -- (id, created_at) becomes the legacy table's primary key, and is adopted
+  -- as its copy of the parent's on attach
+  ALTER TABLE public.consent_history
+    DROP CONSTRAINT consent_history_pkey,
+    ADD CONSTRAINT consent_history_pkey PRIMARY KEY USING INDEX consent_history_id_created_at_key;
+
+  ALTER TABLE public.consent_history RENAME TO consent_history_legacy;
+  ALTER TABLE public.consent_history_legacy RENAME CONSTRAINT consent_history_pkey TO consent_history_legacy_pkey;
+  ALTER INDEX public.idx_consent_history_user_id RENAME TO consent_history_legacy_user_id_idx;
+  ALTER INDEX public.idx_consent_history_consent_type RENAME TO consent_history_legacy_consent_type_idx;
+  ALTER INDEX public.idx_consent_history_created_at RENAME TO consent_history_legacy_created_at_idx;
+
+  CREATE TABLE public.consent_history (
+    id uuid NOT NULL DEFAULT uuid_generate_v4(),
+    user_id uuid REFERENCES users(id) ON DELETE CASCADE,
+    consent_type text NOT NULL,
+    consent_given boolean NOT NULL,
+    version text,
+    ip_address text,
+    user_agent text,
+    created_at timestamp with time zone DEFAULT now() NOT NULL,
+    CONSTRAINT consent_history_pkey PRIMARY KEY (id, created_at)
+  ) PARTITION BY RANGE (created_at);
+
+  EXECUTE format(
+    'ALTER TABLE public.consent_history ATTACH PARTITION public.consent_history_legacy FOR VALUES FROM (MINVALUE) TO (%L)',
+    boundary
+  );
+  -- Catches rows of months nobody created a partition for, instead of failing
+  -- the insert; ensure_monthly_partitions moves them out
+  CREATE TABLE public.consent_history_default PARTITION OF public.consent_history DEFAULT;
+
+  -- Adopt the legacy indexes as the partitions' copies
+  CREATE INDEX idx_consent_history_user_id ON public.consent_history(user_id);
+  CREATE INDEX idx_consent_history_consent_type ON public.consent_history(consent_type);
+  CREATE INDEX idx_consent_history_created_at ON public.consent_history(created_at);
+
+  PERFORM public.ensure_monthly_partitions('public.consent_history');
+END
+$$;
@@ -0,0 +1,55 @@
+-- migrate:no-transaction
+-- ============================================
+-- One cookie_consent row per visitor
+-- ============================================
+-- Writers used to look a visitor up and then insert or update, so two
+-- concurrent page views could both insert. This keeps each visitor's most
+-- recently updated row (carrying over a user_id only a duplicate had), then
+-- makes visitor_id unique so writers can upsert with
+-- ON CONFLICT (visitor_id) (auth-db/scripts/consent_writer.py).
+--
+-- If an old writer inserts a new duplicate before the index is built, the
+-- build fails and the next run starts over from the cleanup.
+
+-- Survivor: latest updated_at, then created_at, then id (same order below)
+UPDATE public.cookie_consent c
+SET user_id = known.user_id
+FROM (
+  SELECT DISTINCT ON (visitor_id) id, visitor_id
+  FROM public.cookie_consent
+  WHERE visitor_id IN (SELECT visitor_id FROM public.cookie_consent GROUP BY visitor_id HAVING count(*) > 1)
+  ORDER BY visitor_id, updated_at DESC, created_at DESC, id
+) survivor
+JOIN (
+  SELECT DISTINCT ON (visitor_id) visitor_id, user_id
+  FROM public.cookie_consent
+  WHERE user_id IS NOT NULL
+    AND visitor_id IN (SELECT visitor_id FROM public.cookie_consent GROUP BY visitor_id HAVING count(*) > 1)
+  ORDER BY visitor_id, updated_at DESC, created_at DESC, id
+) known ON known.visitor_id = survivor.visitor_id
+WHERE c.id = survivor.id AND c.user_id IS NULL;
+
+DELETE FROM public.cookie_consent c
+USING (
+  SELECT id, row_number() OVER (
+    PARTITION BY visitor_id ORDER BY updated_at DESC, created_at DESC, id
+  ) AS rank
+  FROM public.cookie_consent
+  WHERE visitor_id IN (SELECT visitor_id FROM public.cookie_consent GROUP BY visitor_id HAVING count(*) > 1)
+) duplicate
+WHERE c.id = duplicate.id AND duplicate.rank > 1;
+
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS cookie_consent_visitor_id_key
+  ON public.cookie_consent(visitor_id);
+
+DO $$
+BEGIN
+  IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'cookie_consent_visitor_id_key') THEN
+    ALTER TABLE public.cookie_consent
+      ADD CONSTRAINT cookie_consent_visitor_id_key UNIQUE USING INDEX cookie_consent_visitor_id_key;
+  END IF;
+END
+$$;
+
+-- The unique index serves every visitor_id lookup now
+DROP INDEX CONCURRENTLY IF EXISTS public.idx_cookie_consent_visitor_id;
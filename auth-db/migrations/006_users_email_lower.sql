@@ -0,0 +1,28 @@
+-- migrate:no-transaction
+-- ============================================
+-- Case-insensitive email lookups
+-- ============================================
+-- users.email is case-sensitive, so a lookup by lower(email) = lower($1)
+-- cannot use users_email_key and scans the table. This adds a unique index
+-- on lower(email): case-insensitive lookups become index scans, and
+-- "Jane@x.com" can no longer sign up next to "jane@x.com". Writers insert
+-- with ON CONFLICT (lower(email)) and look users up by lower(email).
+--
+-- Existing case duplicates would make the build fail, so they stop the
+-- migration first. List them with auth-db/scripts/email_case_conflicts.py,
+-- merge or rename the accounts, and run the migrations again.
+
+DO $$
+DECLARE
+  conflicts integer;
+BEGIN
+  SELECT count(*) INTO conflicts
+  FROM (SELECT 1 FROM public.users GROUP BY lower(email) HAVING count(*) > 1) duplicate;
+  IF conflicts > 0 THEN
+    RAISE EXCEPTION '% emails belong to more than one user when compared case-insensitively', conflicts
+      USING HINT = 'List them with python auth-db/scripts/email_case_conflicts.py and resolve them first';
+  END IF;
+END
+$$;
+
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS users_email_lower_key ON public.users(lower(email));
@@ -0,0 +1,139 @@
+-- ============================================
+-- Opt-in: monthly partitions for the token tables
+-- ============================================
+-- Converts password_reset_tokens, email_verification_codes and
+-- email_verification_tokens to range partitions on expires_at, one per
+-- month, so that retention is dropping a month instead of deleting rows
+-- (auth-db/scripts/purge_tokens.py does both).
+--
+-- Not applied by default. To opt in, copy it into auth-db/migrations/ under
+-- the next free number (<NNN>_partition_token_tables.sql).
+--
+-- Only live rows (unused, not yet expired) are carried over; the rest is
+-- what the purge worker would delete anyway. Writes to each table are
+-- blocked while its live rows are copied, which takes moments.
+--
+-- The partition key has to be part of every unique constraint, so the
+-- primary keys become (id, expires_at) and token uniqueness is enforced per
+-- (token, expires_at). Tokens are random, and lookups by token use the
+-- leading column of that index.
+
+-- Creates this month's partition and the next months_ahead ones; returns
+-- how many it created. Rows in the DEFAULT partition (only there if nothing
+-- created partitions for months) keep a month from being created: that
+-- month is skipped with a warning until the purge worker deletes them.
+CREATE OR REPLACE FUNCTION public.ensure_token_partitions(parent regclass, months_ahead integer DEFAULT 3)
+RETURNS integer
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  base text;
+  first_month date := date_trunc('month', now())::date;
+  month_start date;
+  partition_name text;
+  created integer := 0;
+BEGIN
+  SELECT relname INTO base FROM pg_class WHERE oid = parent;
+  FOR i IN 0..months_ahead LOOP
+    month_start := first_month + make_interval(months => i);
+    partition_name := format('%s_%s', base, to_char(month_start, 'YYYY_MM'));
+    IF to_regclass(format('public.%I', partition_name)) IS NULL THEN
+      BEGIN
+        EXECUTE format(
+          'CREATE TABLE public.%I PARTITION OF %s FOR VALUES FROM (%L) TO (%L)',
+          partition_name, parent, month_start, month_start + interval '1 month'
+        );
+        created := created + 1;
+      EXCEPTION WHEN check_violation THEN
+        RAISE WARNING '%: default partition has rows for %, not created', parent, partition_name;
+      END;
+    END IF;
+  END LOOP;
+  RETURN created;
+END
+$$;
+
+-- ============================================
+-- Password Reset Tokens
+-- ============================================
+LOCK TABLE public.password_reset_tokens IN EXCLUSIVE MODE;
+CREATE TEMP TABLE live_password_reset_tokens AS
+  SELECT * FROM public.password_reset_tokens WHERE used = false AND expires_at > now();
+DROP TABLE public.password_reset_tokens;
+
+CREATE TABLE public.password_reset_tokens (
+  id uuid NOT NULL DEFAULT uuid_generate_v4(),
+  user_id uuid NOT NULL REFERENCES public.users(id) ON DELETE CASCADE,
+  token text NOT NULL,
+  expires_at timestamp with time zone NOT NULL,
+  used boolean NOT NULL DEFAULT false,
+  created_at timestamp with time zone NOT NULL DEFAULT now(),
+  CONSTRAINT password_reset_tokens_pkey PRIMARY KEY (id, expires_at),
+  CONSTRAINT password_reset_tokens_token_key UNIQUE (token, expires_at)
+) PARTITION BY RANGE (expires_at);
+
+CREATE TABLE public.password_reset_tokens_default PARTITION OF public.password_reset_tokens DEFAULT;
+SELECT public.ensure_token_partitions('public.password_reset_tokens');
+
+CREATE INDEX idx_password_reset_tokens_user_id ON public.password_reset_tokens(user_id);
+CREATE INDEX idx_password_reset_tokens_expires_at ON public.password_reset_tokens(expires_at);
+
+INSERT INTO public.password_reset_tokens SELECT * FROM live_password_reset_tokens;
+DROP TABLE live_password_reset_tokens;
+
+-- ============================================
+-- Email Verification Codes
+-- ============================================
+LOCK TABLE public.email_verification_codes IN EXCLUSIVE MODE;
+CREATE TEMP TABLE live_email_verification_codes AS
+  SELECT * FROM public.email_verification_codes WHERE used = false AND expires_at > now();
+DROP TABLE public.email_verification_codes;
+
+CREATE TABLE public.email_verification_codes (
+  id uuid NOT NULL DEFAULT uuid_generate_v4(),
+  email text NOT NULL,
+  code text NOT NULL,
+  expires_at timestamp with time zone NOT NULL,
+  used boolean NOT NULL DEFAULT false,
+  created_at timestamp with time zone NOT NULL DEFAULT now(),
+  CONSTRAINT email_verification_codes_pkey PRIMARY KEY (id, expires_at)
+) PARTITION BY RANGE (expires_at);
+
+CREATE TABLE public.email_verification_codes_default PARTITION OF public.email_verification_codes DEFAULT;
+SELECT public.ensure_token_partitions('public.email_verification_codes');
+
+CREATE INDEX idx_email_verification_codes_email ON public.email_verification_codes(email);
+CREATE INDEX idx_email_verification_codes_code ON public.email_verification_codes(code);
+CREATE INDEX idx_email_verification_codes_expires_at ON public.email_verification_codes(expires_at);
+CREATE INDEX idx_email_verification_codes_email_code ON public.email_verification_codes(email, code) WHERE used = false;
+
+INSERT INTO public.email_verification_codes SELECT * FROM live_email_verification_codes;
+DROP TABLE live_email_verification_codes;
+
+-- ============================================
+-- Email Verification Tokens
+-- ============================================
+LOCK TABLE public.email_verification_tokens IN EXCLUSIVE MODE;
+CREATE TEMP TABLE live_email_verification_tokens AS
+  SELECT * FROM public.email_verification_tokens WHERE used = false AND expires_at > now();
+DROP TABLE public.email_verification_tokens;
+
+CREATE TABLE public.email_verification_tokens (
+  id uuid NOT NULL DEFAULT uuid_generate_v4(),
+  user_id uuid NOT NULL REFERENCES public.users(id) ON DELETE CASCADE,
+  token text NOT NULL,
+  expires_at timestamp with time zone NOT NULL,
+  used boolean NOT NULL DEFAULT false,
+  created_at timestamp with time zone NOT NULL DEFAULT now(),
+  CONSTRAINT email_verification_tokens_pkey PRIMARY KEY (id, expires_at),
+  CONSTRAINT email_verification_tokens_token_key UNIQUE (token, expires_at)
+) PARTITION BY RANGE (expires_at);
+
+CREATE TABLE public.email_verification_tokens_default PARTITION OF public.email_verification_tokens DEFAULT;
+SELECT public.ensure_token_partitions('public.email_verification_tokens');
+
+CREATE INDEX idx_email_verification_tokens_user_id ON public.email_verification_tokens(user_id);
+CREATE INDEX idx_email_verification_tokens_expires_at ON public.email_verification_tokens(expires_at);
+
+INSERT INTO public.email_verification_tokens SELECT * FROM live_email_verification_tokens;
+DROP TABLE live_email_verification_tokens;
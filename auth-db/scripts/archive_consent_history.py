@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Keep consent_history's monthly partitions created and archive the old ones.
+
+consent_history is partitioned by month on created_at
+(migrations/004_partition_consent_history.sql). Run daily; each run:
+
+    1. creates the partitions for this month and the next --months-ahead,
+       moving rows the DEFAULT partition caught for a month without one
+       into it (inserts never fail for want of a partition, but pile up in
+       consent_history_default while this does not run)
+    2. detaches every partition whose month ended more than --retention ago
+    3. writes each detached partition as gzipped CSV to the archive bucket
+       (S3_ENDPOINT_URL, the local MinIO by default) under
+       consent_history/<partition>.csv.gz, checks the object's size, records
+       it in consent_history_archives and drops the table
+
+Steps 1 and 2 lock consent_history for a moment. They run under
+--lock-timeout, so a long transaction on the table defers them to the next
+run instead of queueing every consent write behind them.
+
+Inserts and per-user lookups then touch a bounded number of partitions
+however much history accumulates. A run interrupted between the steps is
+finished by the next one: detached partitions not archived yet are picked up
+before anything else.
+
+The archive bucket is private (unlike vayada-uploads): consent records hold
+IP addresses and user agents. Restore a month with psql's
+`\\copy consent_history FROM PROGRAM 'gunzip -c <file>' CSV HEADER`.
+
+Usage:
+    python auth-db/scripts/archive_consent_history.py
+    python auth-db/scripts/archive_consent_history.py --retention "5 years" --dry-run
+"""
+import argparse
+import asyncio
+import gzip
+import hashlib
+import os
+import sys
+import tempfile
+
+import asyncpg
+import boto3
+
+from run_migrations import DATABASES
+
+PARENT = "consent_history"
+DEFAULT_RETENTION = "3 years"
+DEFAULT_MONTHS_AHEAD = 6
+DEFAULT_LOCK_TIMEOUT = "2s"
+ARCHIVE_PREFIX = "consent_history"
+
+S3_ENDPOINT_URL = os.environ.get("S3_ENDPOINT_URL", "http://localhost:9000")
+ARCHIVE_BUCKET = os.environ.get("ARCHIVE_BUCKET_NAME", "vayada-archive")
+
+ARCHIVES_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS consent_history_archives (
+        partition_name TEXT PRIMARY KEY,
+        object_key TEXT NOT NULL,
+        rows BIGINT NOT NULL,
+        bytes BIGINT NOT NULL,
+        sha256 TEXT NOT NULL,
+        archived_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+    )
+"""
+
+# Attached partitions whose range ended more than $1 ago (never the DEFAULT
+# partition: it has no upper bound)
+EXPIRED_PARTITIONS_SQL = """
+    SELECT c.relname
+    FROM pg_inherits i
+    JOIN pg_class c ON c.oid = i.inhrelid
+    WHERE i.inhparent = 'public.consent_history'::regclass
+      AND substring(pg_get_expr(c.relpartbound, c.oid) FROM 'TO \\(''([^'']+)''\\)')::timestamptz
+          <= now() - $1::interval
+    ORDER BY c.relname
+"""
+
+# Former partitions no longer attached: detached by this script, not archived yet
+DETACHED_SQL = """
+    SELECT relname FROM pg_class
+    WHERE relnamespace = 'public'::regnamespace AND relkind = 'r' AND NOT relispartition
+      AND relname ~ '^consent_history_(legacy|\\d{4}_\\d{2})$'
+    ORDER BY relname
+"""
+
+
+def quote_ident(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def s3_client():
+    return boto3.client(
+        "s3",
+        endpoint_url=S3_ENDPOINT_URL,
+        aws_access_key_id=os.environ.get("AWS_ACCESS_KEY_ID", "minioadmin"),
+        aws_secret_access_key=os.environ.get("AWS_SECRET_ACCESS_KEY", "minioadmin"),
+    )
+
+
+def ensure_bucket(s3):
+    buckets = {bucket["Name"] for bucket in s3.list_buckets()["Buckets"]}
+    if ARCHIVE_BUCKET not in buckets:
+        s3.create_bucket(Bucket=ARCHIVE_BUCKET)
+        print(f"  Created: bucket {ARCHIVE_BUCKET}")
+
+
+# ---------------------------------------------------------------------------
+# Archiving
+# ---------------------------------------------------------------------------
+async def export(conn, table, path):
+    """COPY the table into a gzipped CSV file; returns (rows, sha256)."""
+    digest = hashlib.sha256()
+    with open(path, "wb") as raw:
+        with gzip.GzipFile(fileobj=raw, mode="wb") as out:
+            async def write(chunk):
+                out.write(chunk)
+            status = await conn.copy_from_table(table, output=write, format="csv", header=True)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return int(status.split()[-1]), digest.hexdigest()
+
+
+async def archive(conn, s3, table):
+    key = f"{ARCHIVE_PREFIX}/{table}.csv.gz"
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, f"{table}.csv.gz")
+        rows, sha256 = await export(conn, table, path)
+        size = os.path.getsize(path)
+        await asyncio.to_thread(
+            s3.upload_file, path, ARCHIVE_BUCKET, key, ExtraArgs={"Metadata": {"sha256": sha256}}
+        )
+    stored = await asyncio.to_thread(s3.head_object, Bucket=ARCHIVE_BUCKET, Key=key)
+    if stored["ContentLength"] != size:
+        raise RuntimeError(f"{key}: uploaded {stored['ContentLength']} bytes, wrote {size}")
+
+    async with conn.transaction():
+        await conn.execute(
+            "INSERT INTO consent_history_archives (partition_name, object_key, rows, bytes, sha256) "
+            "VALUES ($1, $2, $3, $4, $5) ON CONFLICT (partition_name) DO UPDATE "
+            "SET object_key = EXCLUDED.object_key, rows = EXCLUDED.rows, bytes = EXCLUDED.bytes, "
+            "sha256 = EXCLUDED.sha256, archived_at = NOW()",
+            table, key, rows, size, sha256,
+        )
+        await conn.execute(f"DROP TABLE {quote_ident(table)}")
+    print(f"  Archived: {table} -> s3://{ARCHIVE_BUCKET}/{key} ({rows:,} rows, {size / 1024 / 1024:.1f} MB)")
+
+
+async def detach(conn, table):
+    # Not CONCURRENTLY: that is not allowed next to a DEFAULT partition
+    try:
+        await conn.execute(f"ALTER TABLE {PARENT} DETACH PARTITION {quote_ident(table)}")
+    except asyncpg.LockNotAvailableError:
+        print(f"  Busy: {table} stays attached until the next run")
+        return
+    print(f"  Detached: {table}")
+
+
+# ---------------------------------------------------------------------------
+# Main
+# ---------------------------------------------------------------------------
+async def main(args):
+    env_var, default_url, _ = DATABASES["auth"]
+    conn = await asyncpg.connect(args.database or os.environ.get(env_var, default_url))
+    try:
+        # Creating and detaching partitions locks consent_history: never
+        # queue consent writes behind a long transaction waiting for it
+        await conn.execute("SELECT set_config('lock_timeout', $1, false)", args.lock_timeout)
+        if await conn.fetchval("SELECT relkind FROM pg_class WHERE oid = to_regclass($1)", PARENT) != "p":
+            print(f"  {PARENT} is not partitioned; apply 004_partition_consent_history.sql first")
+            return False
+
+        if not args.dry_run:
+            try:
+                created = await conn.fetchval(
+                    "SELECT public.ensure_monthly_partitions($1::regclass, $2)", PARENT, args.months_ahead
+                )
+                print(f"  Partitions: {created} created ({args.months_ahead} months ahead)")
+            except asyncpg.LockNotAvailableError:
+                # Rows of missing months wait in the DEFAULT partition meanwhile
+                print(f"  Busy: {PARENT} partitions are created by the next run")
+
+        expired = await conn.fetch(EXPIRED_PARTITIONS_SQL, args.retention)
+        if args.dry_run:
+            leftovers = [row["relname"] for row in await conn.fetch(DETACHED_SQL)]
+            for table in leftovers + [row["relname"] for row in expired]:
+                rows = await conn.fetchval(f"SELECT count(*) FROM {quote_ident(table)}")
+                print(f"  Would archive: {table} ({rows:,} rows)")
+            return True
+
+        for row in expired:
+            await detach(conn, row["relname"])
+        detached = [row["relname"] for row in await conn.fetch(DETACHED_SQL)]
+        if not detached:
+            print(f"  Nothing older than {args.retention} to archive")
+            return True
+
+        await conn.execute(ARCHIVES_TABLE_SQL)
+        s3 = s3_client()
+        await asyncio.to_thread(ensure_bucket, s3)
+        for table in detached:
+            await archive(conn, s3, table)
+        return True
+    finally:
+        await conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database", help="Auth database URL (default: AUTH_DATABASE_URL)")
+    parser.add_argument(
+        "--retention", default=DEFAULT_RETENTION,
+        help=f"Keep months that ended less than this long ago, a Postgres interval (default: '{DEFAULT_RETENTION}')",
+    )
+    parser.add_argument(
+        "--months-ahead", type=int, default=DEFAULT_MONTHS_AHEAD,
+        help=f"Future monthly partitions to keep created (default: {DEFAULT_MONTHS_AHEAD})",
+    )
+    parser.add_argument(
+        "--lock-timeout", default=DEFAULT_LOCK_TIMEOUT,
+        help=f"Give up on a busy consent_history until the next run after this (default: {DEFAULT_LOCK_TIMEOUT})",
+    )
+    parser.add_argument("--dry-run", action="store_true", help="List what would be archived, change nothing")
+    args = parser.parse_args()
+
+    if not asyncio.run(main(args)):
+        sys.exit(1)
@@ -0,0 +1,130 @@
+"""
+Chunked, resumable data backfills for run_migrations.py.
+
+A backfill migration is a Python file in the migrations directory, ordered
+by name together with the .sql files, that defines:
+
+    TABLE = "users"          # table to walk
+    KEY = "id"               # unique, indexed column to walk it by
+    BATCH_SQL = '''          # one chunk: the rows with $1 <= KEY <= $2
+        UPDATE users SET email_normalized = lower(email)
+        WHERE id BETWEEN $1 AND $2 AND email_normalized IS NULL
+    '''
+    BATCH_SIZE = 10_000      # optional: keys per chunk
+    SLEEP_SECONDS = 0.1      # optional: pause between chunks
+
+TABLE is walked in KEY order (keyset pagination, no OFFSET), one short
+transaction per chunk, so no lock is held and no WAL burst is produced for
+longer than one chunk. Each chunk commits together with its checkpoint (the
+chunk's last key) in schema_migrations, so an interrupted backfill resumes
+after the last committed chunk. Schema changes the backfill needs (the new
+column, ...) belong in a .sql migration before it.
+"""
+import asyncio
+import importlib.util
+import time
+
+DEFAULT_BATCH_SIZE = 10_000
+DEFAULT_SLEEP_SECONDS = 0
+PROGRESS_SECONDS = 10
+
+# Key bounds of the next chunk after the checkpoint ($2, as text, NULL at the start)
+WINDOW_SQL = """
+    WITH chunk AS (
+        SELECT {key} AS k FROM {table}
+        WHERE $2::text IS NULL OR {key} > $2::text::{key_type}
+        ORDER BY {key}
+        LIMIT $1
+    )
+    SELECT (SELECT k FROM chunk ORDER BY k LIMIT 1) AS lo,
+           (SELECT k FROM chunk ORDER BY k DESC LIMIT 1) AS hi,
+           (SELECT k::text FROM chunk ORDER BY k DESC LIMIT 1) AS hi_text
+"""
+
+KEY_TYPE_SQL = """
+    SELECT format_type(atttypid, atttypmod) FROM pg_attribute
+    WHERE attrelid = to_regclass($1) AND attname = $2 AND NOT attisdropped
+"""
+
+START_SQL = """
+    INSERT INTO schema_migrations (filename, checksum, duration_ms, completed)
+    VALUES ($1, $2, 0, false)
+    ON CONFLICT (filename) DO NOTHING
+"""
+CHECKPOINT_SQL = "UPDATE schema_migrations SET checkpoint = $2, duration_ms = $3 WHERE filename = $1"
+COMPLETE_SQL = """
+    UPDATE schema_migrations
+    SET completed = true, checksum = $2, duration_ms = $3, executed_at = NOW()
+    WHERE filename = $1
+"""
+
+
+def load(migration_file):
+    """Import a backfill migration file and check it defines TABLE, KEY and BATCH_SQL."""
+    spec = importlib.util.spec_from_file_location(f"backfill_{migration_file.stem}", migration_file)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    missing = [name for name in ("TABLE", "KEY", "BATCH_SQL") if not hasattr(module, name)]
+    if missing:
+        raise ValueError(f"{migration_file.name} does not define {', '.join(missing)}")
+    return module
+
+
+def rows_affected(status):
+    """Row count from a command tag like 'UPDATE 500' or 'INSERT 0 500'."""
+    count = (status or "").rsplit(" ", 1)[-1]
+    return int(count) if count.isdigit() else 0
+
+
+async def run_backfill(conn, migration_file, file_checksum, progress, log, batch_size=None, sleep=None):
+    """Run (or resume) a backfill migration and mark it completed.
+
+    progress is its schema_migrations row if an earlier run was interrupted.
+    Returns the total duration in ms, including earlier runs.
+    """
+    module = load(migration_file)
+    filename = migration_file.name
+    table, key = module.TABLE, module.KEY
+    batch_size = batch_size or getattr(module, "BATCH_SIZE", DEFAULT_BATCH_SIZE)
+    sleep = sleep if sleep is not None else getattr(module, "SLEEP_SECONDS", DEFAULT_SLEEP_SECONDS)
+
+    key_type = await conn.fetchval(KEY_TYPE_SQL, table, key)
+    if key_type is None:
+        raise ValueError(f"{table}.{key} does not exist")
+    window_sql = WINDOW_SQL.format(table=table, key=key, key_type=key_type)
+
+    checkpoint = progress["checkpoint"] if progress else None
+    earlier_ms = (progress["duration_ms"] or 0) if progress else 0
+    if checkpoint is not None:
+        log(f"  Resuming after {key} = {checkpoint}")
+    else:
+        await conn.execute(START_SQL, filename, file_checksum)
+    log(f"  Backfilling {table} by {key}: {batch_size} keys per chunk, {sleep}s between chunks")
+
+    rows = chunks = 0
+    start = last_progress = time.perf_counter()
+    while True:
+        window = await conn.fetchrow(window_sql, batch_size, checkpoint)
+        if window["lo"] is None:
+            break
+        async with conn.transaction():
+            status = await conn.execute(module.BATCH_SQL, window["lo"], window["hi"])
+            elapsed_ms = round((time.perf_counter() - start) * 1000)
+            await conn.execute(CHECKPOINT_SQL, filename, window["hi_text"], earlier_ms + elapsed_ms)
+        checkpoint = window["hi_text"]
+        rows += rows_affected(status)
+        chunks += 1
+
+        now = time.perf_counter()
+        if now - last_progress >= PROGRESS_SECONDS:
+            log(f"  {table}: {rows} rows in {chunks} chunks ({rows / (now - start):.0f} rows/s), at {key} = {checkpoint}")
+            last_progress = now
+        if sleep:
+            await asyncio.sleep(sleep)
+
+    seconds = time.perf_counter() - start
+    total_ms = earlier_ms + round(seconds * 1000)
+    await conn.execute(COMPLETE_SQL, filename, file_checksum, total_ms)
+    rate = f"{rows / seconds:.0f}" if seconds > 0 else "-"
+    log(f"  Backfilled {rows} rows in {chunks} chunks, {seconds:.1f}s ({rate} rows/s)")
+    return total_ms
@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+Benchmark pending auth migrations against a production-sized dataset.
+
+Creates a scratch database next to the auth database, migrates it up to the
+first file under test, loads a synthetic auth dataset (--users users plus
+reset tokens, verification codes and tokens, cookie consents, consent
+history and GDPR requests in fixed ratios), then applies each file under test
+on its own while --traffic workers run typical auth queries against it.
+
+For every file it records:
+
+    duration      wall time of the migration
+    lock wait     time the migration itself spent waiting on locks
+                  (pg_stat_activity, sampled)
+    traffic max   slowest auth query issued while it ran — how long a user
+                  request would have hung behind the migration's locks
+
+and fails when a file exceeds --budget seconds (or its own
+`-- benchmark:budget <seconds>` header line) or traffic stalls longer than
+--traffic-budget. Run it before deploying schema changes.
+
+The files under test are those not applied in the database given with
+--against (e.g. production, read-only access is enough), or everything from
+--since on; by default every file after the first.
+
+Usage:
+    python auth-db/scripts/benchmark_migrations.py --users 1000000
+    python auth-db/scripts/benchmark_migrations.py --against $PROD_AUTH_URL --budget 30
+    python auth-db/scripts/benchmark_migrations.py --since 003_add_x.sql --report bench.json --keep
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import sys
+import time
+from datetime import datetime, timezone
+from urllib.parse import urlsplit, urlunsplit
+
+import asyncpg
+
+import run_migrations
+from run_migrations import DATABASES, REPO_ROOT
+
+DEFAULT_USERS = 100_000
+DEFAULT_BUDGET_SECONDS = 60.0
+DEFAULT_TRAFFIC = 4
+DEFAULT_TRAFFIC_BUDGET_SECONDS = 5.0
+SAMPLE_SECONDS = 0.05
+
+BUDGET_DIRECTIVE = re.compile(r"^--\s*benchmark:budget\s+([\d.]+)\s*s?\s*$", re.IGNORECASE | re.MULTILINE)
+
+# Rows per user in the synthetic dataset
+PER_USER = {
+    "password_reset_tokens": 0.5,
+    "email_verification_codes": 1.0,
+    "email_verification_tokens": 0.8,
+    "cookie_consent": 1.5,
+    "consent_history": 4.0,
+    "gdpr_requests": 0.02,
+}
+
+# bcrypt hash of "Vayada123", as in 001_auth_schema.sql
+PASSWORD_HASH = "$2b$12$.sbVRdLMnCadYEkfLx1cJuxVbMT3ilI6ji5dcb2ZERVsH3vGGfOpG"
+
+# Generated server-side; $1 = rows, $2 = users. Only 001_auth_schema.sql
+# columns, so the data loads into any later schema.
+LOAD_SQL = {
+    "users": """
+        INSERT INTO users (email, password_hash, name, type, status, email_verified, created_at)
+        SELECT 'bench-user-' || i || '@mock.com', '{password_hash}', 'Bench User ' || i,
+               CASE WHEN i % 5 = 0 THEN 'hotel' ELSE 'creator' END,
+               CASE WHEN i % 10 = 0 THEN 'pending' ELSE 'verified' END,
+               i % 10 <> 0, now() - (i % 1000) * interval '1 day'
+        FROM generate_series(1, $1) i
+    """,
+    "password_reset_tokens": """
+        INSERT INTO password_reset_tokens (user_id, token, expires_at, used, created_at)
+        SELECT u.id, md5('reset-' || g), now() + (g % 400 - 380) * interval '1 day', g % 3 = 0,
+               now() + (g % 400 - 381) * interval '1 day'
+        FROM generate_series(1, $1) g JOIN bench_user_ids u ON u.n = 1 + g % $2
+    """,
+    "email_verification_codes": """
+        INSERT INTO email_verification_codes (email, code, expires_at, used, created_at)
+        SELECT 'bench-user-' || (1 + g % $2) || '@mock.com', lpad((g % 1000000)::text, 6, '0'),
+               now() + (g % 400 - 380) * interval '1 day', g % 2 = 0, now() + (g % 400 - 381) * interval '1 day'
+        FROM generate_series(1, $1) g
+    """,
+    "email_verification_tokens": """
+        INSERT INTO email_verification_tokens (user_id, token, expires_at, used, created_at)
+        SELECT u.id, md5('verify-' || g), now() + (g % 400 - 380) * interval '1 day', g % 4 <> 0,
+               now() + (g % 400 - 381) * interval '1 day'
+        FROM generate_series(1, $1) g JOIN bench_user_ids u ON u.n = 1 + g % $2
+    """,
+    "cookie_consent": """
+        INSERT INTO cookie_consent (visitor_id, user_id, functional, analytics, marketing, created_at)
+        SELECT 'visitor-' || g, CASE WHEN g % 3 = 0 THEN u.id END, g % 2 = 0, g % 3 = 0, g % 5 = 0,
+               now() - (g % 700) * interval '1 day'
+        FROM generate_series(1, $1) g JOIN bench_user_ids u ON u.n = 1 + g % $2
+    """,
+    "consent_history": """
+        INSERT INTO consent_history (user_id, consent_type, consent_given, version, ip_address, user_agent, created_at)
+        SELECT u.id, (ARRAY['terms', 'privacy', 'marketing', 'cookies'])[1 + g % 4], g % 7 <> 0, 'v' || (1 + g % 3),
+               '10.0.' || (g % 256) || '.' || (g / 256 % 256), 'Mozilla/5.0 (bench)', now() - (g % 900) * interval '1 day'
+        FROM generate_series(1, $1) g JOIN bench_user_ids u ON u.n = 1 + g % $2
+    """,
+    "gdpr_requests": """
+        INSERT INTO gdpr_requests (user_id, request_type, status, requested_at)
+        SELECT u.id, CASE WHEN g % 2 = 0 THEN 'export' ELSE 'deletion' END,
+               (ARRAY['pending', 'completed', 'cancelled'])[1 + g % 3], now() - (g % 365) * interval '1 day'
+        FROM generate_series(1, $1) g JOIN bench_user_ids u ON u.n = 1 + g % $2
+    """,
+}
+
+# What the auth backends do all day; $1 = user number
+TRAFFIC_QUERIES = [
+    "SELECT id, password_hash, type, status FROM users WHERE lower(email) = 'bench-user-' || $1::int || '@mock.com'",
+    "UPDATE users SET updated_at = now() WHERE lower(email) = 'bench-user-' || $1::int || '@mock.com'",
+    "SELECT id FROM email_verification_codes WHERE email = 'bench-user-' || $1::int || '@mock.com' "
+    "AND code = '000000' AND used = false AND expires_at > now()",
+    "INSERT INTO consent_history (user_id, consent_type, consent_given) "
+    "SELECT id, 'cookies', true FROM users WHERE lower(email) = 'bench-user-' || $1::int || '@mock.com'",
+    "SELECT user_id FROM password_reset_tokens WHERE token = md5('reset-' || $1::int) AND used = false",
+]
+
+# Options the runner's migrate()/apply_file() read
+RUNNER_OPTIONS = argparse.Namespace(
+    lock_timeout="0", statement_timeout="0", slowest=0, strict=False, batch_size=None, sleep=None,
+)
+
+
+def quote_ident(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def bench_url(url):
+    parts = urlsplit(url)
+    return urlunsplit(parts._replace(path=parts.path + "_bench"))
+
+
+def maintenance_url(url):
+    return urlunsplit(urlsplit(url)._replace(path="/postgres"))
+
+
+def budget_for(migration_file, default):
+    match = BUDGET_DIRECTIVE.search(migration_file.read_text()) if migration_file.suffix == ".sql" else None
+    return float(match.group(1)) if match else default
+
+
+# ---------------------------------------------------------------------------
+# Setup
+# ---------------------------------------------------------------------------
+async def recreate_database(url):
+    name = urlsplit(url).path.lstrip("/")
+    conn = await asyncpg.connect(maintenance_url(url))
+    try:
+        await conn.execute(f"DROP DATABASE IF EXISTS {quote_ident(name)} WITH (FORCE)")
+        await conn.execute(f"CREATE DATABASE {quote_ident(name)}")
+    finally:
+        await conn.close()
+
+
+async def drop_database(url):
+    conn = await asyncpg.connect(maintenance_url(url))
+    try:
+        await conn.execute(f"DROP DATABASE IF EXISTS {quote_ident(urlsplit(url).path.lstrip('/'))} WITH (FORCE)")
+    finally:
+        await conn.close()
+
+
+async def files_under_test(migration_files, against=None, since=None):
+    """Split migration_files into (schema files applied before loading data, files to benchmark)."""
+    if since:
+        names = [f.name for f in migration_files]
+        if since not in names:
+            raise ValueError(f"{since} is not in {migration_files[0].parent}")
+        index = names.index(since)
+    elif against:
+        conn = await asyncpg.connect(against)
+        try:
+            pending = await run_migrations.pending_files(conn, migration_files, run_migrations.BASELINES["auth"])
+        finally:
+            await conn.close()
+        index = migration_files.index(pending[0]) if pending else len(migration_files)
+    else:
+        index = 1
+    if index == 0:
+        raise ValueError("the first migration creates the schema the dataset needs; benchmark later files")
+    return migration_files[:index], migration_files[index:]
+
+
+async def load_dataset(conn, users):
+    """Load the synthetic dataset; returns {table: rows}."""
+    counts = {}
+    start = time.perf_counter()
+    await conn.execute(LOAD_SQL["users"].format(password_hash=PASSWORD_HASH), users)
+    counts["users"] = users
+    await conn.execute(
+        "CREATE TEMP TABLE bench_user_ids AS SELECT row_number() OVER () AS n, id FROM users; "
+        "CREATE INDEX ON bench_user_ids (n)"
+    )
+    for table, ratio in PER_USER.items():
+        rows = max(1, int(users * ratio))
+        await conn.execute(LOAD_SQL[table], rows, users)
+        counts[table] = rows
+    await conn.execute("DROP TABLE bench_user_ids")
+    await conn.execute("ANALYZE")
+    size = await conn.fetchval("SELECT pg_size_pretty(pg_database_size(current_database()))")
+    print(f"  Loaded: {sum(counts.values()):,} rows ({size}) in {time.perf_counter() - start:.1f}s")
+    for table, rows in counts.items():
+        print(f"    {table:<28} {rows:>12,}")
+    return counts
+
+
+# ---------------------------------------------------------------------------
+# Measuring
+# ---------------------------------------------------------------------------
+async def traffic_worker(url, users, stop, latencies, errors):
+    conn = await asyncpg.connect(url)
+    rng = random.Random()
+    try:
+        while not stop.is_set():
+            query = rng.choice(TRAFFIC_QUERIES)
+            start = time.perf_counter()
+            try:
+                await conn.execute(query, rng.randint(1, users))
+            except asyncpg.PostgresError:
+                errors.append(query)  # e.g. a column the migration dropped
+            latencies.append(time.perf_counter() - start)
+    finally:
+        await conn.close()
+
+
+async def sample_lock_wait(url, pid, stop):
+    """Seconds the backend pid spent in a Lock wait, sampled every SAMPLE_SECONDS."""
+    conn = await asyncpg.connect(url)
+    waited = 0.0
+    try:
+        while not stop.is_set():
+            if await conn.fetchval("SELECT wait_event_type = 'Lock' FROM pg_stat_activity WHERE pid = $1", pid):
+                waited += SAMPLE_SECONDS
+            await asyncio.sleep(SAMPLE_SECONDS)
+    finally:
+        await conn.close()
+    return waited
+
+
+async def benchmark_file(conn, url, migration_file, users, traffic):
+    """Apply one migration under traffic; returns its measurements."""
+    stop = asyncio.Event()
+    latencies, errors = [], []
+    workers = [asyncio.create_task(traffic_worker(url, users, stop, latencies, errors)) for _ in range(traffic)]
+    sampler = asyncio.create_task(sample_lock_wait(url, conn.get_server_pid(), stop))
+    await asyncio.sleep(SAMPLE_SECONDS)  # let the traffic start
+    # The file runs under the lock_timeout a production run would use
+    await conn.execute("SELECT set_config('lock_timeout', $1, false)", run_migrations.DEFAULT_LOCK_TIMEOUT)
+    start = time.perf_counter()
+    try:
+        await run_migrations.apply_file(
+            conn, migration_file, run_migrations.checksum(migration_file), None,
+            run_migrations.logger("    "), RUNNER_OPTIONS,
+        )
+    finally:
+        seconds = time.perf_counter() - start
+        stop.set()
+        lock_wait = await sampler
+        await asyncio.gather(*workers, return_exceptions=True)
+    return {
+        "seconds": round(seconds, 3),
+        "lock_wait_seconds": round(lock_wait, 3),
+        "traffic_queries": len(latencies),
+        "traffic_max_seconds": round(max(latencies, default=0.0), 3),
+        "traffic_errors": len(errors),
+    }
+
+
+# ---------------------------------------------------------------------------
+# Main
+# ---------------------------------------------------------------------------
+async def benchmark(args):
+    _, default_url, migrations_dir = DATABASES["auth"]
+    url = args.database or bench_url(os.environ.get("AUTH_DATABASE_URL", default_url))
+    migrations_dir = REPO_ROOT / migrations_dir
+    migration_files = sorted(p for p in migrations_dir.iterdir() if p.suffix in run_migrations.MIGRATION_SUFFIXES)
+    try:
+        schema_files, tested = await files_under_test(migration_files, args.against, args.since)
+    except ValueError as e:
+        print(f"  {e}")
+        return False
+    if not tested:
+        print("  No pending migrations to benchmark")
+        return True
+
+    print(f"Benchmark database: {urlsplit(url).path.lstrip('/')} ({args.users:,} users)")
+    await recreate_database(url)
+    results = []
+    try:
+        conn = await asyncpg.connect(url)
+        try:
+            if not await run_migrations.migrate(conn, schema_files, run_migrations.logger("    "), RUNNER_OPTIONS):
+                return False
+            await load_dataset(conn, args.users)
+            print()
+            for migration_file in tested:
+                budget = budget_for(migration_file, args.budget)
+                print(f"  Applying {migration_file.name} (budget {budget:g}s)...")
+                result = await benchmark_file(conn, url, migration_file, args.users, args.traffic)
+                result.update(file=migration_file.name, budget_seconds=budget)
+                result["over_budget"] = (
+                    result["seconds"] > budget or result["traffic_max_seconds"] > args.traffic_budget
+                )
+                results.append(result)
+        finally:
+            await conn.close()
+    finally:
+        if not args.keep:
+            await drop_database(url)
+
+    print(f"\n{'=' * 78}")
+    print("  Migration benchmark")
+    print(f"{'=' * 78}")
+    print(f"    {'File':<36} {'Seconds':>9} {'Lock wait':>10} {'Traffic max':>12} {'Budget':>8}")
+    for r in results:
+        flag = "  OVER" if r["over_budget"] else ""
+        print(
+            f"    {r['file']:<36} {r['seconds']:9.2f} {r['lock_wait_seconds']:10.2f} "
+            f"{r['traffic_max_seconds']:12.2f} {r['budget_seconds']:8g}{flag}"
+        )
+    if args.report:
+        report = {
+            "finished_at": datetime.now(timezone.utc).isoformat(),
+            "users": args.users,
+            "traffic": args.traffic,
+            "traffic_budget_seconds": args.traffic_budget,
+            "migrations": results,
+        }
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(f"\nReport written to {args.report}")
+    return not any(r["over_budget"] for r in results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=DEFAULT_USERS, help=f"Synthetic users (default: {DEFAULT_USERS:,})")
+    parser.add_argument(
+        "--budget", type=float, default=DEFAULT_BUDGET_SECONDS,
+        help=f"Max seconds per migration (default: {DEFAULT_BUDGET_SECONDS:g})",
+    )
+    parser.add_argument("--traffic", type=int, default=DEFAULT_TRAFFIC, help="Concurrent traffic workers (0 for none)")
+    parser.add_argument(
+        "--traffic-budget", type=float, default=DEFAULT_TRAFFIC_BUDGET_SECONDS,
+        help=f"Max seconds a traffic query may hang (default: {DEFAULT_TRAFFIC_BUDGET_SECONDS:g})",
+    )
+    parser.add_argument("--against", help="Benchmark the files not applied in this database")
+    parser.add_argument("--since", help="Benchmark this file and everything after it")
+    parser.add_argument("--database", help="Scratch database URL (default: <auth database>_bench; it is recreated)")
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch database afterwards")
+    parser.add_argument("--report", help="Write the results as JSON to this path")
+    args = parser.parse_args()
+
+    if not asyncio.run(benchmark(args)):
+        sys.exit(1)
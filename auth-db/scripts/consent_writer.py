@@ -0,0 +1,170 @@
+"""
+Cookie consent writes as single-statement upserts, batched under load.
+
+cookie_consent has one row per visitor (UNIQUE (visitor_id), migration 005),
+and every anonymous page view on the four frontends may write it. Instead of
+a SELECT followed by an INSERT or UPDATE (two round trips, racing with the
+visitor's other tabs), a consent is one INSERT ... ON CONFLICT (visitor_id)
+DO UPDATE. A consent older than the stored one (updated_at) never overwrites
+it, so retried or reordered writes are harmless, and a known user_id is
+never replaced by an anonymous NULL.
+
+Two ways to write:
+
+    upsert(conn, consent)     one consent, one round trip; for requests
+                              that must not answer before it is stored
+    ConsentWriter(pool)       buffers consents and writes them every
+                              max_delay seconds, or as soon as max_rows
+                              visitors are waiting, with one multi-row
+                              upsert. Consents of the same visitor within
+                              a batch collapse into the latest.
+
+This module is what the backends' consent repositories call; it depends on
+asyncpg only.
+
+Usage:
+    writer = ConsentWriter(AuthDatabase.pool)
+    writer.start()                                  # app startup
+    await writer.record(Consent("v-123", analytics=True))
+    await writer.close()                            # app shutdown: flushes the rest
+"""
+import asyncio
+import logging
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Optional
+
+import asyncpg
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ROWS = 500
+DEFAULT_MAX_DELAY = 0.2
+
+# One row per array element; the arrays hold distinct visitor_ids (a
+# multi-row ON CONFLICT may not touch the same row twice)
+UPSERT_SQL = """
+    INSERT INTO cookie_consent AS c (visitor_id, user_id, functional, analytics, marketing, created_at, updated_at)
+    SELECT v.visitor_id, v.user_id, v.functional, v.analytics, v.marketing, v.at, v.at
+    FROM unnest($1::text[], $2::uuid[], $3::boolean[], $4::boolean[], $5::boolean[], $6::timestamptz[])
+        AS v(visitor_id, user_id, functional, analytics, marketing, at)
+    ON CONFLICT (visitor_id) DO UPDATE SET
+        user_id = COALESCE(EXCLUDED.user_id, c.user_id),
+        functional = EXCLUDED.functional,
+        analytics = EXCLUDED.analytics,
+        marketing = EXCLUDED.marketing,
+        updated_at = EXCLUDED.updated_at
+    WHERE c.updated_at <= EXCLUDED.updated_at
+"""
+
+
+@dataclass
+class Consent:
+    """A visitor's cookie choices at a point in time (necessary cookies are always on)."""
+
+    visitor_id: str
+    user_id: Optional[uuid.UUID] = None
+    functional: bool = False
+    analytics: bool = False
+    marketing: bool = False
+    at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+
+
+def merge(a, b):
+    """The later of two consents of one visitor, keeping a user_id only the other one had."""
+    earlier, later = (a, b) if a.at <= b.at else (b, a)
+    if later.user_id is None and earlier.user_id is not None:
+        later = Consent(
+            later.visitor_id, earlier.user_id, later.functional, later.analytics, later.marketing, later.at
+        )
+    return later
+
+
+def columns(consents):
+    consents = list(consents)
+    return (
+        [c.visitor_id for c in consents],
+        [c.user_id for c in consents],
+        [c.functional for c in consents],
+        [c.analytics for c in consents],
+        [c.marketing for c in consents],
+        [c.at for c in consents],
+    )
+
+
+async def upsert(conn, consent):
+    """Store one consent right away (conn may be a connection or a pool)."""
+    await conn.execute(UPSERT_SQL, *columns([consent]))
+
+
+class ConsentWriter:
+    """Buffers consents and stores them with one multi-row upsert per flush."""
+
+    def __init__(self, pool, max_rows=DEFAULT_MAX_ROWS, max_delay=DEFAULT_MAX_DELAY):
+        self.pool = pool
+        self.max_rows = max_rows
+        self.max_delay = max_delay
+        self._buffer = {}  # visitor_id -> Consent
+        self._flush_lock = asyncio.Lock()
+        self._task = None
+        # Counters for the backends' metrics endpoints
+        self.recorded = 0
+        self.coalesced = 0
+        self.flushes = 0
+        self.rows_written = 0
+        self.failed_flushes = 0
+
+    def start(self):
+        """Flush in the background every max_delay seconds."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def record(self, consent):
+        """Queue a consent; waits only when a full batch has to be flushed first."""
+        self.recorded += 1
+        queued = self._buffer.get(consent.visitor_id)
+        if queued is not None:
+            self.coalesced += 1
+            consent = merge(queued, consent)
+        self._buffer[consent.visitor_id] = consent
+        if len(self._buffer) >= self.max_rows:
+            await self.flush()
+
+    async def flush(self):
+        """Write everything buffered; returns the number of rows sent."""
+        async with self._flush_lock:
+            if not self._buffer:
+                return 0
+            batch, self._buffer = self._buffer, {}
+            try:
+                await self.pool.execute(UPSERT_SQL, *columns(batch.values()))
+            except BaseException:
+                # Back into the buffer, merged with whatever was recorded meanwhile
+                self.failed_flushes += 1
+                for visitor_id, consent in batch.items():
+                    queued = self._buffer.get(visitor_id)
+                    self._buffer[visitor_id] = consent if queued is None else merge(consent, queued)
+                raise
+            self.flushes += 1
+            self.rows_written += len(batch)
+            return len(batch)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.max_delay)
+            try:
+                await self.flush()
+            except (OSError, asyncpg.PostgresError):
+                logger.exception("cookie consent flush failed, %d visitors kept for the next one", len(self._buffer))
+
+    async def close(self):
+        """Stop the background flushes and write what is left."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+List auth users whose emails differ only in case.
+
+006_users_email_lower.sql makes lower(email) unique and refuses to run while
+two users share an email case-insensitively ("Jane@x.com" and "jane@x.com").
+This prints every such group with what is needed to decide which account to
+keep: id, type, status, verification and creation date. Resolve each group
+(merge the accounts, or rename the one nobody uses) and rerun the
+migrations. Exits 1 while conflicts remain, so it can gate a deploy.
+
+Usage:
+    python auth-db/scripts/email_case_conflicts.py
+    python auth-db/scripts/email_case_conflicts.py --csv conflicts.csv
+"""
+import argparse
+import asyncio
+import csv
+import os
+import sys
+
+import asyncpg
+
+from run_migrations import DATABASES
+
+CONFLICTS_SQL = """
+    SELECT lower(email) AS normalized, id, email, type, status, email_verified, created_at
+    FROM users
+    WHERE lower(email) IN (SELECT lower(email) FROM users GROUP BY lower(email) HAVING count(*) > 1)
+    ORDER BY lower(email), created_at
+"""
+
+
+async def main(args):
+    env_var, default_url, _ = DATABASES["auth"]
+    conn = await asyncpg.connect(args.database or os.environ.get(env_var, default_url))
+    try:
+        rows = await conn.fetch(CONFLICTS_SQL)
+    finally:
+        await conn.close()
+
+    if not rows:
+        print("  No case-insensitive email conflicts")
+        return True
+
+    groups = {}
+    for row in rows:
+        groups.setdefault(row["normalized"], []).append(row)
+    print(f"  {len(groups)} emails shared by {len(rows)} users:")
+    for normalized, users in groups.items():
+        print(f"\n  {normalized}")
+        for user in users:
+            verified = "verified email" if user["email_verified"] else "unverified email"
+            print(
+                f"    {user['email']:<40} {user['id']}  {user['type']:<8} {user['status']:<10} "
+                f"{verified:<17} created {user['created_at']:%Y-%m-%d}"
+            )
+
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["normalized", "id", "email", "type", "status", "email_verified", "created_at"])
+            for row in rows:
+                writer.writerow([row[key] for key in row.keys()])
+        print(f"\n  Written to {args.csv}")
+    return False
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database", help="Auth database URL (default: AUTH_DATABASE_URL)")
+    parser.add_argument("--csv", help="Also write the conflicting users to this CSV file")
+    args = parser.parse_args()
+
+    if not asyncio.run(main(args)):
+        sys.exit(1)
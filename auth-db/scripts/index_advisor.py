@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Find redundant and unused indexes in the auth, marketplace, booking and PMS
+databases, and write the migrations that drop them.
+
+Every index is maintained on every INSERT and on every UPDATE of its columns
+(signup, login, token issue), so an index that no query needs only costs.
+For each database it reports, with sizes:
+
+    duplicate     same table, access method, key columns, operator classes,
+                  expressions and predicate as another index, e.g. a plain
+                  index on a UNIQUE column
+    prefix        btree whose key columns are a leading prefix of another
+                  btree with the same predicate (that one serves its lookups)
+    unused        no scans in pg_stat_user_indexes since the statistics were
+                  last reset
+    low-card      single-column btree on a column with at most
+                  LOW_CARDINALITY distinct values (pg_stats), e.g. a boolean;
+                  a scan of half the table is faster without it
+
+Indexes that enforce a constraint (primary key, UNIQUE, exclusion) or are
+unique themselves are never proposed for dropping; a duplicate of one is.
+
+--write saves a `-- migrate:no-transaction` migration of DROP INDEX
+CONCURRENTLY statements as the next numbered file of each database's
+migrations directory. It drops duplicates and prefixes; unused and
+low-card indexes only with --include-unused, after checking the numbers
+come from production (scans are counted per server: check replicas too)
+over a period that includes monthly jobs.
+
+Usage:
+    python auth-db/scripts/index_advisor.py
+    python auth-db/scripts/index_advisor.py --only auth,booking --write
+    python auth-db/scripts/index_advisor.py --write --include-unused
+"""
+import argparse
+import asyncio
+import os
+import re
+import sys
+from datetime import datetime, timezone
+
+import asyncpg
+
+from run_migrations import DATABASES, REPO_ROOT, SQUASHED_DIR
+
+LOW_CARDINALITY = 3
+
+INDEXES_SQL = """
+    SELECT i.indexrelid AS oid, n.nspname AS schema, t.relname AS table_name, c.relname AS name,
+           am.amname AS method,
+           string_to_array(i.indkey::text, ' ')::int[] AS columns,
+           i.indnkeyatts AS key_columns,
+           string_to_array(i.indclass::text, ' ')::oid[] AS opclasses,
+           pg_get_expr(i.indexprs, i.indrelid) AS expressions,
+           pg_get_expr(i.indpred, i.indrelid) AS predicate,
+           i.indisunique AS is_unique,
+           con.conname AS constraint_name,
+           i.indisvalid AS is_valid,
+           pg_relation_size(i.indexrelid) AS size,
+           s.idx_scan AS scans,
+           pg_get_indexdef(i.indexrelid) AS definition,
+           (SELECT attname FROM pg_attribute WHERE attrelid = i.indrelid AND attnum = i.indkey[0]) AS first_column
+    FROM pg_index i
+    JOIN pg_class c ON c.oid = i.indexrelid
+    JOIN pg_class t ON t.oid = i.indrelid
+    JOIN pg_namespace n ON n.oid = t.relnamespace
+    JOIN pg_am am ON am.oid = c.relam
+    LEFT JOIN pg_stat_user_indexes s ON s.indexrelid = i.indexrelid
+    LEFT JOIN pg_constraint con ON con.conindid = i.indexrelid AND con.contype IN ('p', 'u', 'x')
+    WHERE n.nspname NOT IN ('pg_catalog', 'information_schema') AND n.nspname !~ '^pg_toast'
+      AND NOT c.relispartition
+    ORDER BY n.nspname, t.relname, c.relname
+"""
+
+N_DISTINCT_SQL = "SELECT n_distinct FROM pg_stats WHERE schemaname = $1 AND tablename = $2 AND attname = $3"
+
+STATS_RESET_SQL = "SELECT stats_reset FROM pg_stat_database WHERE datname = current_database()"
+
+
+def pretty_size(size):
+    for unit in ("bytes", "kB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "bytes" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def enforces(index):
+    """True if dropping the index would drop a constraint or uniqueness."""
+    return bool(index["constraint_name"]) or index["is_unique"]
+
+
+def same_shape(a, b):
+    return (
+        a["method"] == b["method"]
+        and a["expressions"] == b["expressions"]
+        and a["predicate"] == b["predicate"]
+    )
+
+
+# ---------------------------------------------------------------------------
+# Findings
+# ---------------------------------------------------------------------------
+def overlap_findings(indexes):
+    """(index, kind, reason) for duplicates and redundant prefixes."""
+    findings = {}
+    by_table = {}
+    for index in indexes:
+        by_table.setdefault((index["schema"], index["table_name"]), []).append(index)
+
+    for table_indexes in by_table.values():
+        for a in table_indexes:
+            for b in table_indexes:
+                if a is b or a["oid"] in findings or not b["is_valid"] or not same_shape(a, b) or enforces(a):
+                    continue
+                a_keys = a["columns"][:a["key_columns"]]
+                b_keys = b["columns"][:b["key_columns"]]
+                a_classes = a["opclasses"][:a["key_columns"]]
+                b_classes = b["opclasses"][:b["key_columns"]]
+                if a_keys == b_keys and a_classes == b_classes and a["columns"] == b["columns"]:
+                    # Exact duplicates: drop the plain one, or the newer of two plain ones
+                    if enforces(b) or b["oid"] < a["oid"]:
+                        findings[a["oid"]] = (a, "duplicate", f"same as {b['name']}")
+                elif (
+                    a["method"] == "btree" and not a["expressions"]
+                    and len(a_keys) < len(b_keys)
+                    and b_keys[:len(a_keys)] == a_keys and b_classes[:len(a_classes)] == a_classes
+                    and not a["columns"][a["key_columns"]:]
+                ):
+                    findings[a["oid"]] = (a, "prefix", f"leading columns of {b['name']}")
+    return list(findings.values())
+
+
+async def usage_findings(conn, indexes, flagged):
+    findings = []
+    for index in indexes:
+        if index["oid"] in flagged or enforces(index) or not index["is_valid"]:
+            continue
+        if index["scans"] == 0:
+            findings.append((index, "unused", "0 scans"))
+        elif (
+            index["method"] == "btree" and index["key_columns"] == 1 and not index["expressions"]
+            and not index["predicate"] and index["first_column"]
+        ):
+            n_distinct = await conn.fetchval(
+                N_DISTINCT_SQL, index["schema"], index["table_name"], index["first_column"]
+            )
+            if n_distinct is not None and 0 < n_distinct <= LOW_CARDINALITY:
+                findings.append((index, "low-card", f"{n_distinct:g} distinct values, {index['scans']:,} scans"))
+    return findings
+
+
+async def advise(conn):
+    """(redundant, unused or low-cardinality) findings for one database."""
+    indexes = [dict(row) for row in await conn.fetch(INDEXES_SQL)]
+    overlaps = overlap_findings(indexes)
+    flagged = {index["oid"] for index, _, _ in overlaps}
+    usage = await usage_findings(conn, indexes, flagged)
+    invalid = [
+        (index, "invalid", "failed concurrent build")
+        for index in indexes if not index["is_valid"] and index["oid"] not in flagged
+    ]
+    return overlaps + invalid, usage
+
+
+# ---------------------------------------------------------------------------
+# Migrations
+# ---------------------------------------------------------------------------
+def next_migration_name(migrations_dir, slug):
+    numbers = []
+    for directory in (migrations_dir, migrations_dir / SQUASHED_DIR):
+        if directory.is_dir():
+            numbers += [p.name.split("_", 1)[0] for p in directory.iterdir() if re.match(r"\d+_", p.name)]
+    width = max((len(n) for n in numbers), default=3)
+    number = max((int(n) for n in numbers), default=0) + 1
+    return f"{number:0{width}d}_{slug}.sql"
+
+
+def drop_migration(name, findings):
+    lines = [
+        "-- migrate:no-transaction",
+        f"-- Redundant indexes in the {name} database, from auth-db/scripts/index_advisor.py",
+        f"-- on {datetime.now(timezone.utc):%Y-%m-%d}. CONCURRENTLY: writes continue while each drops.",
+        "",
+    ]
+    for index, kind, reason in findings:
+        lines.append(f"-- {kind}: {reason} ({pretty_size(index['size'])})")
+        lines.append(f"-- was: {index['definition']}")
+        lines.append(f'DROP INDEX CONCURRENTLY IF EXISTS "{index["schema"]}"."{index["name"]}";')
+        lines.append("")
+    return "\n".join(lines)
+
+
+# ---------------------------------------------------------------------------
+# Main
+# ---------------------------------------------------------------------------
+def print_findings(title, findings):
+    if not findings:
+        return
+    print(f"\n  {title}:")
+    print(f"    {'Index':<44} {'Table':<28} {'Size':>10} {'Scans':>10}  Finding")
+    for index, kind, reason in findings:
+        scans = "-" if index["scans"] is None else f"{index['scans']:,}"
+        print(
+            f"    {index['name']:<44} {index['table_name']:<28} {pretty_size(index['size']):>10} "
+            f"{scans:>10}  {kind}: {reason}"
+        )
+    print(f"    {'total':<44} {'':<28} {pretty_size(sum(index['size'] for index, _, _ in findings)):>10}")
+
+
+async def advise_database(name, write=False, include_unused=False):
+    env_var, default_url, migrations_dir = DATABASES[name]
+    try:
+        conn = await asyncpg.connect(os.environ.get(env_var, default_url))
+    except (OSError, asyncpg.PostgresError) as e:
+        print(f"\n[{name}] Skipped: cannot connect ({e})")
+        return False
+    try:
+        print(f"\n[{name}]")
+        droppable, usage = await advise(conn)
+        stats_reset = await conn.fetchval(STATS_RESET_SQL)
+    finally:
+        await conn.close()
+
+    if not droppable and not usage:
+        print("  No redundant or unused indexes")
+        return True
+    print_findings("Redundant", droppable)
+    since = f"since {stats_reset:%Y-%m-%d}" if stats_reset else "since the statistics were created"
+    print_findings(f"Unused or low-cardinality (scans {since})", usage)
+
+    if write:
+        findings = droppable + (usage if include_unused else [])
+        if findings:
+            migrations_dir = REPO_ROOT / migrations_dir
+            path = migrations_dir / next_migration_name(migrations_dir, "drop_redundant_indexes")
+            path.write_text(drop_migration(name, findings))
+            print(f"\n  Created: {path.relative_to(REPO_ROOT)} ({len(findings)} indexes)")
+    return True
+
+
+async def main(names, args):
+    results = [await advise_database(name, args.write, args.include_unused) for name in names]
+    return all(results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--only", default=",".join(DATABASES),
+        help=f"Comma-separated subset of {', '.join(DATABASES)}",
+    )
+    parser.add_argument("--write", action="store_true", help="Write DROP INDEX CONCURRENTLY migrations")
+    parser.add_argument(
+        "--include-unused", action="store_true", help="With --write: also drop unused and low-cardinality indexes",
+    )
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.only.split(",") if name.strip()]
+    unknown = [name for name in names if name not in DATABASES]
+    if unknown:
+        parser.error(f"unknown database(s): {', '.join(unknown)}")
+    if not asyncio.run(main(names, args)):
+        sys.exit(1)
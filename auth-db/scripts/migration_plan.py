@@ -0,0 +1,396 @@
+"""
+Dry-run report for pending migrations (run_migrations.py --plan).
+
+Every pending statement is classified by the table lock it takes and what it
+does to the table while holding it:
+
+    metadata  catalog-only change, the lock is held for milliseconds
+    data      UPDATE/DELETE/INSERT ... SELECT over existing rows
+    scan      full table scan under the lock (SET NOT NULL, validating a
+              constraint, ...)
+    index     index build (a plain CREATE INDEX blocks writes throughout)
+    rewrite   the whole table and its indexes are rewritten (ALTER COLUMN
+              TYPE, ADD COLUMN with a volatile default, ...)
+
+DO blocks, and calls to functions the pending files create, are judged by
+the statements in their bodies (EXECUTE format('...') text included);
+dynamic SQL that cannot be read is flagged for review. The affected tables
+are sized from pg_class (reltuples and relation sizes). Estimated times
+assume the throughputs below; they are for ranking statements and
+scheduling heavy ones off-peak, not a promise. Nothing is executed or
+locked.
+"""
+import re
+
+import sql_statements
+
+# Weakest to strongest (https://www.postgresql.org/docs/current/explicit-locking.html)
+LOCK_LEVELS = [
+    "none",
+    "ACCESS SHARE",
+    "ROW SHARE",
+    "ROW EXCLUSIVE",
+    "SHARE UPDATE EXCLUSIVE",
+    "SHARE",
+    "SHARE ROW EXCLUSIVE",
+    "EXCLUSIVE",
+    "ACCESS EXCLUSIVE",
+]
+RISKS = ["metadata", "data", "scan", "index", "rewrite"]
+
+# What the lock blocks for other sessions while it is held
+BLOCKS = {
+    "ACCESS EXCLUSIVE": "reads+writes",
+    "EXCLUSIVE": "writes",
+    "SHARE ROW EXCLUSIVE": "writes",
+    "SHARE": "writes",
+}
+
+# Rough bytes/second per risk, against the heap (data, scan, index) or the
+# heap plus indexes (rewrite)
+THROUGHPUT = {
+    "data": 20e6,
+    "scan": 200e6,
+    "index": 50e6,
+    "rewrite": 40e6,
+}
+
+# Column types that fill every existing row from a sequence
+SERIAL_TYPES = re.compile(r"\b(small|big)?serial\b", re.IGNORECASE)
+FUNCTION_CALL = re.compile(r"(\w+)\s*\(")
+
+NAME = r'(?:"[^"]+"|\w+)(?:\.(?:"[^"]+"|\w+))?'
+IF_EXISTS = r"(?:IF\s+(?:NOT\s+)?EXISTS\s+)?"
+
+# DO blocks and function bodies ($$ ... $$ or $tag$ ... $tag$)
+DOLLAR_BODY = re.compile(r"(\$(?:[A-Za-z_]\w*)?\$)(.*?)\1", re.DOTALL)
+FUNCTION_DEFINITION = re.compile(r"^CREATE\s+(?:OR\s+REPLACE\s+)?FUNCTION\s+(" + NAME + r")\s*\(", re.IGNORECASE)
+# A statement inside a PL/pgSQL body: at the start of a body statement, after
+# THEN/ELSE/LOOP/BEGIN, or as the text of an EXECUTE
+BODY_STATEMENT = re.compile(
+    r"(?:^|\bTHEN\b|\bELSE\b|\bLOOP\b|\bBEGIN\b|\bEXECUTE\s+(?:format\s*\(\s*)?')\s*"
+    r"((?:ALTER|CREATE|DROP|TRUNCATE|UPDATE|DELETE|INSERT|LOCK|PERFORM|SELECT|WITH|VACUUM|CLUSTER|REFRESH)\b)",
+    re.IGNORECASE,
+)
+# Volatile built-ins a migration may call without taking table locks
+HARMLESS_CALLS = {
+    "set_config", "nextval", "setval", "random", "gen_random_uuid", "uuid_generate_v4",
+    "pg_advisory_lock", "pg_advisory_unlock", "pg_advisory_xact_lock",
+}
+
+TABLE_SIZE_SQL = """
+    SELECT c.reltuples::bigint AS rows,
+           pg_relation_size(c.oid) AS heap_bytes,
+           pg_total_relation_size(c.oid) AS total_bytes
+    FROM pg_class c WHERE c.oid = to_regclass($1)
+"""
+INDEX_TABLE_SQL = "SELECT indrelid::regclass::text FROM pg_index WHERE indexrelid = to_regclass($1)"
+VOLATILE_FUNCTIONS_SQL = "SELECT DISTINCT proname FROM pg_proc WHERE provolatile = 'v'"
+
+
+class Step:
+    """One classified statement (or ALTER TABLE subcommand)."""
+
+    def __init__(self, lock, risk, table=None, note=""):
+        self.lock, self.risk, self.table, self.note = lock, risk, table, note
+
+
+def strongest(steps):
+    lock = max((s.lock for s in steps), key=LOCK_LEVELS.index)
+    risk = max((s.risk for s in steps), key=RISKS.index)
+    notes = "; ".join(dict.fromkeys(s.note for s in steps if s.note))
+    return Step(lock, risk, steps[0].table, notes)
+
+
+def normalize(sql):
+    """Statement text without comments, on one line."""
+    sql = re.sub(r"--[^\n]*", " ", sql)
+    sql = re.sub(r"/\*.*?\*/", " ", sql, flags=re.DOTALL)
+    return " ".join(sql.split())
+
+
+def split_top_level(text):
+    """Split on commas outside parentheses and quotes."""
+    parts, depth, quote, current = [], 0, None, []
+    for c in text:
+        if quote:
+            if c == quote:
+                quote = None
+        elif c in "'\"":
+            quote = c
+        elif c == "(":
+            depth += 1
+        elif c == ")":
+            depth -= 1
+        elif c == "," and depth == 0:
+            parts.append("".join(current).strip())
+            current = []
+            continue
+        current.append(c)
+    parts.append("".join(current).strip())
+    return [p for p in parts if p]
+
+
+def has_volatile_call(expression, volatile):
+    return any(name.lower() in volatile for name in FUNCTION_CALL.findall(expression))
+
+
+def classify_alter_action(action, table, volatile):
+    a = action.upper()
+    if a.startswith("ADD") and not re.match(r"ADD\s+(CONSTRAINT|PRIMARY|UNIQUE|FOREIGN|CHECK|EXCLUDE)\b", a):
+        if re.search(r"\bGENERATED\s+ALWAYS\s+AS\s*\(.*\)\s*STORED\b", a):
+            return Step("ACCESS EXCLUSIVE", "rewrite", table, "stored generated column rewrites the table")
+        if re.search(r"\bGENERATED\b.*\bAS\s+IDENTITY\b", a) or SERIAL_TYPES.search(action):
+            return Step("ACCESS EXCLUSIVE", "rewrite", table, "identity/serial column fills every row")
+        default = re.search(r"\bDEFAULT\s+(.+)", action, re.IGNORECASE)
+        if default and has_volatile_call(default.group(1), volatile):
+            return Step("ACCESS EXCLUSIVE", "rewrite", table, "volatile DEFAULT rewrites the table")
+        if re.search(r"\bNOT\s+NULL\b", a) and not default:
+            return Step("ACCESS EXCLUSIVE", "metadata", table, "NOT NULL without DEFAULT fails on a non-empty table")
+        if re.search(r"\b(PRIMARY\s+KEY|UNIQUE)\b", a):
+            return Step("ACCESS EXCLUSIVE", "rewrite", table, "new column with an index")
+        return Step("ACCESS EXCLUSIVE", "metadata", table)
+    if re.match(r"ALTER\s+(COLUMN\s+)?\S+\s+(SET\s+DATA\s+)?TYPE\b", a):
+        return Step("ACCESS EXCLUSIVE", "rewrite", table,
+                    "ALTER TYPE rewrites the table and rebuilds its indexes unless binary-coercible")
+    if re.match(r"ALTER\s+(COLUMN\s+)?\S+\s+SET\s+NOT\s+NULL\b", a):
+        return Step("ACCESS EXCLUSIVE", "scan", table,
+                    "SET NOT NULL scans the table (skipped if a valid CHECK (col IS NOT NULL) exists)")
+    if a.startswith("ADD"):
+        if "USING INDEX" in a:
+            return Step("ACCESS EXCLUSIVE", "metadata", table)
+        if re.search(r"\b(PRIMARY\s+KEY|UNIQUE|EXCLUDE)\b", a):
+            return Step("ACCESS EXCLUSIVE", "index", table,
+                        "builds an index under ACCESS EXCLUSIVE; prefer CREATE UNIQUE INDEX CONCURRENTLY + USING INDEX")
+        not_valid = "NOT VALID" in a
+        if re.search(r"\bFOREIGN\s+KEY\b", a):
+            return Step("SHARE ROW EXCLUSIVE", "metadata" if not_valid else "scan", table,
+                        "" if not_valid else "validates every row; prefer NOT VALID + VALIDATE CONSTRAINT")
+        if re.search(r"\bCHECK\b", a):
+            return Step("ACCESS EXCLUSIVE", "metadata" if not_valid else "scan", table,
+                        "" if not_valid else "validates every row; prefer NOT VALID + VALIDATE CONSTRAINT")
+    if a.startswith("VALIDATE CONSTRAINT"):
+        return Step("SHARE UPDATE EXCLUSIVE", "scan", table)
+    if re.match(r"(SET\s+TABLESPACE|SET\s+(UN)?LOGGED|SET\s+WITHOUT\s+OIDS)\b", a):
+        return Step("ACCESS EXCLUSIVE", "rewrite", table)
+    if re.match(r"SET\s*\(|RESET\s*\(|SET\s+STATISTICS|ALTER\s+(COLUMN\s+)?\S+\s+SET\s+STATISTICS", a):
+        return Step("SHARE UPDATE EXCLUSIVE", "metadata", table)
+    if re.match(r"(ENABLE|DISABLE)\s+TRIGGER\b", a):
+        return Step("SHARE ROW EXCLUSIVE", "metadata", table)
+    if re.match(r"ATTACH\s+PARTITION\b", a):
+        return Step("SHARE UPDATE EXCLUSIVE", "scan", table,
+                    "scans the partition unless a matching CHECK constraint exists")
+    if re.match(r"DETACH\s+PARTITION\b.*\bCONCURRENTLY\b", a):
+        return Step("SHARE UPDATE EXCLUSIVE", "metadata", table)
+    if re.match(r"(DROP|RENAME|ALTER\s+(COLUMN\s+)?\S+\s+(SET|DROP)\s+DEFAULT|ALTER\s+(COLUMN\s+)?\S+\s+DROP\s+NOT\s+NULL"
+                r"|OWNER|DETACH\s+PARTITION|REPLICA\s+IDENTITY)", a):
+        return Step("ACCESS EXCLUSIVE", "metadata", table)
+    return Step("ACCESS EXCLUSIVE", "metadata", table, f"unrecognized ALTER TABLE action, review: {action[:40]}")
+
+
+def function_bodies(sql):
+    """{function name: body} for the CREATE FUNCTION statements in sql (names without schema, lowercase)."""
+    bodies = {}
+    for statement in sql_statements.split(sql):
+        match = FUNCTION_DEFINITION.match(statement.sql)
+        body = DOLLAR_BODY.search(statement.sql)
+        if match and body:
+            bodies[match.group(1).split(".")[-1].strip('"').lower()] = body.group(2)
+    return bodies
+
+
+def classify_body(body, volatile, functions, seen):
+    """The strongest step among the statements of a DO block or function body."""
+    steps, dynamic = [], False
+    for statement in sql_statements.split(body):
+        text = normalize(statement.sql)
+        # format() placeholders stand in for names: quote them so they parse
+        text = re.sub(r"%[IsL]", '"%s"', text)
+        for match in BODY_STATEMENT.finditer(text):
+            step = classify(text[match.start(1):], volatile, functions, seen)
+            if step.table and "%" in step.table:
+                step.table = None  # only known when the body runs
+            steps.append(step)
+        dynamic = dynamic or re.search(r"\bEXECUTE\s+(?!format\s*\(\s*')(?!')", text, re.IGNORECASE)
+    if dynamic:
+        steps.append(Step("ACCESS EXCLUSIVE", "metadata", None, "runs dynamic SQL, review"))
+    if not steps:
+        return Step("none", "metadata", None)
+    # The table of the strongest lock goes with the result
+    steps.sort(key=lambda step: (LOCK_LEVELS.index(step.lock), step.table is not None), reverse=True)
+    return strongest(steps)
+
+
+def classify_calls(s, volatile, functions, seen):
+    """SELECT/PERFORM: classify the bodies of functions defined in the plan, flag other volatile calls."""
+    steps = []
+    for name in dict.fromkeys(n.lower() for n in FUNCTION_CALL.findall(s)):
+        if name in functions and name not in seen:
+            steps.append(classify_body(functions[name], volatile, functions, seen | {name}))
+        elif name in volatile and name not in HARMLESS_CALLS and name not in functions:
+            steps.append(Step("ACCESS EXCLUSIVE", "metadata", None, f"calls {name}(), review what it locks"))
+    return strongest(steps) if steps else Step("none", "metadata", None)
+
+
+def classify(sql, volatile, functions=None, seen=frozenset()):
+    """Classify one statement. Returns a Step, with the table name as written (or None).
+
+    functions maps the names of functions created by the planned files to
+    their bodies (function_bodies), so calls to them are judged by what they do.
+    """
+    functions = functions or {}
+    s = normalize(sql)
+    u = s.upper()
+
+    def table_after(pattern):
+        match = re.search(pattern + r"\s*(" + NAME + ")", s, re.IGNORECASE)
+        return match.group(1) if match else None
+
+    if u.startswith("ALTER TABLE"):
+        match = re.match(r"ALTER\s+TABLE\s+" + IF_EXISTS + r"(?:ONLY\s+)?(" + NAME + r")\s+(.*)", s, re.IGNORECASE)
+        if not match:
+            return Step("ACCESS EXCLUSIVE", "metadata", None, "unparsed ALTER TABLE, review")
+        table, actions = match.group(1), match.group(2)
+        if re.match(r"RENAME\b", actions, re.IGNORECASE):
+            return Step("ACCESS EXCLUSIVE", "metadata", table)
+        return strongest([classify_alter_action(a, table, volatile) for a in split_top_level(actions)])
+
+    if re.match(r"CREATE\s+(UNIQUE\s+)?INDEX\b", u):
+        table = table_after(r"\bON\s+(?:ONLY\s+)?")
+        if "CONCURRENTLY" in u.split(" ON ", 1)[0]:
+            return Step("SHARE UPDATE EXCLUSIVE", "index", table, "concurrent build: two table scans, writes continue")
+        return Step("SHARE", "index", table, "blocks writes for the whole build; consider CONCURRENTLY")
+    if re.match(r"DROP\s+INDEX\b", u):
+        if "CONCURRENTLY" in u:
+            return Step("SHARE UPDATE EXCLUSIVE", "metadata", table_after(r"INDEX\s+CONCURRENTLY\s+" + IF_EXISTS))
+        return Step("ACCESS EXCLUSIVE", "metadata", table_after(r"INDEX\s+" + IF_EXISTS))
+    if re.match(r"CREATE\s+(UNLOGGED\s+|TEMP(ORARY)?\s+)?TABLE\b", u):
+        partition_of = re.search(r"\bPARTITION\s+OF\s+(" + NAME + ")", s, re.IGNORECASE)
+        if partition_of:
+            return Step("ACCESS EXCLUSIVE", "metadata", partition_of.group(1),
+                        "new partition; scans the DEFAULT partition if there is one")
+        if re.search(r"\bAS\s+(SELECT|TABLE|VALUES|WITH)\b", u):
+            return Step("ACCESS SHARE", "data", None, "copies the query result into a new table")
+        return Step("none", "metadata", None, "new table")
+    if re.match(r"DROP\s+TABLE\b|TRUNCATE\b", u):
+        return Step("ACCESS EXCLUSIVE", "metadata", table_after(r"^(?:DROP\s+TABLE|TRUNCATE(?:\s+TABLE)?)\s+" + IF_EXISTS))
+    if re.match(r"(WITH\b.*\b)?UPDATE\b", u):
+        return Step("ROW EXCLUSIVE", "data", table_after(r"\bUPDATE\s+(?:ONLY\s+)?"),
+                    "" if " WHERE " in u else "updates every row in one transaction; consider a .py backfill")
+    if re.match(r"(WITH\b.*\b)?DELETE\b", u):
+        return Step("ROW EXCLUSIVE", "data", table_after(r"\bDELETE\s+FROM\s+(?:ONLY\s+)?"))
+    if re.match(r"(WITH\b.*\b)?INSERT\b", u):
+        risk = "data" if re.search(r"\bSELECT\b", u) else "metadata"
+        return Step("ROW EXCLUSIVE", risk, table_after(r"\bINSERT\s+INTO\s+"))
+    if re.match(r"CREATE\s+(OR\s+REPLACE\s+)?(CONSTRAINT\s+)?TRIGGER\b", u):
+        return Step("SHARE ROW EXCLUSIVE", "metadata", table_after(r"\bON\s+"))
+    if re.match(r"DROP\s+TRIGGER\b", u):
+        return Step("ACCESS EXCLUSIVE", "metadata", table_after(r"\bON\s+"))
+    if re.match(r"(VACUUM\s+(\(.*FULL.*\)|FULL)|CLUSTER)\b", u):
+        return Step("ACCESS EXCLUSIVE", "rewrite", table_after(r"^(?:VACUUM\s+(?:\([^)]*\)|FULL)|CLUSTER)\s+"))
+    if re.match(r"REFRESH\s+MATERIALIZED\s+VIEW\b", u):
+        if "CONCURRENTLY" in u:
+            return Step("EXCLUSIVE", "data", table_after(r"VIEW\s+CONCURRENTLY\s+"))
+        return Step("ACCESS EXCLUSIVE", "data", table_after(r"VIEW\s+"))
+    if re.match(r"LOCK\s+(TABLE\s+)?", u):
+        mode = re.search(r"\bIN\s+(.+?)\s+MODE\b", u)
+        lock = mode.group(1) if mode and mode.group(1) in LOCK_LEVELS else "ACCESS EXCLUSIVE"
+        return Step(lock, "metadata", table_after(r"^LOCK\s+(?:TABLE\s+)?(?:ONLY\s+)?"))
+    if re.match(r"DO\b", u):
+        body = DOLLAR_BODY.search(sql)
+        return classify_body(body.group(2), volatile, functions, seen) if body else Step(
+            "ACCESS EXCLUSIVE", "metadata", None, "unparsed DO block, review")
+    if re.match(r"(SELECT|PERFORM)\b", u):
+        return classify_calls(s, volatile, functions, seen)
+    if re.match(r"(CREATE|DROP|ALTER|COMMENT|GRANT|REVOKE|SET)\b", u):
+        return Step("none", "metadata", None)
+    return Step("ACCESS EXCLUSIVE", "metadata", None, "unrecognized statement, review")
+
+
+def format_bytes(n):
+    for unit in ("B", "kB", "MB", "GB"):
+        if n < 1024:
+            return f"{n:.0f} {unit}"
+        n /= 1024
+    return f"{n:.1f} TB"
+
+
+async def table_size(conn, name, sizes):
+    """pg_class size row for a table (cached in sizes), None if it does not exist yet."""
+    if name not in sizes:
+        try:
+            sizes[name] = await conn.fetchrow(TABLE_SIZE_SQL, name)
+        except Exception:  # not a valid relation name
+            sizes[name] = None
+    return sizes[name]
+
+
+def estimate_seconds(step, size):
+    if size is None or step.risk not in THROUGHPUT:
+        return 0.0
+    bytes_ = size["total_bytes"] if step.risk == "rewrite" else size["heap_bytes"]
+    return bytes_ / THROUGHPUT[step.risk]
+
+
+def backfill_step(migration_file):
+    """A .py backfill: chunked ROW EXCLUSIVE updates, never a long lock."""
+    match = re.search(r"^TABLE\s*=\s*['\"]([^'\"]+)['\"]", migration_file.read_text(), re.MULTILINE)
+    return Step("ROW EXCLUSIVE", "data", match.group(1) if match else None, "chunked backfill, short transactions")
+
+
+async def plan(conn, migration_files, log):
+    """Print the lock/rewrite report for the given (pending) migration files."""
+    if not migration_files:
+        log("Plan: nothing pending")
+        return True
+
+    volatile = {row["proname"] for row in await conn.fetch(VOLATILE_FUNCTIONS_SQL)}
+    functions = {}
+    for migration_file in migration_files:
+        if migration_file.suffix == ".sql":
+            functions.update(function_bodies(migration_file.read_text()))
+    sizes, heavy = {}, []
+    total_seconds = 0.0
+    log(f"Plan: {len(migration_files)} pending file(s), nothing will be applied")
+    log()
+    for migration_file in migration_files:
+        log(migration_file.name)
+        if migration_file.suffix == ".py":
+            items = [(None, backfill_step(migration_file))]
+        else:
+            items = [
+                (st, classify(st.sql, volatile, functions)) for st in sql_statements.split(migration_file.read_text())
+            ]
+
+        for statement, step in items:
+            table = step.table
+            if table and statement and re.match(r"DROP\s+INDEX", statement.sql, re.IGNORECASE):
+                table = await conn.fetchval(INDEX_TABLE_SQL, table) or table
+            size = await table_size(conn, table, sizes) if table else None
+            seconds = estimate_seconds(step, size)
+            total_seconds += seconds
+
+            if size is None:
+                where = f"{table} (new)" if table else "-"
+            else:
+                rows = f"{size['rows']:,} rows" if size["rows"] >= 0 else "not analyzed"
+                where = f"{table} ({format_bytes(size['total_bytes'])}, {rows})"
+            blocks = BLOCKS.get(step.lock, "-")
+            estimate = f"~{seconds:.0f}s" if seconds >= 1 else ""
+            line = f"line {statement.line}" if statement else "backfill"
+            log(f"  {line:<10} {step.lock:<22} {step.risk:<8} blocks {blocks:<12} {where} {estimate}".rstrip())
+            log(f"  {'':<10} {statement.summary if statement else ''}".rstrip())
+            if step.note:
+                log(f"  {'':<10} note: {step.note}")
+
+            if step.risk in ("scan", "index", "rewrite") and step.lock in BLOCKS:
+                heavy.append((migration_file.name, line, step, seconds))
+        log()
+
+    log(f"Estimated total: ~{total_seconds:.0f}s")
+    if heavy:
+        log("Blocking statements (schedule outside peak booking hours):")
+        for filename, line, step, seconds in sorted(heavy, key=lambda h: -h[3]):
+            log(f"  {filename} {line}: {step.risk} under {step.lock} on {step.table} (~{seconds:.0f}s)")
+    log()
+    return True
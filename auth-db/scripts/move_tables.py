@@ -0,0 +1,751 @@
+#!/usr/bin/env python3
+"""
+Copy tables between databases by streaming binary COPY, then verify them.
+
+Each table is streamed from COPY ... TO STDOUT (BINARY) on the source straight
+into COPY ... FROM STDIN (BINARY) on the target: no dump file, no text
+round trip. Tables whose foreign-key parents (within the copied set) are done
+are copied in parallel (--jobs), so the auth split starts with users and then
+copies the six tables referencing it at once.
+
+Every table is copied in one target transaction that also records it in
+table_copy_progress (on the target), so an interrupted run leaves each table
+either fully copied or untouched; rerunning skips the copied ones. A table
+the target already has rows in, without a progress record, is refused
+(--restart truncates and recopies).
+
+Verification hashes both sides in primary-key order, in chunks of
+--chunk-rows rows (md5 of the rows' text form, with both sessions set to UTC
+and ISO dates so time zones cannot differ), and names the first chunk that
+differs — row counts alone miss changed or swapped rows.
+
+Target tables must exist (run the target's migrations first); columns are
+matched by name, and must have the same types on both sides.
+
+--online moves tables that keep taking writes, with seconds of write
+downtime instead of a maintenance window:
+
+    1. capture   row triggers on the source record the primary key of every
+                 written row in table_move_changes
+    2. copy      the bulk copy above, while writes continue
+    3. replay    captured keys are replayed in batches (the current source
+                 row is upserted on the target, or deleted if gone) until at
+                 most --max-lag changes are pending
+    4. cutover   the source tables are locked IN EXCLUSIVE MODE (reads go on),
+                 the rest is replayed and the tables get a trigger rejecting
+                 writes; then the lock is released
+    5. verify    chunk hashes, now that the source no longer changes
+
+Rerunning resumes from the replay position stored in table_move_replay on
+the target. --release removes the triggers from the source (to roll back,
+or before dropping the moved tables there).
+
+Usage:
+    python auth-db/scripts/move_tables.py --source $MARKETPLACE_URL --target $AUTH_URL
+    python auth-db/scripts/move_tables.py --source ... --target ... --tables users,gdpr_requests --jobs 2
+    python auth-db/scripts/move_tables.py --source ... --target ... --verify-only
+    python auth-db/scripts/move_tables.py --source ... --target ... --restart
+    python auth-db/scripts/move_tables.py --source ... --target ... --tables users,consent_history --online
+    python auth-db/scripts/move_tables.py --source ... --tables users,consent_history --release
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from urllib.parse import urlsplit
+
+import asyncpg
+
+# The tables split off the marketplace DB into the shared auth DB
+AUTH_TABLES = [
+    "users",
+    "password_reset_tokens",
+    "email_verification_codes",
+    "email_verification_tokens",
+    "cookie_consent",
+    "consent_history",
+    "gdpr_requests",
+]
+
+DEFAULT_JOBS = 4
+DEFAULT_CHUNK_ROWS = 10_000
+# COPY data chunks buffered between the source and target streams
+QUEUE_CHUNKS = 64
+
+PROGRESS_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS table_copy_progress (
+        source TEXT NOT NULL,
+        table_name TEXT NOT NULL,
+        rows BIGINT NOT NULL,
+        copied_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+        verified_at TIMESTAMP WITH TIME ZONE,
+        PRIMARY KEY (source, table_name)
+    )
+"""
+
+COLUMNS_SQL = """
+    SELECT attname FROM pg_attribute
+    WHERE attrelid = to_regclass($1) AND attnum > 0 AND NOT attisdropped AND attgenerated = ''
+    ORDER BY attnum
+"""
+
+PRIMARY_KEY_SQL = """
+    SELECT a.attname FROM pg_index i
+    JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)
+    WHERE i.indrelid = to_regclass($1) AND i.indisprimary
+    ORDER BY array_position(i.indkey::int2[], a.attnum)
+"""
+
+FOREIGN_KEYS_SQL = """
+    SELECT conrelid::oid AS child, confrelid::oid AS parent FROM pg_constraint
+    WHERE contype = 'f' AND conrelid = ANY($1::oid[]) AND confrelid = ANY($1::oid[]) AND conrelid <> confrelid
+"""
+
+SEQUENCES_SQL = """
+    SELECT attname, pg_get_serial_sequence($1, attname) AS seq FROM pg_attribute
+    WHERE attrelid = to_regclass($1) AND attnum > 0 AND NOT attisdropped
+      AND pg_get_serial_sequence($1, attname) IS NOT NULL
+"""
+
+# Ordered chunk hashes: chunk number, rows in it, md5 over the md5 of each row
+# Rows are hashed in their text form, which depends on these settings: both
+# sides must render timestamptz, intervals and floats identically
+HASH_SETTINGS = {"timezone": "UTC", "datestyle": "ISO, YMD", "intervalstyle": "postgres", "extra_float_digits": "1"}
+
+CHUNK_HASHES_SQL = """
+    SELECT (n - 1) / $1 AS chunk, count(*) AS rows, md5(string_agg(h, '' ORDER BY n)) AS hash
+    FROM (
+        SELECT row_number() OVER (ORDER BY {key}) AS n, md5(ROW({columns})::text) AS h
+        FROM {table}
+    ) numbered
+    GROUP BY 1 ORDER BY 1
+"""
+
+
+def quote_ident(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def quote_literal(value):
+    return "'" + value.replace("'", "''") + "'"
+
+
+def column_list(columns):
+    return ", ".join(quote_ident(c) for c in columns)
+
+
+def source_label(url):
+    """host:port/db, without credentials, for the progress table."""
+    parts = urlsplit(url)
+    return f"{parts.hostname}:{parts.port or 5432}{parts.path}"
+
+
+# ---------------------------------------------------------------------------
+# Catalog
+# ---------------------------------------------------------------------------
+async def copy_order(conn, tables):
+    """table -> set of parent tables it must wait for (FKs within tables)."""
+    oids = {}
+    for table in tables:
+        oid = await conn.fetchval("SELECT to_regclass($1)::oid", table)
+        if oid is None:
+            raise ValueError(f"{table} does not exist in the target; run its migrations first")
+        oids[table] = oid
+    by_oid = {oid: table for table, oid in oids.items()}
+    parents = {table: set() for table in tables}
+    for row in await conn.fetch(FOREIGN_KEYS_SQL, list(oids.values())):
+        parents[by_oid[row["child"]]].add(by_oid[row["parent"]])
+
+    # Fail early on cycles instead of waiting forever
+    remaining = {table: set(deps) for table, deps in parents.items()}
+    while remaining:
+        ready = [table for table, deps in remaining.items() if not deps]
+        if not ready:
+            raise ValueError(f"foreign key cycle between {', '.join(sorted(remaining))}")
+        for table in ready:
+            del remaining[table]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+    return parents
+
+
+async def shared_columns(source, target, table):
+    """Columns to copy (target order) and the ones only one side has."""
+    source_columns = [r["attname"] for r in await source.fetch(COLUMNS_SQL, table)]
+    target_columns = [r["attname"] for r in await target.fetch(COLUMNS_SQL, table)]
+    if not source_columns:
+        raise ValueError(f"{table} does not exist in the source")
+    columns = [c for c in target_columns if c in source_columns]
+    only_source = [c for c in source_columns if c not in target_columns]
+    only_target = [c for c in target_columns if c not in source_columns]
+    return columns, only_source, only_target
+
+
+# ---------------------------------------------------------------------------
+# Copy
+# ---------------------------------------------------------------------------
+async def stream_table(source, target, table, columns):
+    """Pipe binary COPY from source into target. Returns (rows, bytes)."""
+    queue = asyncio.Queue(maxsize=QUEUE_CHUNKS)
+    sent = 0
+
+    async def produce():
+        try:
+            await source.copy_from_query(
+                f"SELECT {column_list(columns)} FROM {table}", output=queue.put, format="binary"
+            )
+        finally:
+            await queue.put(None)
+
+    async def chunks():
+        nonlocal sent
+        while (chunk := await queue.get()) is not None:
+            sent += len(chunk)
+            yield chunk
+
+    producer = asyncio.create_task(produce())
+    try:
+        status = await target.copy_to_table(table, source=chunks(), columns=columns, format="binary")
+    except BaseException:
+        producer.cancel()
+        raise
+    # A source error ends the stream early; surface it so the copy rolls back
+    await producer
+    return int(status.split()[-1]), sent
+
+
+async def reset_sequences(conn, table):
+    """Move serial/identity sequences past the copied ids."""
+    for row in await conn.fetch(SEQUENCES_SQL, table):
+        column = quote_ident(row["attname"])
+        await conn.execute(f"SELECT setval($1, max({column})) FROM {table} HAVING max({column}) IS NOT NULL", row["seq"])
+
+
+async def copy_table(source, target, table, label):
+    columns, only_source, only_target = await shared_columns(source, target, table)
+    if only_source:
+        print(f"  {table}: not copying source-only column(s) {', '.join(only_source)}")
+    if only_target:
+        print(f"  {table}: target-only column(s) {', '.join(only_target)} get their defaults")
+
+    start = time.perf_counter()
+    async with target.transaction():
+        rows, sent = await stream_table(source, target, table, columns)
+        await reset_sequences(target, table)
+        await target.execute(
+            "INSERT INTO table_copy_progress (source, table_name, rows) VALUES ($1, $2, $3)", label, table, rows
+        )
+    seconds = time.perf_counter() - start
+    print(f"  Copied: {table} ({rows:,} rows, {sent / 1e6:.1f} MB, {seconds:.1f}s, {sent / 1e6 / max(seconds, 1e-6):.1f} MB/s)")
+    return columns
+
+
+# ---------------------------------------------------------------------------
+# Verify
+# ---------------------------------------------------------------------------
+async def chunk_hashes(conn, table, columns, key, chunk_rows):
+    query = CHUNK_HASHES_SQL.format(table=table, columns=column_list(columns), key=column_list(key))
+    return [(row["rows"], row["hash"]) for row in await conn.fetch(query, chunk_rows)]
+
+
+async def verify_table(source, target, table, label, chunk_rows, columns=None):
+    """Compare ordered chunk hashes of both sides. Returns True if they match."""
+    if columns is None:
+        columns, _, _ = await shared_columns(source, target, table)
+    key = [r["attname"] for r in await target.fetch(PRIMARY_KEY_SQL, table)] or columns
+    start = time.perf_counter()
+    source_hashes, target_hashes = await asyncio.gather(
+        chunk_hashes(source, table, columns, key, chunk_rows),
+        chunk_hashes(target, table, columns, key, chunk_rows),
+    )
+    source_rows = sum(rows for rows, _ in source_hashes)
+    target_rows = sum(rows for rows, _ in target_hashes)
+    for chunk, (theirs, ours) in enumerate(zip(source_hashes, target_hashes)):
+        if theirs != ours:
+            first = chunk * chunk_rows
+            print(f"  MISMATCH: {table} chunk {chunk} (rows {first:,}-{first + chunk_rows - 1:,} by {', '.join(key)})")
+            return False
+    if len(source_hashes) != len(target_hashes):
+        print(f"  MISMATCH: {table} has {target_rows:,} rows in the target, {source_rows:,} in the source")
+        return False
+    await target.execute(
+        "UPDATE table_copy_progress SET verified_at = NOW() WHERE source = $1 AND table_name = $2", label, table
+    )
+    print(f"  Verified: {table} ({target_rows:,} rows, {len(target_hashes)} chunks, {time.perf_counter() - start:.1f}s)")
+    return True
+
+
+# ---------------------------------------------------------------------------
+# All tables
+# ---------------------------------------------------------------------------
+async def restart(target, tables, label):
+    """Forget progress and empty the target tables (together, so FKs between them allow it)."""
+    await target.execute(f"TRUNCATE {', '.join(tables)}")
+    await target.execute(
+        "DELETE FROM table_copy_progress WHERE source = $1 AND table_name = ANY($2::text[])", label, tables
+    )
+    await target.execute("DELETE FROM table_move_replay WHERE source = $1", label)
+    print(f"  Truncated: {', '.join(tables)}")
+
+
+async def prepare(target, tables, label, restart_tables):
+    """Create the progress tables; returns (FK parents, tables copied earlier) or None on a bad table set."""
+    await target.execute(PROGRESS_TABLE_SQL)
+    await target.execute(REPLAY_TABLE_SQL)
+    try:
+        parents = await copy_order(target, tables)
+    except ValueError as e:
+        print(f"  {e}")
+        return None
+    if restart_tables:
+        await restart(target, tables, label)
+    copied = {
+        row["table_name"] for row in await target.fetch(
+            "SELECT table_name FROM table_copy_progress WHERE source = $1", label
+        )
+    }
+    return parents, copied
+
+
+async def for_each_table(tables, parents, jobs, work):
+    """Run work(table) once every FK parent of the table succeeded, jobs at a time.
+
+    work returns False (or raises) on failure; tables depending on a failed
+    table are skipped. Returns the set of failed tables.
+    """
+    done = {table: asyncio.Event() for table in tables}
+    failed = set()
+    slots = asyncio.Semaphore(jobs)
+
+    async def run_one(table):
+        try:
+            for parent in parents[table]:
+                await done[parent].wait()
+            blocked = parents[table] & failed
+            if blocked:
+                print(f"  Skipped: {table} (depends on failed {', '.join(sorted(blocked))})")
+                failed.add(table)
+                return
+            async with slots:
+                if not await work(table):
+                    failed.add(table)
+        except Exception as e:
+            print(f"  FAILED: {table}: {e}")
+            failed.add(table)
+        finally:
+            done[table].set()
+
+    await asyncio.gather(*(run_one(table) for table in tables))
+    return failed
+
+
+async def copy_if_needed(source, target, table, label, copied):
+    """Copy table unless an earlier run did. Returns its columns, True if skipped, False if refused."""
+    if table in copied:
+        print(f"  Skipped copy: {table} (copied earlier)")
+        return True
+    if await target.fetchval(f"SELECT EXISTS (SELECT 1 FROM {table})"):
+        print(f"  Refusing: {table} already has rows in the target (use --restart to recopy)")
+        return False
+    return await copy_table(source, target, table, label)
+
+
+async def move(source_url, target_url, tables, jobs=DEFAULT_JOBS, chunk_rows=DEFAULT_CHUNK_ROWS,
+               verify_only=False, restart_tables=False):
+    """Copy (unless verify_only) and verify tables. Returns True if all verified."""
+    label = source_label(source_url)
+    source_pool = await asyncpg.create_pool(source_url, min_size=1, max_size=jobs, server_settings=HASH_SETTINGS)
+    target_pool = await asyncpg.create_pool(target_url, min_size=1, max_size=jobs, server_settings=HASH_SETTINGS)
+    try:
+        async with target_pool.acquire() as target:
+            prepared = await prepare(target, tables, label, restart_tables and not verify_only)
+        if prepared is None:
+            return False
+        parents, copied = prepared
+
+        async def copy_and_verify(table):
+            async with source_pool.acquire() as source, target_pool.acquire() as target:
+                if verify_only:
+                    if table not in copied:
+                        print(f"  Not copied yet: {table}")
+                    columns = None
+                else:
+                    columns = await copy_if_needed(source, target, table, label, copied)
+                    if columns is False:
+                        return False
+                return await verify_table(
+                    source, target, table, label, chunk_rows, columns if isinstance(columns, list) else None
+                )
+
+        start = time.perf_counter()
+        failed = await for_each_table(tables, parents, jobs, copy_and_verify)
+        print(f"\n  {len(tables) - len(failed)}/{len(tables)} tables verified in {time.perf_counter() - start:.1f}s")
+        return not failed
+    finally:
+        await asyncio.gather(source_pool.close(), target_pool.close())
+
+
+# ---------------------------------------------------------------------------
+# Online mode
+# ---------------------------------------------------------------------------
+# Rows written during the bulk copy are captured on the source by row
+# triggers (the changed row's primary key, not its contents) and replayed by
+# re-reading the current source row: upserted if it still exists, deleted
+# if not. Replaying a key twice is harmless, so captures overlapping the
+# bulk copy's snapshot need no bookkeeping. TRUNCATE is not captured.
+CAPTURE_SETUP_SQL = """
+    CREATE TABLE IF NOT EXISTS table_move_changes (
+        id BIGSERIAL PRIMARY KEY,
+        table_name TEXT NOT NULL,
+        key JSONB NOT NULL,
+        captured_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+    );
+
+    -- TG_ARGV: table name as given to move_tables.py, then its primary key columns
+    CREATE OR REPLACE FUNCTION table_move_capture() RETURNS trigger LANGUAGE plpgsql AS $$
+    DECLARE
+        key_columns TEXT[] := TG_ARGV[1:];
+        old_key JSONB;
+        new_key JSONB;
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            SELECT jsonb_object_agg(c, to_jsonb(OLD) -> c) INTO old_key FROM unnest(key_columns) c;
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            SELECT jsonb_object_agg(c, to_jsonb(NEW) -> c) INTO new_key FROM unnest(key_columns) c;
+        END IF;
+        IF old_key IS DISTINCT FROM new_key AND old_key IS NOT NULL THEN
+            INSERT INTO table_move_changes (table_name, key) VALUES (TG_ARGV[0], old_key);
+        END IF;
+        IF new_key IS NOT NULL THEN
+            INSERT INTO table_move_changes (table_name, key) VALUES (TG_ARGV[0], new_key);
+        END IF;
+        RETURN NULL;
+    END
+    $$;
+
+    -- Installed at cutover: the moved tables reject writes on the source
+    CREATE OR REPLACE FUNCTION table_move_block() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        RAISE EXCEPTION 'table % has moved to %', TG_TABLE_NAME, TG_ARGV[0]
+            USING ERRCODE = 'read_only_sql_transaction';
+    END
+    $$;
+"""
+
+# On the target: how far the captured changes of a source have been replayed
+REPLAY_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS table_move_replay (
+        source TEXT PRIMARY KEY,
+        last_change_id BIGINT NOT NULL DEFAULT 0,
+        started_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+        cutover_at TIMESTAMP WITH TIME ZONE
+    )
+"""
+
+DEFAULT_BATCH_ROWS = 5_000
+DEFAULT_MAX_LAG = 100
+DEFAULT_LOCK_TIMEOUT = "5s"
+CUTOVER_ATTEMPTS = 5
+
+
+async def primary_key(conn, table):
+    key = [r["attname"] for r in await conn.fetch(PRIMARY_KEY_SQL, table)]
+    if not key:
+        raise ValueError(f"{table} has no primary key; online mode needs one to replay changes")
+    return key
+
+
+async def install_capture(source, tables, keys):
+    """Create the capture table and (re)install the capture triggers in one transaction."""
+    async with source.transaction():
+        await source.execute(CAPTURE_SETUP_SQL)
+        for table in tables:
+            await source.execute(f"DROP TRIGGER IF EXISTS table_move_capture ON {table}")
+            arguments = ", ".join(quote_literal(value) for value in [table] + keys[table])
+            await source.execute(
+                f"CREATE TRIGGER table_move_capture AFTER INSERT OR UPDATE OR DELETE ON {table} "
+                f"FOR EACH ROW EXECUTE FUNCTION table_move_capture({arguments})"
+            )
+    print(f"  Capturing changes: {', '.join(tables)}")
+
+
+async def replay_table(source, target, table, columns, key, target_key, keys_json, index):
+    """Bring the target rows for the given keys in line with the source.
+
+    key is the source's primary key (what the capture recorded), target_key
+    the target's, which may add columns (consent_history's partition key).
+    """
+    selected = ", ".join(f"t.{quote_ident(c)}" for c in columns)
+    join = column_list(key)
+    rows = await source.fetch(
+        f"SELECT {selected} FROM {table} t JOIN jsonb_populate_recordset(NULL::{table}, $1::jsonb) k USING ({join})",
+        keys_json,
+    )
+    stage = f"table_move_stage_{index}"
+    await target.execute(f"CREATE TEMP TABLE {stage} (LIKE {table}) ON COMMIT DROP")
+    if rows:
+        await target.copy_records_to_table(stage, records=rows, columns=columns)
+    # Target rows of these keys the source no longer has, in their target key
+    # (a row whose created_at changed moved to another consent_history key)
+    matches = " AND ".join(f"t.{quote_ident(c)} = k.{quote_ident(c)}" for c in key)
+    staged = " AND ".join(f"s.{quote_ident(c)} = t.{quote_ident(c)}" for c in target_key)
+    await target.execute(
+        f"DELETE FROM {table} t USING jsonb_populate_recordset(NULL::{table}, $1::jsonb) k "
+        f"WHERE {matches} AND NOT EXISTS (SELECT 1 FROM {stage} s WHERE {staged})",
+        keys_json,
+    )
+    updates = [c for c in columns if c not in target_key]
+    conflict = (
+        "DO UPDATE SET " + ", ".join(f"{quote_ident(c)} = EXCLUDED.{quote_ident(c)}" for c in updates)
+        if updates else "DO NOTHING"
+    )
+    await target.execute(
+        f"INSERT INTO {table} ({column_list(columns)}) SELECT {column_list(columns)} FROM {stage} "
+        f"ON CONFLICT ({column_list(target_key)}) {conflict}"
+    )
+    return len(rows)
+
+
+async def replay_batch(source, target, tables, columns, keys, target_keys, label, after, limit):
+    """Replay up to limit captured changes after change id `after`.
+
+    Tables are replayed in FK order (tables is already ordered). Returns the
+    last change id replayed (after, if there was nothing to do).
+    """
+    changes = await source.fetch(
+        "SELECT id, table_name, key FROM table_move_changes WHERE id > $1 ORDER BY id LIMIT $2", after, limit
+    )
+    if not changes:
+        return after
+    last = changes[-1]["id"]
+    # Each key once: an upsert may not touch the same row twice
+    by_table = {}
+    for change in changes:
+        by_table.setdefault(change["table_name"], {})[change["key"]] = json.loads(change["key"])
+
+    async with target.transaction():
+        for index, table in enumerate(tables):
+            if table in by_table:
+                await replay_table(
+                    source, target, table, columns[table], keys[table], target_keys[table],
+                    json.dumps(list(by_table[table].values())), index,
+                )
+        await target.execute(
+            "UPDATE table_move_replay SET last_change_id = $2 WHERE source = $1", label, last
+        )
+    # Replayed changes are safe to forget once the target has committed
+    await source.execute("DELETE FROM table_move_changes WHERE id <= $1 AND table_name = ANY($2::text[])", last, tables)
+    return last
+
+
+async def replay_until(source, target, tables, columns, keys, target_keys, label, after, batch_rows, max_lag):
+    """Replay batches until at most max_lag captured changes are pending. Returns the last change id."""
+    limit = batch_rows
+    while True:
+        try:
+            after = await replay_batch(source, target, tables, columns, keys, target_keys, label, after, limit)
+            limit = batch_rows
+        except asyncpg.exceptions.ForeignKeyViolationError:
+            # A row references a parent whose change is beyond this batch: take a bigger batch
+            limit *= 2
+            continue
+        pending, oldest = await source.fetchrow(
+            "SELECT count(*), NOW() - min(captured_at) FROM table_move_changes WHERE id > $1 AND table_name = ANY($2::text[])",
+            after, tables,
+        )
+        print(f"  Replayed through change {after}: {pending} pending" + (f", oldest {oldest}" if oldest else ""))
+        if pending <= max_lag:
+            return after
+
+
+async def cutover(source, target, tables, columns, keys, target_keys, label, after, target_label, lock_timeout):
+    """Block writes on the source, replay the rest, leave the source tables rejecting writes.
+
+    Returns the seconds writes were blocked, or None if the lock could not be taken.
+    """
+    for attempt in range(1, CUTOVER_ATTEMPTS + 1):
+        try:
+            async with source.transaction():
+                await source.execute("SELECT set_config('lock_timeout', $1, true)", lock_timeout)
+                # EXCLUSIVE blocks writes and lets reads continue
+                await source.execute(f"LOCK TABLE {', '.join(tables)} IN EXCLUSIVE MODE")
+                locked = time.perf_counter()
+                while True:
+                    last = await replay_batch(source, target, tables, columns, keys, target_keys, label, after, 1_000_000)
+                    if last == after:
+                        break
+                    after = last
+                for table in tables:
+                    await reset_sequences(target, table)
+                    await source.execute(f"DROP TRIGGER table_move_capture ON {table}")
+                    await source.execute(
+                        f"CREATE TRIGGER table_move_block BEFORE INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table} "
+                        f"FOR EACH STATEMENT EXECUTE FUNCTION table_move_block({quote_literal(target_label)})"
+                    )
+                await target.execute("UPDATE table_move_replay SET cutover_at = NOW() WHERE source = $1", label)
+            return time.perf_counter() - locked
+        except asyncpg.exceptions.LockNotAvailableError:
+            print(f"  Cutover attempt {attempt}: could not lock the source tables within {lock_timeout}, retrying")
+            await asyncio.sleep(attempt)
+    return None
+
+
+async def move_online(source_url, target_url, tables, jobs=DEFAULT_JOBS, chunk_rows=DEFAULT_CHUNK_ROWS,
+                      batch_rows=DEFAULT_BATCH_ROWS, max_lag=DEFAULT_MAX_LAG, lock_timeout=DEFAULT_LOCK_TIMEOUT,
+                      restart_tables=False):
+    """Capture changes, bulk copy, replay, cut over, verify. Returns True if every table verified."""
+    label = source_label(source_url)
+    source_pool = await asyncpg.create_pool(source_url, min_size=1, max_size=jobs, server_settings=HASH_SETTINGS)
+    target_pool = await asyncpg.create_pool(target_url, min_size=1, max_size=jobs, server_settings=HASH_SETTINGS)
+    try:
+        async with source_pool.acquire() as source, target_pool.acquire() as target:
+            prepared = await prepare(target, tables, label, restart_tables)
+            if prepared is None:
+                return False
+            parents, copied = prepared
+            ordered = fk_order(tables, parents)
+            keys = {table: await primary_key(source, table) for table in tables}
+            target_keys = {table: await primary_key(target, table) for table in tables}
+            columns = {table: (await shared_columns(source, target, table))[0] for table in tables}
+            # Replay finds target rows by the source key and upserts on the target's
+            missing = [
+                table for table in tables
+                if not set(keys[table]) | set(target_keys[table]) <= set(columns[table])
+            ]
+            if missing:
+                print(f"  Refusing: primary key columns missing on one side: {', '.join(missing)}")
+                return False
+
+            replay = await target.fetchrow("SELECT last_change_id, cutover_at FROM table_move_replay WHERE source = $1", label)
+            if replay and replay["cutover_at"]:
+                print(f"  Already cut over at {replay['cutover_at']}; verifying only")
+            elif replay is None and copied & set(tables):
+                # Copied without capture running: changes since then are lost
+                print(f"  Refusing: {', '.join(sorted(copied & set(tables)))} copied without change capture (use --restart)")
+                return False
+            if not (replay and replay["cutover_at"]):
+                await install_capture(source, tables, keys)
+                await target.execute(
+                    "INSERT INTO table_move_replay (source) VALUES ($1) ON CONFLICT (source) DO NOTHING", label
+                )
+
+        if not (replay and replay["cutover_at"]):
+            # 1. Bulk copy; writes keep landing in table_move_changes meanwhile
+            async def bulk_copy(table):
+                async with source_pool.acquire() as source, target_pool.acquire() as target:
+                    return await copy_if_needed(source, target, table, label, copied) is not False
+
+            failed = await for_each_table(tables, parents, jobs, bulk_copy)
+            if failed:
+                return False
+
+            async with source_pool.acquire() as source, target_pool.acquire() as target:
+                # 2. Catch up while traffic continues
+                after = replay["last_change_id"] if replay else 0
+                after = await replay_until(
+                    source, target, ordered, columns, keys, target_keys, label, after, batch_rows, max_lag
+                )
+
+                # 3. Cutover: a short write freeze on the source
+                blocked = await cutover(
+                    source, target, ordered, columns, keys, target_keys, label, after, source_label(target_url),
+                    lock_timeout,
+                )
+                if blocked is None:
+                    print("  Cutover failed: the source tables stayed locked by other sessions; rerun to retry")
+                    return False
+                print(f"  Cut over: writes to the source tables were blocked for {blocked:.2f}s and are now rejected")
+
+        # 4. The source is frozen now, so a full comparison is meaningful
+        async def verify(table):
+            async with source_pool.acquire() as source, target_pool.acquire() as target:
+                return await verify_table(source, target, table, label, chunk_rows, columns[table])
+
+        failed = await for_each_table(tables, parents, jobs, verify)
+        print(f"\n  {len(tables) - len(failed)}/{len(tables)} tables verified")
+        if not failed:
+            print("  Point the applications at the target; --release lifts the write block on the source.")
+        return not failed
+    finally:
+        await asyncio.gather(source_pool.close(), target_pool.close())
+
+
+def fk_order(tables, parents):
+    """tables sorted so every table comes after its FK parents."""
+    ordered, seen = [], set()
+
+    def visit(table):
+        if table not in seen:
+            seen.add(table)
+            for parent in sorted(parents[table]):
+                visit(parent)
+            ordered.append(table)
+
+    for table in tables:
+        visit(table)
+    return ordered
+
+
+async def release(source_url, tables):
+    """Drop the capture and write-block triggers from the source tables."""
+    conn = await asyncpg.connect(source_url)
+    try:
+        async with conn.transaction():
+            for table in tables:
+                await conn.execute(f"DROP TRIGGER IF EXISTS table_move_block ON {table}")
+                await conn.execute(f"DROP TRIGGER IF EXISTS table_move_capture ON {table}")
+            if await conn.fetchval("SELECT to_regclass('table_move_changes') IS NOT NULL"):
+                await conn.execute("DELETE FROM table_move_changes WHERE table_name = ANY($1::text[])", tables)
+        print(f"  Released: {', '.join(tables)} accept writes on the source again")
+    finally:
+        await conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source", default=os.getenv("SOURCE_DATABASE_URL"), help="Source URL (SOURCE_DATABASE_URL)")
+    parser.add_argument("--target", default=os.getenv("TARGET_DATABASE_URL"), help="Target URL (TARGET_DATABASE_URL)")
+    parser.add_argument(
+        "--tables", default=",".join(AUTH_TABLES), help="Comma-separated tables (default: the auth tables)",
+    )
+    parser.add_argument("--jobs", type=int, default=DEFAULT_JOBS, help=f"Tables copied at once (default: {DEFAULT_JOBS})")
+    parser.add_argument(
+        "--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS,
+        help=f"Rows per verification hash chunk (default: {DEFAULT_CHUNK_ROWS})",
+    )
+    parser.add_argument("--verify-only", action="store_true", help="Only verify tables copied earlier")
+    parser.add_argument("--restart", action="store_true", help="Truncate the target tables and copy everything again")
+    parser.add_argument("--online", action="store_true", help="Capture and replay writes during the copy, then cut over")
+    parser.add_argument(
+        "--batch-rows", type=int, default=DEFAULT_BATCH_ROWS,
+        help=f"Online: captured changes replayed per batch (default: {DEFAULT_BATCH_ROWS})",
+    )
+    parser.add_argument(
+        "--max-lag", type=int, default=DEFAULT_MAX_LAG,
+        help=f"Online: pending changes at which to cut over (default: {DEFAULT_MAX_LAG})",
+    )
+    parser.add_argument(
+        "--lock-timeout", default=DEFAULT_LOCK_TIMEOUT,
+        help=f"Online: how long cutover waits for the source table locks (default: {DEFAULT_LOCK_TIMEOUT})",
+    )
+    parser.add_argument("--release", action="store_true", help="Remove the online triggers from the source tables")
+    args = parser.parse_args()
+    if not args.source or (not args.target and not args.release):
+        parser.error("--source and --target (or SOURCE_/TARGET_DATABASE_URL) are required")
+
+    tables = [table.strip() for table in args.tables.split(",") if table.strip()]
+    if args.release:
+        asyncio.run(release(args.source, tables))
+        sys.exit(0)
+    if args.online:
+        ok = asyncio.run(move_online(
+            args.source, args.target, tables, args.jobs, args.chunk_rows,
+            args.batch_rows, args.max_lag, args.lock_timeout, args.restart,
+        ))
+    else:
+        ok = asyncio.run(move(args.source, args.target, tables, args.jobs, args.chunk_rows, args.verify_only, args.restart))
+    if not ok:
+        sys.exit(1)
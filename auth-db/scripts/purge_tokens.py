@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Delete expired and used rows from the auth token tables.
+
+password_reset_tokens, email_verification_codes and email_verification_tokens
+only ever grow; every lookup by token or (email, code) pays for it in index
+size. This worker deletes, per table:
+
+    expired   expires_at older than --grace (kept that long so a late click
+              still gets "link expired" rather than "invalid link")
+    used      used = true and not expired yet (single use: never needed again)
+
+in batches of --batch-size, oldest first along the expires_at index, each
+batch its own short transaction. Rows locked by an in-flight verification
+are skipped (FOR UPDATE SKIP LOCKED) and picked up on the next round.
+Deletes are paced to at most --max-rate rows/sec, with at least --sleep
+seconds between batches, to keep WAL and replica lag flat.
+
+Tables converted to monthly partitions (migrations/optional/
+partition_token_tables.sql) additionally get their upcoming months created
+and every month that ended more than --grace ago dropped, which is
+cheaper than deleting its rows.
+
+Runs one round and exits (cron), or a round every --interval seconds. Each
+round prints per-table metrics; --metrics rewrites them as JSON after every
+round (totals since start plus the last round).
+
+Usage:
+    python auth-db/scripts/purge_tokens.py
+    python auth-db/scripts/purge_tokens.py --interval 300 --metrics /var/lib/vayada/purge_tokens.json
+    python auth-db/scripts/purge_tokens.py --batch-size 200 --max-rate 500 --grace "7 days"
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+import asyncpg
+
+from backfill import rows_affected
+from run_migrations import DATABASES
+
+TOKEN_TABLES = ["password_reset_tokens", "email_verification_codes", "email_verification_tokens"]
+
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_MAX_RATE = 5000
+DEFAULT_SLEEP_SECONDS = 0.05
+DEFAULT_GRACE = "1 day"
+DEFAULT_LOCK_TIMEOUT = "1s"
+MONTHS_AHEAD = 3
+
+# $1 = batch size, $2 = grace. Both walk idx_<table>_expires_at; expires_at
+# is in the join so partitioned tables (primary key (id, expires_at)) prune.
+PURGE_SQL = {
+    "expired": """
+        WITH batch AS (
+            SELECT id, expires_at FROM {table}
+            WHERE expires_at < now() - $2::interval
+            ORDER BY expires_at
+            LIMIT $1
+            FOR UPDATE SKIP LOCKED
+        )
+        DELETE FROM {table} t USING batch WHERE t.id = batch.id AND t.expires_at = batch.expires_at
+    """,
+    "used": """
+        WITH batch AS (
+            SELECT id, expires_at FROM {table}
+            WHERE expires_at >= now() - $2::interval AND used
+            ORDER BY expires_at
+            LIMIT $1
+            FOR UPDATE SKIP LOCKED
+        )
+        DELETE FROM {table} t USING batch WHERE t.id = batch.id AND t.expires_at = batch.expires_at
+    """,
+}
+
+# Partitions whose whole range ended more than $2 ago (the DEFAULT partition
+# has no upper bound and never matches)
+EXPIRED_PARTITIONS_SQL = """
+    SELECT c.relname
+    FROM pg_inherits i
+    JOIN pg_class c ON c.oid = i.inhrelid
+    WHERE i.inhparent = $1::regclass
+      AND substring(pg_get_expr(c.relpartbound, c.oid) FROM 'TO \\(''([^'']+)''\\)')::timestamptz
+          <= now() - $2::interval
+    ORDER BY c.relname
+"""
+
+
+def quote_ident(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def new_metrics():
+    return {table: {"expired": 0, "used": 0, "batches": 0, "partitions_dropped": 0,
+                    "partitions_created": 0, "seconds": 0.0, "max_batch_ms": 0} for table in TOKEN_TABLES}
+
+
+# ---------------------------------------------------------------------------
+# Purging
+# ---------------------------------------------------------------------------
+class Pacer:
+    """Sleeps between batches so deletes stay under max_rate rows/sec."""
+
+    def __init__(self, max_rate, sleep):
+        self.max_rate = max_rate
+        self.sleep = sleep
+        self.start = time.perf_counter()
+        self.rows = 0
+
+    async def wait(self, rows):
+        self.rows += rows
+        ahead = self.rows / self.max_rate - (time.perf_counter() - self.start) if self.max_rate else 0
+        await asyncio.sleep(max(self.sleep, ahead))
+
+
+async def purge_rows(conn, table, kind, args, pacer, metrics):
+    sql = PURGE_SQL[kind].format(table=table)
+    while True:
+        start = time.perf_counter()
+        deleted = rows_affected(await conn.execute(sql, args.batch_size, args.grace))
+        batch_ms = round((time.perf_counter() - start) * 1000)
+        metrics[kind] += deleted
+        metrics["batches"] += 1
+        metrics["max_batch_ms"] = max(metrics["max_batch_ms"], batch_ms)
+        if deleted < args.batch_size:
+            return
+        await pacer.wait(deleted)
+
+
+async def rotate_partitions(conn, table, grace, metrics):
+    """Create upcoming months and drop the ones past retention (partitioned tables only)."""
+    metrics["partitions_created"] += await conn.fetchval(
+        "SELECT public.ensure_token_partitions($1::regclass, $2)", table, MONTHS_AHEAD
+    )
+    for partition in await conn.fetch(EXPIRED_PARTITIONS_SQL, table, grace):
+        # Takes ACCESS EXCLUSIVE on the parent for a moment; under
+        # lock_timeout, so a busy table is retried next round. (DETACH
+        # CONCURRENTLY is not allowed next to a DEFAULT partition.)
+        await conn.execute(f"DROP TABLE {quote_ident(partition['relname'])}")
+        metrics["partitions_dropped"] += 1
+        print(f"  Dropped: {partition['relname']}")
+
+
+async def purge_round(conn, args):
+    """Purge every token table once; returns this round's metrics."""
+    metrics = new_metrics()
+    pacer = Pacer(args.max_rate, args.sleep)
+    for table in TOKEN_TABLES:
+        start = time.perf_counter()
+        partitioned = await conn.fetchval("SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass($1)", table)
+        if partitioned is None:
+            print(f"  Skipped: {table} (no such table)")
+            continue
+        try:
+            if partitioned:
+                await rotate_partitions(conn, table, args.grace, metrics[table])
+            for kind in ("expired", "used"):
+                await purge_rows(conn, table, kind, args, pacer, metrics[table])
+        except (asyncpg.LockNotAvailableError, asyncpg.QueryCanceledError) as e:
+            # Busy: whatever is left goes next round
+            print(f"  {table}: {e}, continuing next round")
+        metrics[table]["seconds"] = round(time.perf_counter() - start, 3)
+    return metrics
+
+
+# ---------------------------------------------------------------------------
+# Metrics
+# ---------------------------------------------------------------------------
+def print_round(metrics):
+    print(f"    {'Table':<28} {'Expired':>9} {'Used':>8} {'Batches':>8} {'Rows/s':>8} {'Max ms':>7} {'Parts -/+':>10}")
+    for table, m in metrics.items():
+        rows = m["expired"] + m["used"]
+        rate = rows / m["seconds"] if m["seconds"] else 0
+        parts = f"{m['partitions_dropped']}/{m['partitions_created']}"
+        print(
+            f"    {table:<28} {m['expired']:>9,} {m['used']:>8,} {m['batches']:>8,} "
+            f"{rate:>8,.0f} {m['max_batch_ms']:>7} {parts:>10}"
+        )
+
+
+def add_metrics(totals, metrics):
+    for table, m in metrics.items():
+        for key, value in m.items():
+            totals[table][key] = max(totals[table][key], value) if key == "max_batch_ms" else totals[table][key] + value
+
+
+def write_metrics(path, rounds, totals, last, started_at):
+    report = {
+        "updated_at": datetime.now(timezone.utc).isoformat(),
+        "started_at": started_at,
+        "rounds": rounds,
+        "totals": totals,
+        "last_round": last,
+    }
+    # Replace, never truncate: a collector may read it at any moment
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(report, f, indent=2)
+        f.write("\n")
+    os.replace(tmp, path)
+
+
+# ---------------------------------------------------------------------------
+# Main
+# ---------------------------------------------------------------------------
+async def main(args):
+    env_var, default_url, _ = DATABASES["auth"]
+    conn = await asyncpg.connect(args.database or os.environ.get(env_var, default_url))
+    try:
+        # A purge batch waits on nobody: sign-ins and verifications go first
+        await conn.execute("SELECT set_config('lock_timeout', $1, false)", args.lock_timeout)
+        started_at = datetime.now(timezone.utc).isoformat()
+        totals = new_metrics()
+        rounds = 0
+        while True:
+            print(f"Purging auth tokens (grace {args.grace})...")
+            metrics = await purge_round(conn, args)
+            rounds += 1
+            add_metrics(totals, metrics)
+            print_round(metrics)
+            if args.metrics:
+                write_metrics(args.metrics, rounds, totals, metrics, started_at)
+            if not args.interval:
+                return True
+            await asyncio.sleep(args.interval)
+    finally:
+        await conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database", help="Auth database URL (default: AUTH_DATABASE_URL)")
+    parser.add_argument(
+        "--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+        help=f"Rows per delete (default: {DEFAULT_BATCH_SIZE})",
+    )
+    parser.add_argument(
+        "--max-rate", type=int, default=DEFAULT_MAX_RATE,
+        help=f"Max rows deleted per second, 0 for no limit (default: {DEFAULT_MAX_RATE})",
+    )
+    parser.add_argument(
+        "--sleep", type=float, default=DEFAULT_SLEEP_SECONDS,
+        help=f"Min pause between batches in seconds (default: {DEFAULT_SLEEP_SECONDS})",
+    )
+    parser.add_argument(
+        "--grace", default=DEFAULT_GRACE,
+        help=f"Keep expired rows this long, a Postgres interval (default: '{DEFAULT_GRACE}')",
+    )
+    parser.add_argument(
+        "--lock-timeout", default=DEFAULT_LOCK_TIMEOUT,
+        help=f"Give up on a busy table until the next round after this (default: {DEFAULT_LOCK_TIMEOUT})",
+    )
+    parser.add_argument("--interval", type=float, help="Run a round every N seconds instead of once")
+    parser.add_argument("--metrics", help="Rewrite metrics as JSON to this path after every round")
+    args = parser.parse_args()
+
+    if not asyncio.run(main(args)):
+        sys.exit(1)
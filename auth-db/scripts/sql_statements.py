@@ -0,0 +1,106 @@
+"""
+Split a SQL migration file into its statements.
+
+A small tokenizer that knows where a ';' really ends a statement: not inside
+'strings' (including E'...' backslash escapes), "quoted identifiers",
+$tag$dollar-quoted bodies$tag$ (functions, DO blocks), -- line comments or
+/* nested block comments */. Statements are yielded as they are scanned,
+without the comments and whitespace in front of them.
+"""
+import re
+from dataclasses import dataclass
+
+# $$ or $tag$ (a tag cannot start with a digit, so $1 is not a dollar quote)
+DOLLAR_QUOTE = re.compile(r"\$(?:[A-Za-z_]\w*)?\$")
+
+
+@dataclass
+class Statement:
+    sql: str
+    line: int  # 1-based line the statement starts on
+
+    @property
+    def summary(self):
+        """First line of the statement, shortened for log output."""
+        first = self.sql.split("\n", 1)[0]
+        return first if len(first) <= 80 else first[:77] + "..."
+
+
+def _in_identifier(sql, i):
+    """Whether sql[i] follows a word character (so a quote there is part of the word)."""
+    return i > 0 and (sql[i - 1].isalnum() or sql[i - 1] in "_$")
+
+
+def _skip_string(sql, i, quote, backslash_escapes=False):
+    """Index just past the quoted token starting at sql[i] (the opening quote)."""
+    i += 1
+    while i < len(sql):
+        c = sql[i]
+        if backslash_escapes and c == "\\":
+            i += 2
+            continue
+        if c == quote:
+            if sql.startswith(quote, i + 1):  # doubled quote is an escaped quote
+                i += 2
+                continue
+            return i + 1
+        i += 1
+    raise ValueError(f"unterminated {quote} quote")
+
+
+def _skip_block_comment(sql, i):
+    depth = 0
+    while i < len(sql):
+        if sql.startswith("/*", i):
+            depth += 1
+            i += 2
+        elif sql.startswith("*/", i):
+            depth -= 1
+            i += 2
+            if depth == 0:
+                return i
+        else:
+            i += 1
+    raise ValueError("unterminated /* comment")
+
+
+def split(sql):
+    """Yield every non-empty statement in sql, in order, without its ';'."""
+    i, start, n = 0, None, len(sql)
+    while i < n:
+        c = sql[i]
+        if c in " \t\r\n":
+            i += 1
+            continue
+        if sql.startswith("--", i):
+            end = sql.find("\n", i)
+            i = n if end == -1 else end + 1
+            continue
+        if sql.startswith("/*", i):
+            i = _skip_block_comment(sql, i)
+            continue
+        if c == ";":
+            if start is not None:
+                yield Statement(sql[start:i].rstrip(), sql.count("\n", 0, start) + 1)
+                start = None
+            i += 1
+            continue
+
+        if start is None:
+            start = i
+        if c == "'":
+            escapes = i > 0 and sql[i - 1] in "eE" and not _in_identifier(sql, i - 1)
+            i = _skip_string(sql, i, "'", escapes)
+        elif c == '"':
+            i = _skip_string(sql, i, '"')
+        elif c == "$" and not _in_identifier(sql, i) and (match := DOLLAR_QUOTE.match(sql, i)):
+            tag = match.group()
+            end = sql.find(tag, match.end())
+            if end == -1:
+                raise ValueError(f"unterminated {tag} quote")
+            i = end + len(tag)
+        else:
+            i += 1
+
+    if start is not None:
+        yield Statement(sql[start:].rstrip(), sql.count("\n", 0, start) + 1)
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Squash a database's migration history into one baseline schema file.
+
+Takes a fully migrated database (every file in its migrations directory
+applied), dumps its schema with pg_dump and writes it as
+<NNN>_baseline.sql, NNN being the number of the last file it replaces. The
+replaced files move to migrations/squashed/ and are listed in the baseline
+header:
+
+    -- migrate:squashes 001_auth_schema.sql
+    -- migrate:squashes 002_add_superadmin_flag.sql
+
+so docker's initdb (which runs every top-level .sql file) and run_migrations.py
+create a fresh database from the baseline plus newer files only. Databases
+that already applied the old files just record the baseline on their next
+run. The source database records it right away, with squashed_into set on
+the rows of the files it replaces.
+
+Squash from a database migrated from scratch (not a seeded or hand-edited
+one): the baseline is its schema exactly. pg_dump only dumps data for the
+tables given with --data-table (reference rows inserted by migrations).
+
+Usage:
+    python auth-db/scripts/squash_migrations.py auth
+    python auth-db/scripts/squash_migrations.py marketplace --data-table countries
+    python auth-db/scripts/squash_migrations.py auth --dry-run
+"""
+import argparse
+import asyncio
+import os
+import re
+import sys
+
+import asyncpg
+
+import run_migrations
+from run_migrations import DATABASES, REPO_ROOT, SQUASHED_DIR
+
+# Never part of a baseline: the runner and the seeds create them
+EXCLUDED_TABLES = ["public.schema_migrations", "public.seed_runs"]
+
+# Session settings and psql meta-commands in pg_dump output. The runner
+# executes the baseline on its own connection, where they would leak into
+# later files (search_path = '' above all). check_function_bodies = false
+# stays: functions may reference objects dumped after them.
+DUMP_NOISE = re.compile(r"^(SET (?!check_function_bodies)\w+ = .*;|SELECT pg_catalog\.set_config\(.*\);|\\.*)$")
+
+
+async def pg_dump(*argv):
+    proc = await asyncio.create_subprocess_exec(
+        "pg_dump", *argv, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+    )
+    stdout, stderr = await proc.communicate()
+    if proc.returncode != 0:
+        raise RuntimeError(f"pg_dump failed ({proc.returncode}): {stderr.decode().strip()}")
+    return stdout.decode()
+
+
+def clean(dump):
+    lines = [line for line in dump.splitlines() if not DUMP_NOISE.match(line)]
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip() + "\n"
+
+
+def baseline_name(migration_files):
+    last = migration_files[-1].stem
+    match = re.match(r"(\d+)_", last)
+    return f"{match.group(1) if match else last}_baseline.sql"
+
+
+def covered_files(migration_files):
+    """Everything the new baseline replaces, including what earlier baselines replaced."""
+    covered = []
+    for migration_file in migration_files:
+        covered += run_migrations.squashed_files(migration_file)
+        covered.append(migration_file.name)
+    return covered
+
+
+async def dump_schema(database_url, data_tables):
+    exclude = [f"--exclude-table={table}" for table in EXCLUDED_TABLES]
+    schema = await pg_dump("--schema-only", "--no-owner", "--no-privileges", *exclude, database_url)
+    parts = [clean(schema)]
+    if data_tables:
+        # INSERTs, not COPY ... FROM stdin: the runner executes the file without psql
+        tables = [f"--table={table}" for table in data_tables]
+        data = await pg_dump("--data-only", "--no-owner", "--rows-per-insert=1000", *tables, database_url)
+        parts.append(clean(data))
+    return "\n".join(parts)
+
+
+async def squash(name, data_tables=(), dry_run=False):
+    env_var, default_url, migrations_dir = DATABASES[name]
+    database_url = os.environ.get(env_var, default_url)
+    migrations_dir = REPO_ROOT / migrations_dir
+    migration_files = sorted(p for p in migrations_dir.iterdir() if p.suffix in run_migrations.MIGRATION_SUFFIXES)
+    if len(migration_files) < 2:
+        print(f"  Nothing to squash in {migrations_dir} ({len(migration_files)} file(s))")
+        return False
+
+    conn = await asyncpg.connect(database_url)
+    try:
+        pending = await run_migrations.pending_files(conn, migration_files, run_migrations.BASELINES.get(name))
+        if pending:
+            print(f"  {name} has pending migrations ({', '.join(f.name for f in pending)}); migrate it first")
+            return False
+
+        covered = covered_files(migration_files)
+        filename = baseline_name(migration_files)
+        schema = await dump_schema(database_url, data_tables)
+        header = [
+            f"-- Baseline for the {name} database: the schema after {migration_files[-1].name},",
+            "-- from pg_dump (auth-db/scripts/squash_migrations.py). The files it replaces",
+            f"-- are in {SQUASHED_DIR}/.",
+            "--",
+        ] + [f"-- migrate:squashes {covered_name}" for covered_name in covered]
+        content = "\n".join(header) + "\n\n" + schema
+
+        print(f"  {filename}: replaces {len(covered)} files, {len(content.splitlines())} lines")
+        if dry_run:
+            return True
+
+        baseline = migrations_dir / filename
+        baseline.write_text(content)
+        print(f"  Created: {baseline.relative_to(REPO_ROOT)}")
+        squashed_dir = migrations_dir / SQUASHED_DIR
+        squashed_dir.mkdir(exist_ok=True)
+        for migration_file in migration_files:
+            migration_file.rename(squashed_dir / migration_file.name)
+            print(f"  Moved: {migration_file.name} -> {SQUASHED_DIR}/")
+
+        async with conn.transaction():
+            await run_migrations.ensure_table(conn)
+            await conn.execute(
+                "INSERT INTO schema_migrations (filename, checksum, duration_ms) VALUES ($1, $2, 0)",
+                filename, run_migrations.checksum(baseline),
+            )
+            await run_migrations.mark_squashed(conn, filename, covered)
+        print(f"  Recorded: {filename} in {name} schema_migrations")
+        return True
+    finally:
+        await conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("database", choices=list(DATABASES))
+    parser.add_argument(
+        "--data-table", action="append", default=[],
+        help="Also dump the rows of this table into the baseline (repeatable)",
+    )
+    parser.add_argument("--dry-run", action="store_true", help="Report what would be squashed, write nothing")
+    args = parser.parse_args()
+
+    if not asyncio.run(squash(args.database, args.data_table, args.dry_run)):
+        sys.exit(1)
@@ -0,0 +1,63 @@
+"""Tests for the --plan lock classification (auth-db/scripts/migration_plan.py)."""
+import sys
+from pathlib import Path
+
+AUTH_DB = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(AUTH_DB / "scripts"))
+
+import migration_plan  # noqa: E402
+import sql_statements  # noqa: E402
+
+MIGRATIONS = AUTH_DB / "migrations"
+
+
+def classify_file(path, volatile=frozenset()):
+    sql = path.read_text()
+    functions = migration_plan.function_bodies(sql)
+    return [migration_plan.classify(st.sql, volatile, functions) for st in sql_statements.split(sql)]
+
+
+def test_do_block_reports_the_strongest_lock_inside():
+    step = migration_plan.classify(
+        "DO $$ BEGIN IF true THEN ALTER TABLE public.users RENAME TO old_users; END IF; END $$", set()
+    )
+    assert (step.lock, step.table) == ("ACCESS EXCLUSIVE", "public.users")
+
+
+def test_do_block_with_only_queries_takes_no_lock():
+    step = migration_plan.classify(
+        "DO $$ BEGIN IF (SELECT count(*) FROM users) > 0 THEN RAISE 'x'; END IF; END $$", set()
+    )
+    assert step.lock == "none"
+
+
+def test_do_block_with_dynamic_sql_is_flagged():
+    step = migration_plan.classify("DO $$ BEGIN EXECUTE some_statement; END $$", set())
+    assert step.lock == "ACCESS EXCLUSIVE" and "review" in step.note
+
+
+def test_execute_format_is_classified():
+    step = migration_plan.classify(
+        "DO $$ BEGIN EXECUTE format('LOCK TABLE %I IN EXCLUSIVE MODE', 'users'); END $$", set()
+    )
+    assert (step.lock, step.table) == ("EXCLUSIVE", None)
+
+
+def test_consent_history_swap_is_access_exclusive():
+    swap = classify_file(MIGRATIONS / "004_partition_consent_history.sql")[-1]
+    assert (swap.lock, swap.table) == ("ACCESS EXCLUSIVE", "public.consent_history")
+
+
+def test_call_to_a_planned_function_uses_its_body():
+    functions = migration_plan.function_bodies((MIGRATIONS / "optional" / "partition_token_tables.sql").read_text())
+    step = migration_plan.classify("SELECT public.ensure_token_partitions('x')", set(), functions)
+    assert step.lock == "ACCESS EXCLUSIVE" and "partition" in step.note
+
+
+def test_call_to_an_unknown_volatile_function_is_flagged():
+    step = migration_plan.classify("SELECT public.ensure_token_partitions('x')", {"ensure_token_partitions"})
+    assert step.lock == "ACCESS EXCLUSIVE" and "review" in step.note
+
+
+def test_harmless_calls_take_no_lock():
+    assert migration_plan.classify("SELECT set_config('lock_timeout', '1s', false)", {"set_config"}).lock == "none"
@@ -0,0 +1,121 @@
+"""Tests for the migration runner's statement splitter (auth-db/scripts/sql_statements.py)."""
+import re
+import sys
+from pathlib import Path
+
+import pytest
+
+AUTH_DB = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(AUTH_DB / "scripts"))
+
+import sql_statements  # noqa: E402
+
+
+def statements(sql):
+    return [st.sql for st in sql_statements.split(sql)]
+
+
+# ---------------------------------------------------------------------------
+# Quoting and comments
+# ---------------------------------------------------------------------------
+def test_splits_on_semicolons_and_strips_leading_comments():
+    sql = "-- header\nSELECT 1;\n\n/* note */ SELECT 2;\nSELECT 3"
+    assert statements(sql) == ["SELECT 1", "SELECT 2", "SELECT 3"]
+
+
+def test_reports_the_line_a_statement_starts_on():
+    sql = "-- header\n\nSELECT 1;\n-- next\nSELECT\n  2;"
+    assert [st.line for st in sql_statements.split(sql)] == [3, 5]
+
+
+def test_semicolon_in_string():
+    assert statements("SELECT 'a;b'; SELECT 'it''s;'") == ["SELECT 'a;b'", "SELECT 'it''s;'"]
+
+
+def test_escape_string_backslash_quote():
+    # \' does not end an E'' string, so the ; after it is still inside
+    assert statements(r"SELECT E'a\';b'; SELECT 2") == [r"SELECT E'a\';b'", "SELECT 2"]
+
+
+def test_backslash_is_literal_outside_escape_strings():
+    # Standard strings end at the quote after the backslash
+    assert statements(r"SELECT 'a\'; SELECT 2") == [r"SELECT 'a\'", "SELECT 2"]
+
+
+def test_e_ending_an_identifier_is_not_an_escape_string():
+    assert statements(r"SELECT type'a\'; SELECT 2") == [r"SELECT type'a\'", "SELECT 2"]
+
+
+def test_dollar_quoted_body():
+    sql = "DO $$ BEGIN PERFORM 1; PERFORM 2; END $$;\nSELECT 3;"
+    assert statements(sql) == ["DO $$ BEGIN PERFORM 1; PERFORM 2; END $$", "SELECT 3"]
+
+
+def test_tagged_dollar_quote_contains_other_tags():
+    sql = "CREATE FUNCTION f() RETURNS text AS $fn$ SELECT $$;$$; $fn$ LANGUAGE sql; SELECT 1"
+    assert statements(sql) == [
+        "CREATE FUNCTION f() RETURNS text AS $fn$ SELECT $$;$$; $fn$ LANGUAGE sql",
+        "SELECT 1",
+    ]
+
+
+def test_positional_parameter_is_not_a_dollar_quote():
+    assert statements("SELECT $1; SELECT $2") == ["SELECT $1", "SELECT $2"]
+
+
+def test_nested_block_comments():
+    sql = "/* outer /* inner; */ still comment; */ SELECT 1; SELECT /* a; /* b; */ */ 2"
+    assert statements(sql) == ["SELECT 1", "SELECT /* a; /* b; */ */ 2"]
+
+
+def test_line_comment_hides_semicolon():
+    assert statements("SELECT 1 -- not the end;\n + 1; SELECT 2") == ["SELECT 1 -- not the end;\n + 1", "SELECT 2"]
+
+
+def test_quoted_identifier_with_semicolon():
+    sql = 'CREATE TABLE "odd;name" ("a""b;" int); DROP TABLE "odd;name"'
+    assert statements(sql) == ['CREATE TABLE "odd;name" ("a""b;" int)', 'DROP TABLE "odd;name"']
+
+
+@pytest.mark.parametrize("sql", ["SELECT 'open", 'SELECT "open', "DO $$ BEGIN", "/* open /* */", "SELECT E'\\'"])
+def test_unterminated_tokens_raise(sql):
+    with pytest.raises(ValueError):
+        list(sql_statements.split(sql))
+
+
+def test_comments_only_is_empty():
+    assert statements("-- nothing\n/* here */\n;\n") == []
+
+
+# ---------------------------------------------------------------------------
+# Shipped migrations
+# ---------------------------------------------------------------------------
+MIGRATIONS = AUTH_DB / "migrations"
+
+EXPECTED_STATEMENTS = {
+    "001_auth_schema.sql": 31,
+    "002_add_superadmin_flag.sql": 1,
+    "003_drop_redundant_indexes.sql": 3,
+    "004_partition_consent_history.sql": 5,
+    "005_unique_cookie_consent_visitor.sql": 5,
+    "006_users_email_lower.sql": 2,
+}
+
+
+@pytest.mark.parametrize("filename", sorted(EXPECTED_STATEMENTS))
+def test_shipped_migration(filename):
+    split = list(sql_statements.split((MIGRATIONS / filename).read_text()))
+    assert len(split) == EXPECTED_STATEMENTS[filename]
+    for st in split:
+        assert not st.sql.startswith(("--", "/*")) and not st.sql.endswith(";")
+        # A DO block or function body is never cut in two
+        assert len(re.findall(r"\$\$", st.sql)) % 2 == 0, f"line {st.line}: {st.summary}"
+
+
+def test_partition_swap_stays_one_statement():
+    split = list(sql_statements.split((MIGRATIONS / "004_partition_consent_history.sql").read_text()))
+    swap = [st.sql for st in split if "ATTACH PARTITION public.consent_history_legacy" in st.sql]
+    assert len(swap) == 1
+    assert swap[0].startswith("DO $$") and swap[0].endswith("$$")
+    assert "RENAME TO consent_history_legacy" in swap[0]
+    assert "PERFORM public.ensure_monthly_partitions" in swap[0]
@@ -0,0 +1,34 @@
+"""
+Batched user ID lookup against the shared auth DB.
+
+Replaces one ``SELECT id FROM users WHERE email = $1`` per email with one
+``WHERE lower(email) = ANY($1)`` query per batch. Emails are compared in
+their normalized form (``normalize_email``), which the unique
+``lower(email)`` index serves. Resolved IDs are memoized for the life of the
+process, so stages running inside seed_all.py resolve each email only once.
+"""
+
+DEFAULT_BATCH_SIZE = 10_000
+
+# normalized email -> auth users.id; only hits are cached, since users may be seeded later
+_cache = {}
+
+
+def normalize_email(email):
+    """The form emails are stored, compared and cached in (see 006_users_email_lower.sql)."""
+    return email.strip().lower()
+
+
+async def resolve_user_ids(auth_conn, emails, batch_size=DEFAULT_BATCH_SIZE):
+    """Return {email: user_id} for the emails that exist in the auth DB, keyed as given."""
+    emails = list(dict.fromkeys(emails))
+    missing = list(dict.fromkeys(normalize_email(email) for email in emails))
+    missing = [email for email in missing if email not in _cache]
+    for i in range(0, len(missing), batch_size):
+        rows = await auth_conn.fetch(
+            "SELECT lower(email) AS email, id FROM users WHERE lower(email) = ANY($1::text[])",
+            missing[i:i + batch_size],
+        )
+        _cache.update((row["email"], row["id"]) for row in rows)
+    resolved = {email: _cache.get(normalize_email(email)) for email in emails}
+    return {email: user_id for email, user_id in resolved.items() if user_id is not None}
@@ -0,0 +1,51 @@
+"""
+Buffered COPY writer shared by the seed scripts' bulk-load modes.
+
+Rows are buffered per table and written with ``copy_records_to_table`` once
+``batch_size`` rows are pending in total. Tables are flushed in the order they
+were declared, so declaring parents before children keeps foreign keys valid
+at every flush. Primary keys are generated client-side (``uuid.uuid4()``) by
+the caller, which is what lets child rows reference a parent before the
+parent has reached the database.
+"""
+
+DEFAULT_BATCH_SIZE = 10_000
+
+
+class CopyWriter:
+    def __init__(self, conn, tables, batch_size=DEFAULT_BATCH_SIZE):
+        """
+        Args:
+            conn: asyncpg connection
+            tables: ordered mapping of table name -> column list, parents first
+            batch_size: total buffered rows across all tables before a flush
+        """
+        self.conn = conn
+        self.tables = tables
+        self.batch_size = batch_size
+        self.buffers = {table: [] for table in tables}
+        self.written = {table: 0 for table in tables}
+        self.pending = 0
+
+    async def add(self, table, record):
+        """Buffer one record (a tuple in the table's declared column order)."""
+        self.buffers[table].append(record)
+        self.pending += 1
+        if self.pending >= self.batch_size:
+            await self.flush()
+
+    async def flush(self):
+        for table, rows in self.buffers.items():
+            if not rows:
+                continue
+            await self.conn.copy_records_to_table(table, records=rows, columns=self.tables[table])
+            self.written[table] += len(rows)
+            self.buffers[table] = []
+        self.pending = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            await self.flush()
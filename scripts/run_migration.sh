@@ -7,6 +7,7 @@
 #   ./scripts/run_migration.sh booking
 #   ./scripts/run_migration.sh marketplace
 #   ./scripts/run_migration.sh auth
+#   ./scripts/run_migration.sh all      # all four databases concurrently, one process
 #
 # Prerequisites:
 #   - AWS CLI configured with appropriate permissions
@@ -43,7 +44,7 @@ read_tfvar() {
 # ---------------------------------------------------------------------------
 if [[ $# -lt 1 ]]; then
     echo "Usage: $0 <service>"
-    echo "  service: pms | booking | marketplace"
+    echo "  service: pms | booking | marketplace | auth | all"
     exit 1
 fi
 
@@ -81,8 +82,13 @@ case "$SERVICE" in
         MIGRATION_SCRIPT="auth-db/scripts/run_migrations.py"
         SERVICE_DIR="auth-db"
         ;;
+    all)
+        # auth-db's runner migrates every database itself (run_migrations.py --all)
+        MIGRATION_SCRIPT="auth-db/scripts/run_migrations.py"
+        SERVICE_DIR="auth-db"
+        ;;
     *)
-        die "Unknown service: $SERVICE (expected: pms, booking, marketplace, auth)"
+        die "Unknown service: $SERVICE (expected: pms, booking, marketplace, auth, all)"
         ;;
 esac
 
@@ -91,8 +97,24 @@ esac
 # ---------------------------------------------------------------------------
 [[ -f "$TFVARS" ]] || die "terraform.tfvars not found at $TFVARS"
 
-DB_PASSWORD=$(read_tfvar "$DB_PASSWORD_KEY")
-[[ -n "$DB_PASSWORD" ]] || die "Could not read $DB_PASSWORD_KEY from $TFVARS"
+if [[ "$SERVICE" == "all" ]]; then
+    # <prefix>:<db user>:<db name>:<password key>, one per database
+    ALL_DATABASES=(
+        "AUTH:vayada_auth_user:vayada_auth_db:db_auth_password"
+        "MARKETPLACE:vayada_user:vayada_db:db_marketplace_password"
+        "BOOKING:vayada_booking_user:vayada_booking_db:db_booking_password"
+        "PMS:vayada_pms_user:vayada_pms_db:db_pms_password"
+    )
+    for entry in "${ALL_DATABASES[@]}"; do
+        IFS=: read -r prefix user name key <<< "$entry"
+        password=$(read_tfvar "$key")
+        [[ -n "$password" ]] || die "Could not read $key from $TFVARS"
+        export "${prefix}_DATABASE_URL=postgresql://${user}:${password}@${RDS_ENDPOINT}:${RDS_PORT}/${name}?sslmode=require"
+    done
+else
+    DB_PASSWORD=$(read_tfvar "$DB_PASSWORD_KEY")
+    [[ -n "$DB_PASSWORD" ]] || die "Could not read $DB_PASSWORD_KEY from $TFVARS"
+fi
 
 # Verify migration script exists
 FULL_MIGRATION_SCRIPT="$REPO_ROOT/$MIGRATION_SCRIPT"
@@ -148,10 +170,14 @@ echo ""
 echo "🚀 Running $SERVICE migrations..."
 echo ""
 
-DATABASE_URL="postgresql://${DB_USER}:${DB_PASSWORD}@${RDS_ENDPOINT}:${RDS_PORT}/${DB_NAME}?sslmode=require"
+if [[ "$SERVICE" == "all" ]]; then
+    python3 "$FULL_MIGRATION_SCRIPT" --all
+else
+    DATABASE_URL="postgresql://${DB_USER}:${DB_PASSWORD}@${RDS_ENDPOINT}:${RDS_PORT}/${DB_NAME}?sslmode=require"
 
-cd "$REPO_ROOT/$SERVICE_DIR"
-DATABASE_URL="$DATABASE_URL" python3 scripts/run_migrations.py
+    cd "$REPO_ROOT/$SERVICE_DIR"
+    DATABASE_URL="$DATABASE_URL" python3 scripts/run_migrations.py
+fi
 
 echo ""
 echo "✅ Done!"
@@ -1,32 +1,193 @@
 """
-Run all seed scripts in order: users -> marketplace -> booking engine.
+Run all seeds in one process: users -> (marketplace | booking engine).
+
+Stages declare their dependencies and start as soon as those finish, so the
+marketplace and booking engine seeds run concurrently once the users exist.
+All stages share one event loop and one connection pool per database, and a
+per-stage wall-clock report is printed at the end.
 
 Usage:
     python scripts/seed_all.py
+    python scripts/seed_all.py --scale 100 --bulk
+    python scripts/seed_all.py --scale 250 --pms-hotels 1000
+    python scripts/seed_all.py --scale 100 --snapshot   # seconds once a snapshot exists
 """
 
-import subprocess
+import argparse
+import asyncio
 import sys
-from pathlib import Path
+import time
+import traceback
+
+import asyncpg
+
+import auth_users
+import seed_booking
+import seed_marketplace
+import seed_report
+import seed_users
+import snapshot
+import synthetic
+
+
+# ---------------------------------------------------------------------------
+# Stages
+# ---------------------------------------------------------------------------
+async def stage_users(pools, args):
+    async with pools["auth"].acquire() as conn:
+        await seed_users.run(conn, args.scale, args.seed, args.unique_passwords, force=args.force)
+
+
+async def stage_user_ids(pools, args):
+    """Resolve every fixture email the later stages need in one batched lookup.
+
+    This primes auth_users' process-wide cache, so the marketplace and booking
+    stages do not query the auth DB for these emails again.
+    """
+    emails = list(seed_marketplace.CREATOR_PROFILES) + list(seed_marketplace.HOTEL_PROFILES)
+    emails += [hotel["user_email"] for hotel in seed_booking.HOTELS if hotel.get("user_email")]
+    async with pools["auth"].acquire() as conn:
+        user_ids = await auth_users.resolve_user_ids(conn, emails)
+    print(f"  Resolved {len(user_ids)} of {len(set(emails))} fixture user(s)")
+
+
+async def stage_marketplace(pools, args):
+    async with pools["marketplace"].acquire() as conn, pools["auth"].acquire() as auth_conn:
+        await seed_marketplace.run(conn, auth_conn, args.scale, args.seed, args.bulk, args.force)
+
+
+async def stage_booking(pools, args):
+    async with pools["booking"].acquire() as conn, pools["auth"].acquire() as auth_conn:
+        if not pools["pms"]:
+            await seed_booking.run(conn, auth_conn, force=args.force)
+            return
+        async with pools["pms"].acquire() as pms_conn:
+            await seed_booking.run(
+                conn, auth_conn, pms_conn, args.force, pms_hotels=args.pms_hotels, seed=args.seed,
+            )
+
+
+# name -> (label, dependencies, stage function)
+STAGES = {
+    "users": ("Auth users", (), stage_users),
+    "user_ids": ("Resolve user IDs", ("users",), stage_user_ids),
+    "marketplace": ("Marketplace", ("user_ids",), stage_marketplace),
+    "booking": ("Booking engine", ("user_ids",), stage_booking),
+}
+
 
-SCRIPTS_DIR = Path(__file__).parent
+# ---------------------------------------------------------------------------
+# Orchestration
+# ---------------------------------------------------------------------------
+def check_stages(stages):
+    """Fail fast on unknown dependencies or cycles (either would hang run_stages)."""
+    visiting, done = set(), set()
 
-SCRIPTS = [
-    ("Auth users", SCRIPTS_DIR / "seed_users.py"),
-    ("Marketplace", SCRIPTS_DIR / "seed_marketplace.py"),
-    ("Booking engine", SCRIPTS_DIR / "seed_booking.py"),
-]
+    def visit(name, path):
+        if name not in stages:
+            raise ValueError(f"Unknown stage dependency: {' -> '.join(path + [name])}")
+        if name in done:
+            return
+        if name in visiting:
+            raise ValueError(f"Stage dependency cycle: {' -> '.join(path + [name])}")
+        visiting.add(name)
+        for dep in stages[name][1]:
+            visit(dep, path + [name])
+        visiting.discard(name)
+        done.add(name)
 
+    for name in stages:
+        visit(name, [])
 
-def main():
-    for label, script in SCRIPTS:
+
+async def run_stages(stages, pools, args):
+    """Run every stage as soon as its dependencies are done.
+
+    Returns name -> (start, end) in seconds since the first stage started.
+    """
+    check_stages(stages)
+    timings = {}
+    tasks = {}
+    t0 = time.perf_counter()
+
+    async def run_stage(name):
+        label, deps, stage = stages[name]
+        await asyncio.gather(*(tasks[dep] for dep in deps))
+        start = time.perf_counter() - t0
         print(f"\n{'=' * 60}")
         print(f"  {label}")
         print(f"{'=' * 60}\n")
-        result = subprocess.run([sys.executable, str(script)])
-        if result.returncode != 0:
+        try:
+            await stage(pools, args)
+        except Exception:
+            # main() exits quietly, so the traceback is printed here
             print(f"\nFailed at: {label}")
-            sys.exit(result.returncode)
+            traceback.print_exc()
+            raise
+        timings[name] = (start, time.perf_counter() - t0)
+
+    for name in stages:
+        tasks[name] = asyncio.create_task(run_stage(name))
+    try:
+        await asyncio.gather(*tasks.values())
+    except BaseException:
+        for task in tasks.values():
+            task.cancel()
+        raise
+    return timings
+
+
+async def open_pools():
+    auth, marketplace, booking = await asyncio.gather(
+        # users, user_ids, marketplace and booking may all hold an auth connection
+        asyncpg.create_pool(seed_users.AUTH_DATABASE_URL, min_size=1, max_size=4),
+        asyncpg.create_pool(seed_marketplace.MARKETPLACE_DATABASE_URL, min_size=1, max_size=2),
+        asyncpg.create_pool(seed_booking.DATABASE_URL, min_size=1, max_size=2),
+    )
+    pools = {"auth": auth, "marketplace": marketplace, "booking": booking, "pms": None}
+    # PMS DB is optional — skip room types/bookings if not available
+    try:
+        pools["pms"] = await asyncpg.create_pool(seed_booking.PMS_DATABASE_URL, min_size=1, max_size=2)
+    except Exception as e:
+        print(f"PMS database not available ({e}) — skipping room types & bookings")
+    return pools
+
+
+def print_timings(stages, timings, total):
+    print(f"\n{'=' * 60}")
+    print("  Stage timings (wall clock)")
+    print(f"{'=' * 60}")
+    for name, (start, end) in sorted(timings.items(), key=lambda item: item[1]):
+        print(f"    {stages[name][0]:<20} {start:8.2f}s -> {end:8.2f}s   {end - start:8.2f}s")
+    busy = sum(end - start for start, end in timings.values())
+    print(f"    {'Total':<20} {'':25}{total:8.2f}s   (stages sum to {busy:.2f}s)")
+
+
+async def main(args):
+    key = snapshot.seed_key(args) if args.snapshot else None
+    if key:
+        print(f"Restoring {args.snapshot} snapshot {key}...")
+        start = time.perf_counter()
+        if await snapshot.restore(key, args.snapshot):
+            print(f"\nRestored snapshot {key} in {time.perf_counter() - start:.2f}s — seeding skipped.")
+            return
+        print("  Seeding from scratch; a snapshot will be saved afterwards.\n")
+
+    pools = await open_pools()
+    start = time.perf_counter()
+    try:
+        timings = await run_stages(STAGES, pools, args)
+    except Exception:
+        sys.exit(1)
+    finally:
+        await asyncio.gather(*(pool.close() for pool in pools.values() if pool))
+    print_timings(STAGES, timings, time.perf_counter() - start)
+    options = {name: value for name, value in vars(args).items() if name not in ("report", "quiet")}
+    seed_report.finish(args.report, "seed_all.py", options, time.perf_counter() - start)
+
+    if key:
+        print(f"\nSaving {args.snapshot} snapshot {key}...")
+        await snapshot.save(key, args.snapshot)
 
     print(f"\n{'=' * 60}")
     print("  All seeds complete!")
@@ -45,4 +206,19 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, default=0, help="Synthetic data units for users + marketplace")
+    parser.add_argument("--seed", type=int, default=synthetic.DEFAULT_SEED, help="Random seed for --scale")
+    parser.add_argument("--unique-passwords", action="store_true", help="See seed_users.py --unique-passwords")
+    parser.add_argument("--bulk", action="store_true", help="See seed_marketplace.py --bulk")
+    parser.add_argument("--pms-hotels", type=int, default=0, help="See seed_booking.py --pms-hotels")
+    parser.add_argument("--force", action="store_true", help="Ignore seed_runs fingerprints and reseed every section")
+    parser.add_argument("--report", metavar="PATH", help="Write a JSON per-phase timing/throughput report")
+    parser.add_argument("--quiet", action="store_true", help="Suppress per-row output")
+    parser.add_argument(
+        "--snapshot", nargs="?", const="template", choices=snapshot.MODES,
+        help="Restore the matching snapshot instead of seeding, or seed and save one (see snapshot.py)",
+    )
+    args = parser.parse_args()
+    seed_report.quiet = args.quiet
+    asyncio.run(main(args))
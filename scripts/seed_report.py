@@ -0,0 +1,169 @@
+"""
+Per-phase timing and throughput instrumentation for the seed scripts.
+
+Seed scripts wrap their connections with ``instrument()`` and each numbered
+phase in ``with phase(database, name, *conns):``. Every finished phase records
+wall time, rows written, rows/sec and database round trips; ``summary()``
+prints them and ``write()`` saves them as JSON (the scripts' --report path)
+for tracking seeding throughput over time.
+
+What counts:
+    round trips   one per execute/fetch*/executemany/copy call; executemany
+                  is pipelined by asyncpg, so it counts once
+    rows          rows reported by INSERT/UPDATE/DELETE/COPY command tags,
+                  rows returned by INSERT ... RETURNING, and every row sent
+                  by a writing executemany (which may include conflicts)
+
+Per-row progress lines go through ``detail()``, which --quiet silences.
+"""
+
+import contextlib
+import json
+import re
+import sys
+import time
+from datetime import datetime, timezone
+
+quiet = False
+
+# Finished phases, in completion order
+phases = []
+
+WRITE_STATEMENT = re.compile(r"^\s*(INSERT|UPDATE|DELETE)\b", re.IGNORECASE)
+WRITE_STATUS = re.compile(r"^(?:INSERT \d+|UPDATE|DELETE|COPY) (\d+)$")
+
+
+def detail(message):
+    """Print a per-row progress line unless --quiet."""
+    if not quiet:
+        print(message)
+
+
+def is_write(query):
+    return bool(WRITE_STATEMENT.match(query))
+
+
+class InstrumentedConnection:
+    """asyncpg connection proxy counting round trips and rows written."""
+
+    def __init__(self, conn):
+        self._conn = conn
+        self.round_trips = 0
+        self.rows = 0
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def _count_status(self, status):
+        match = WRITE_STATUS.match(status or "")
+        if match:
+            self.rows += int(match.group(1))
+
+    async def execute(self, query, *args, **kwargs):
+        self.round_trips += 1
+        status = await self._conn.execute(query, *args, **kwargs)
+        self._count_status(status)
+        return status
+
+    async def executemany(self, command, args, **kwargs):
+        args = list(args)
+        self.round_trips += 1
+        await self._conn.executemany(command, args, **kwargs)
+        if is_write(command):
+            self.rows += len(args)
+
+    async def fetch(self, query, *args, **kwargs):
+        self.round_trips += 1
+        rows = await self._conn.fetch(query, *args, **kwargs)
+        if is_write(query):
+            self.rows += len(rows)
+        return rows
+
+    async def fetchrow(self, query, *args, **kwargs):
+        self.round_trips += 1
+        row = await self._conn.fetchrow(query, *args, **kwargs)
+        if row is not None and is_write(query):
+            self.rows += 1
+        return row
+
+    async def fetchval(self, query, *args, **kwargs):
+        self.round_trips += 1
+        value = await self._conn.fetchval(query, *args, **kwargs)
+        if value is not None and is_write(query):
+            self.rows += 1
+        return value
+
+    async def copy_records_to_table(self, table_name, **kwargs):
+        self.round_trips += 1
+        status = await self._conn.copy_records_to_table(table_name, **kwargs)
+        self._count_status(status)
+        return status
+
+
+def instrument(conn):
+    """Wrap conn (None and already wrapped connections are returned as is)."""
+    if conn is None or isinstance(conn, InstrumentedConnection):
+        return conn
+    return InstrumentedConnection(conn)
+
+
+@contextlib.contextmanager
+def phase(database, name, *conns):
+    """Record one phase over the given instrumented connections.
+
+    Phases that raise are not recorded.
+    """
+    conns = [c for c in conns if c is not None]
+    before = [(c.round_trips, c.rows) for c in conns]
+    start = time.perf_counter()
+    yield
+    seconds = time.perf_counter() - start
+    round_trips = sum(c.round_trips - trips for c, (trips, _) in zip(conns, before))
+    rows = sum(c.rows - written for c, (_, written) in zip(conns, before))
+    phases.append({
+        "database": database,
+        "phase": name,
+        "seconds": round(seconds, 4),
+        "rows": rows,
+        "rows_per_sec": round(rows / seconds, 1) if seconds > 0 else None,
+        "round_trips": round_trips,
+    })
+
+
+def summary():
+    """Print every recorded phase as a table."""
+    if not phases:
+        return
+    print(f"\n{'=' * 78}")
+    print("  Phase report")
+    print(f"{'=' * 78}")
+    print(f"    {'Database':<12} {'Phase':<28} {'Seconds':>9} {'Rows':>10} {'Rows/s':>10} {'Trips':>8}")
+    for p in phases:
+        rate = f"{p['rows_per_sec']:.0f}" if p["rows_per_sec"] is not None else "-"
+        print(
+            f"    {p['database']:<12} {p['phase']:<28} {p['seconds']:9.2f} {p['rows']:>10} "
+            f"{rate:>10} {p['round_trips']:>8}"
+        )
+
+
+def write(path, script, options, total_seconds):
+    """Write the JSON report for one seed run."""
+    report = {
+        "script": script,
+        "finished_at": datetime.now(timezone.utc).isoformat(),
+        "argv": sys.argv[1:],
+        "options": options,
+        "total_seconds": round(total_seconds, 4),
+        "phases": phases,
+    }
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2, default=str)
+        f.write("\n")
+    print(f"\nReport written to {path}")
+
+
+def finish(path, script, options, total_seconds):
+    """Print the phase summary and, if a --report path was given, write the JSON report."""
+    summary()
+    if path:
+        write(path, script, options, total_seconds)
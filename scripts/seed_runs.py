@@ -0,0 +1,83 @@
+"""
+Per-database record of which seed sections are already in place.
+
+Every seeded database gets a ``seed_runs`` table with one row per section
+(creators, hotels, collaborations, ...) holding a content hash of that
+section's inputs: the fixture data or synthetic options, the seed code, and
+the hashes of the sections it builds on. A rerun whose hash matches skips the
+section with one primary-key lookup instead of re-checking every row, and a
+change anywhere upstream changes every downstream hash too.
+
+A section is only recorded after it completes, so an interrupted seed simply
+reruns it (the row-level ON CONFLICT / existence checks still apply). Pass
+``force=True`` (--force on the seed scripts) after deleting seeded rows by
+hand.
+"""
+
+import hashlib
+import json
+from pathlib import Path
+
+CREATE_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS seed_runs (
+        section TEXT PRIMARY KEY,
+        input_hash TEXT NOT NULL,
+        row_count INTEGER,
+        seeded_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+    )
+"""
+
+RECORD_SQL = """
+    INSERT INTO seed_runs (section, input_hash, row_count)
+    VALUES ($1, $2, $3)
+    ON CONFLICT (section) DO UPDATE
+    SET input_hash = EXCLUDED.input_hash, row_count = EXCLUDED.row_count, seeded_at = NOW()
+"""
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+
+
+def fingerprint(*inputs):
+    """Stable sha256 of JSON-serialisable inputs (dates, UUIDs, Decimals via str)."""
+    payload = json.dumps(inputs, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def code_hash(*filenames):
+    """sha256 of seed script sources in scripts/, so code changes reseed."""
+    digest = hashlib.sha256()
+    for name in filenames:
+        digest.update((SCRIPTS_DIR / name).read_bytes())
+    return digest.hexdigest()
+
+
+class SeedRuns:
+    def __init__(self, conn, hashes, force=False):
+        self.conn = conn
+        self.hashes = hashes  # section -> input_hash as recorded in the DB
+        self.force = force
+
+    def is_current(self, section, input_hash):
+        return not self.force and self.hashes.get(section) == input_hash
+
+    def all_current(self, sections):
+        """True if every (section, input_hash) pair is already recorded."""
+        return all(self.is_current(section, input_hash) for section, input_hash in sections.items())
+
+    def skip(self, section, input_hash):
+        """is_current() plus the usual "Skipped:" line."""
+        if not self.is_current(section, input_hash):
+            return False
+        print(f"  Skipped: {section} (unchanged since last seed)")
+        return True
+
+    async def record(self, section, input_hash, row_count=None):
+        await self.conn.execute(RECORD_SQL, section, input_hash, row_count)
+        self.hashes[section] = input_hash
+
+
+async def load(conn, force=False):
+    """Create seed_runs if needed and read every recorded section hash."""
+    await conn.execute(CREATE_TABLE_SQL)
+    rows = await conn.fetch("SELECT section, input_hash FROM seed_runs")
+    return SeedRuns(conn, {row["section"]: row["input_hash"] for row in rows}, force)
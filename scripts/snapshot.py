@@ -0,0 +1,337 @@
+"""
+Snapshot the seeded databases and restore them in seconds.
+
+A snapshot covers the auth, marketplace, booking engine and PMS databases and
+is keyed by a hash of every migration file, the seed scripts and the seed
+options (--scale, --seed, ...). Changing any of them gives a new key, so a
+stale snapshot is never restored.
+
+Two storage modes:
+
+    template  CREATE DATABASE <db>_snap_<key> TEMPLATE <db> on the same server;
+              restore drops the database and clones it back from the template
+              (a file-level copy, no SQL replay). Fastest, costs disk on the DB
+              server.
+    dump      pg_dump -Fc archives under SNAPSHOT_DIR/<key>/; restore recreates
+              the database and runs pg_restore -j. Survives `docker compose
+              down -v`.
+
+All four databases are snapshotted/restored concurrently. Both directions
+terminate other sessions on the database being copied or replaced — restart
+or reconnect running backends afterwards.
+
+Usage:
+    python scripts/snapshot.py save --scale 100
+    python scripts/snapshot.py restore --scale 100
+    python scripts/snapshot.py list
+    python scripts/snapshot.py prune --scale 100        # drop all other snapshots
+    python scripts/seed_all.py --scale 100 --snapshot   # restore if present, else seed + save
+"""
+
+import argparse
+import asyncio
+import hashlib
+import os
+import shutil
+import sys
+from pathlib import Path
+from urllib.parse import urlsplit, urlunsplit
+
+import asyncpg
+
+import seed_booking
+import seed_marketplace
+import seed_users
+import synthetic
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+SNAPSHOT_DIR = Path(os.getenv("SNAPSHOT_DIR", REPO_ROOT / ".snapshots"))
+
+# name -> database URL; PMS is optional like everywhere else in the seeds
+DATABASES = {
+    "auth": seed_users.AUTH_DATABASE_URL,
+    "marketplace": seed_marketplace.MARKETPLACE_DATABASE_URL,
+    "booking": seed_booking.DATABASE_URL,
+    "pms": seed_booking.PMS_DATABASE_URL,
+}
+OPTIONAL_DATABASES = {"pms"}
+
+# Everything that determines the contents of a seeded database
+MIGRATION_DIRS = [
+    "auth-db/migrations",
+    "marketplace/vayada-creator-marketplace-backend/migrations",
+    "booking-engine/vayada-booking-engine-backend/migrations",
+    "pms/vayada-pms-backend/migrations",
+]
+SEED_INPUTS = [
+    "scripts/auth_users.py",
+    "scripts/bulk.py",
+    "scripts/seed_all.py",
+    "scripts/seed_booking.py",
+    "scripts/seed_marketplace.py",
+    "scripts/seed_runs.py",
+    "scripts/seed_users.py",
+    "scripts/synthetic.py",
+]
+
+MODES = ("template", "dump")
+DEFAULT_JOBS = os.cpu_count() or 1
+
+
+# ---------------------------------------------------------------------------
+# Keys and names
+# ---------------------------------------------------------------------------
+def snapshot_key(**options):
+    """Hash of migrations, seed scripts and seed options (12 hex chars)."""
+    digest = hashlib.sha256()
+    files = [path for d in MIGRATION_DIRS for path in sorted((REPO_ROOT / d).glob("*"))]
+    files += [REPO_ROOT / path for path in SEED_INPUTS]
+    for path in files:
+        if path.is_file():
+            digest.update(str(path.relative_to(REPO_ROOT)).encode())
+            digest.update(path.read_bytes())
+    for name, value in sorted(options.items()):
+        digest.update(f"{name}={value!r}".encode())
+    return digest.hexdigest()[:12]
+
+
+def database_name(url):
+    return urlsplit(url).path.lstrip("/")
+
+
+def maintenance_url(url):
+    """Same server and credentials, connected to the `postgres` database."""
+    parts = urlsplit(url)
+    return urlunsplit(parts._replace(path="/postgres"))
+
+
+def template_name(url, key):
+    return f"{database_name(url)}_snap_{key}"
+
+
+def dump_path(name, key):
+    return SNAPSHOT_DIR / key / f"{name}.dump"
+
+
+def quote_ident(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+# ---------------------------------------------------------------------------
+# Template databases
+# ---------------------------------------------------------------------------
+TERMINATE_SQL = """
+    SELECT pg_terminate_backend(pid) FROM pg_stat_activity
+    WHERE datname = $1 AND pid <> pg_backend_pid()
+"""
+
+
+async def has_template(conn, url, key):
+    return await conn.fetchval("SELECT EXISTS (SELECT 1 FROM pg_database WHERE datname = $1)", template_name(url, key))
+
+
+async def save_template(conn, url, key):
+    db, template = database_name(url), template_name(url, key)
+    await conn.execute(f"DROP DATABASE IF EXISTS {quote_ident(template)}")
+    # CREATE DATABASE ... TEMPLATE needs the source to have no other sessions
+    await conn.execute(TERMINATE_SQL, db)
+    await conn.execute(f"CREATE DATABASE {quote_ident(template)} TEMPLATE {quote_ident(db)}")
+    # Nobody should connect to (and thereby block cloning from) the snapshot
+    await conn.execute(f"ALTER DATABASE {quote_ident(template)} ALLOW_CONNECTIONS false")
+
+
+async def restore_template(conn, url, key):
+    db = quote_ident(database_name(url))
+    await conn.execute(f"DROP DATABASE IF EXISTS {db} WITH (FORCE)")
+    await conn.execute(f"CREATE DATABASE {db} TEMPLATE {quote_ident(template_name(url, key))}")
+
+
+async def list_templates(conn, url):
+    """[(key, size in bytes)] for every snapshot of this database."""
+    prefix = f"{database_name(url)}_snap_"
+    rows = await conn.fetch(
+        "SELECT datname, pg_database_size(datname) AS size FROM pg_database "
+        "WHERE starts_with(datname, $1) ORDER BY datname",
+        prefix,
+    )
+    return [(row["datname"][len(prefix):], row["size"]) for row in rows]
+
+
+async def drop_template(conn, url, key):
+    await conn.execute(f"DROP DATABASE IF EXISTS {quote_ident(template_name(url, key))}")
+
+
+# ---------------------------------------------------------------------------
+# pg_dump archives
+# ---------------------------------------------------------------------------
+async def run_tool(*argv):
+    proc = await asyncio.create_subprocess_exec(*argv, stderr=asyncio.subprocess.PIPE)
+    _, stderr = await proc.communicate()
+    if proc.returncode != 0:
+        raise RuntimeError(f"{argv[0]} failed ({proc.returncode}): {stderr.decode().strip()}")
+
+
+async def save_dump(name, url, key):
+    path = dump_path(name, key)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial = path.with_suffix(".partial")
+    await run_tool("pg_dump", "--format=custom", "--no-owner", f"--file={partial}", url)
+    partial.rename(path)
+
+
+async def restore_dump(conn, name, url, key, jobs):
+    db = quote_ident(database_name(url))
+    await conn.execute(f"DROP DATABASE IF EXISTS {db} WITH (FORCE)")
+    await conn.execute(f"CREATE DATABASE {db}")
+    await run_tool("pg_restore", f"--jobs={jobs}", "--no-owner", f"--dbname={url}", str(dump_path(name, key)))
+
+
+# ---------------------------------------------------------------------------
+# All databases
+# ---------------------------------------------------------------------------
+async def connect_servers():
+    """name -> maintenance connection; unreachable optional databases are left out."""
+    names = list(DATABASES)
+    results = await asyncio.gather(
+        *(asyncpg.connect(maintenance_url(DATABASES[name])) for name in names), return_exceptions=True
+    )
+    conns = {}
+    for name, result in zip(names, results):
+        if not isinstance(result, Exception):
+            conns[name] = result
+        elif name in OPTIONAL_DATABASES:
+            print(f"  {name}: not available ({result}) — skipping")
+        else:
+            await asyncio.gather(*(r.close() for r in results if not isinstance(r, Exception)))
+            raise result
+    return conns
+
+
+async def available(conns, key, mode):
+    """Names of the databases that have a snapshot for key."""
+    names = []
+    for name, conn in conns.items():
+        url = DATABASES[name]
+        if mode == "template" and await has_template(conn, url, key):
+            names.append(name)
+        elif mode == "dump" and dump_path(name, key).is_file():
+            names.append(name)
+    return names
+
+
+async def save(key, mode="template"):
+    """Snapshot every reachable database under key."""
+    conns = await connect_servers()
+    try:
+        async def save_one(name, conn):
+            url = DATABASES[name]
+            if mode == "template":
+                await save_template(conn, url, key)
+            else:
+                await save_dump(name, url, key)
+            print(f"  Saved: {name} ({mode} {key})")
+
+        await asyncio.gather(*(save_one(name, conn) for name, conn in conns.items()))
+    finally:
+        await asyncio.gather(*(conn.close() for conn in conns.values()))
+
+
+async def restore(key, mode="template", jobs=DEFAULT_JOBS):
+    """Restore every database from the snapshot under key.
+
+    Returns False, without touching anything, unless every required
+    database has a snapshot for key.
+    """
+    conns = await connect_servers()
+    try:
+        names = await available(conns, key, mode)
+        missing = [name for name in DATABASES if name not in names and name not in OPTIONAL_DATABASES]
+        if missing:
+            print(f"  No {mode} snapshot {key} for: {', '.join(missing)}")
+            return False
+
+        async def restore_one(name):
+            conn, url = conns[name], DATABASES[name]
+            if mode == "template":
+                await restore_template(conn, url, key)
+            else:
+                await restore_dump(conn, name, url, key, jobs)
+            print(f"  Restored: {name} ({mode} {key})")
+
+        await asyncio.gather(*(restore_one(name) for name in names))
+        return True
+    finally:
+        await asyncio.gather(*(conn.close() for conn in conns.values()))
+
+
+async def list_snapshots():
+    """Print every template and dump snapshot with its size."""
+    conns = await connect_servers()
+    try:
+        for name, conn in conns.items():
+            for key, size in await list_templates(conn, DATABASES[name]):
+                print(f"  template  {key}  {name:<12} {size / 1e6:10.1f} MB")
+    finally:
+        await asyncio.gather(*(conn.close() for conn in conns.values()))
+    for path in sorted(SNAPSHOT_DIR.glob("*/*.dump")):
+        print(f"  dump      {path.parent.name}  {path.stem:<12} {path.stat().st_size / 1e6:10.1f} MB")
+
+
+async def prune(keep):
+    """Drop every snapshot (both modes) except the one under key ``keep``."""
+    conns = await connect_servers()
+    try:
+        for name, conn in conns.items():
+            for key, _ in await list_templates(conn, DATABASES[name]):
+                if key != keep:
+                    await drop_template(conn, DATABASES[name], key)
+                    print(f"  Dropped: template {key} ({name})")
+    finally:
+        await asyncio.gather(*(conn.close() for conn in conns.values()))
+    for path in sorted(SNAPSHOT_DIR.glob("*")):
+        if path.is_dir() and path.name != keep:
+            shutil.rmtree(path)
+            print(f"  Dropped: dump {path.name}")
+
+
+def add_seed_arguments(parser):
+    """Seed options that feed into the snapshot key (mirrors seed_all.py)."""
+    parser.add_argument("--scale", type=int, default=0, help="See seed_all.py --scale")
+    parser.add_argument("--seed", type=int, default=synthetic.DEFAULT_SEED, help="See seed_all.py --seed")
+    parser.add_argument("--unique-passwords", action="store_true", help="See seed_all.py --unique-passwords")
+    parser.add_argument("--bulk", action="store_true", help="See seed_all.py --bulk")
+    parser.add_argument("--pms-hotels", type=int, default=0, help="See seed_all.py --pms-hotels")
+
+
+def seed_key(args):
+    """Snapshot key for parsed seed_all.py/snapshot.py arguments."""
+    return snapshot_key(
+        scale=args.scale,
+        seed=args.seed,
+        unique_passwords=args.unique_passwords,
+        bulk=args.bulk,
+        pms_hotels=args.pms_hotels,
+    )
+
+
+async def main(args):
+    key = seed_key(args)
+    if args.command == "save":
+        await save(key, args.mode)
+    elif args.command == "restore":
+        if not await restore(key, args.mode, args.jobs):
+            sys.exit(1)
+    elif args.command == "list":
+        print(f"Current key: {key}\n")
+        await list_snapshots()
+    elif args.command == "prune":
+        await prune(key)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["save", "restore", "list", "prune"])
+    parser.add_argument("--mode", choices=MODES, default="template", help="Snapshot storage (default: template)")
+    parser.add_argument("--jobs", type=int, default=DEFAULT_JOBS, help="pg_restore parallel jobs (dump mode)")
+    add_seed_arguments(parser)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,537 @@
+"""
+Deterministic synthetic datasets for scale-factor seeding.
+
+Every entity is derived from its own ``random.Random`` stream keyed by
+``(seed, kind, index)``, so the same ``--scale`` / ``--seed`` pair always
+produces the same rows and any single entity can be regenerated on its own.
+All public functions are generators: a run at any scale only keeps the
+current row in memory.
+
+One unit of scale mirrors the shape of the hand-written fixtures:
+4 creators, 5 hotels and 10 collaborations.
+
+Used by:
+    python scripts/seed_users.py --scale N
+    python scripts/seed_marketplace.py --scale N
+    python scripts/seed_booking.py --pms-hotels N
+"""
+
+import hashlib
+import math
+import random
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+DEFAULT_SEED = 42
+
+CREATORS_PER_SCALE = 4
+HOTELS_PER_SCALE = 5
+COLLABORATIONS_PER_SCALE = 10
+
+# ---------------------------------------------------------------------------
+# Vocabulary
+# ---------------------------------------------------------------------------
+FIRST_NAMES = [
+    "Alex", "Maria", "Jonas", "Lea", "Marco", "Sofia", "Noah", "Emma", "Luca", "Mia",
+    "Elias", "Chloe", "Felix", "Nina", "Hugo", "Clara", "Leon", "Ava", "Oscar", "Zoe",
+]
+LAST_NAMES = [
+    "Travels", "Wanders", "Explores", "Eats", "Roams", "Journeys", "Adventures",
+    "Escapes", "Voyages", "Stays", "Style", "Foodie", "Outdoors", "Getaways",
+]
+CREATOR_LOCATIONS = [
+    "New York, USA", "Los Angeles, USA", "London, UK", "Barcelona, Spain", "Berlin, Germany",
+    "Paris, France", "Milan, Italy", "Sydney, Australia", "Toronto, Canada", "Lisbon, Portugal",
+]
+CREATOR_TYPES = ["Travel", "Lifestyle"]
+CREATOR_TOPICS = [
+    "hidden beaches", "boutique stays", "mountain escapes", "street food", "city breaks",
+    "slow travel", "luxury resorts", "outdoor adventures", "wellness retreats", "family trips",
+]
+
+PLATFORMS = ["Instagram", "TikTok", "YouTube", "Facebook"]
+COUNTRIES = ["USA", "UK", "Canada", "Australia", "Germany", "France", "Italy", "Spain", "Switzerland", "Mexico"]
+AGE_GROUPS = ["18-24", "25-34", "35-44", "45-54", "55+"]
+
+HOTEL_ADJECTIVES = [
+    "Grand", "Royal", "Hidden", "Golden", "Silver", "Azure", "Coral", "Alpine",
+    "Serene", "Secret", "Old Town", "Harbour", "Sunset", "Emerald", "Cedar",
+]
+HOTEL_NOUNS = ["Resort", "Lodge", "Retreat", "Boutique", "Palace", "Inn", "Villas", "House", "Hotel", "Suites"]
+HOTEL_LOCATIONS = [
+    ("Maldives", "Maldives"), ("Bali", "Indonesia"), ("Dubrovnik", "Croatia"), ("Paris", "France"),
+    ("Zermatt", "Switzerland"), ("Santorini", "Greece"), ("Amalfi", "Italy"), ("Lisbon", "Portugal"),
+    ("Marrakech", "Morocco"), ("Innsbruck", "Austria"), ("Cape Town", "South Africa"), ("Tulum", "Mexico"),
+]
+LISTING_NAMES = [
+    "Ocean View Villa", "Luxury Suite", "Garden Villa", "Alpine Chalet", "Mountain Suite",
+    "Oceanfront Suite", "Penthouse", "Deluxe Room", "Family Bungalow", "Spa Suite",
+]
+LISTING_AREAS = ["Beachfront", "City Center", "Old Town", "Garden Area", "Resort Center", "Hillside"]
+ACCOMMODATION_TYPES = ["Hotel", "Villa", "Lodge", "Boutiques Hotel"]
+LISTING_IMAGES = [
+    "https://images.unsplash.com/photo-1566073771259-6a8506099945?w=800",
+    "https://images.unsplash.com/photo-1520250497591-112f2f40a3f4?w=800",
+    "https://images.unsplash.com/photo-1506905925346-21bda4d32df4?w=800",
+    "https://images.unsplash.com/photo-1582719508461-905c673771fd?w=800",
+    "https://images.unsplash.com/photo-1571896349842-33c89424de2d?w=800",
+]
+MONTHS = [
+    "January", "February", "March", "April", "May", "June",
+    "July", "August", "September", "October", "November", "December",
+]
+COLLABORATION_TYPES = ["Free Stay", "Paid", "Discount"]
+
+DELIVERABLE_TYPES = {
+    "Instagram": ["Instagram Post", "Instagram Stories", "Instagram Reel"],
+    "TikTok": ["TikTok Video"],
+    "YouTube": ["YouTube Video", "YouTube Short"],
+    "Facebook": ["Facebook Post"],
+}
+
+# Weighted so every status appears at any scale >= 1
+COLLABORATION_STATUSES = [
+    ("pending", 3), ("negotiating", 2), ("accepted", 2), ("declined", 1), ("completed", 2),
+]
+
+CREATOR_LINES = [
+    "Hi! Really excited about this collaboration.",
+    "Could we move the check-in by a couple of days?",
+    "I've shared a draft of the content plan.",
+    "Do you have any must-see spots you'd like featured?",
+    "Looking forward to our stay!",
+    "I've just posted the content! Check it out.",
+]
+HOTEL_LINES = [
+    "Thanks for reaching out, we'd love to host you.",
+    "Those dates work for us.",
+    "The content plan looks great.",
+    "Our spa and rooftop bar would be perfect for your audience.",
+    "We are excited to host you!",
+    "This looks amazing! Thank you so much.",
+]
+SYSTEM_LINES = {
+    "negotiating": "Creator has suggested a counter-offer with updated terms. Please review the new terms.",
+    "accepted": "Collaboration Accepted! Both parties have agreed to the terms.",
+    "completed": "Collaboration completed. All deliverables have been fulfilled.",
+    "declined": "Hotel has declined the collaboration request.",
+}
+REVIEW_COMMENTS = [
+    "Excellent content quality and very professional to work with.",
+    "Amazing photos! Delivered everything on time.",
+    "Great reach and engagement. Communication could be slightly faster.",
+    "Truly authentic content. Our guests loved the reel!",
+    "Super creative and professional. Would work together again.",
+    "Good collaboration overall, a few deliverables arrived late.",
+]
+
+EPOCH = datetime(2024, 1, 1, 9, 0, 0)
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+def _rng(seed, kind, index):
+    return random.Random(f"{seed}:{kind}:{index}")
+
+
+def _uuid(rng):
+    return uuid.UUID(int=rng.getrandbits(128), version=4)
+
+
+def _split(rng, keys, k):
+    """Pick k keys and a percentage split over them that sums to 100."""
+    chosen = rng.sample(keys, k)
+    cuts = sorted(rng.sample(range(1, 100), k - 1))
+    shares = [b - a for a, b in zip([0] + cuts, cuts + [100])]
+    shares.sort(reverse=True)
+    return dict(zip(chosen, shares))
+
+
+def scaled_counts(scale):
+    return {
+        "creators": CREATORS_PER_SCALE * scale,
+        "hotels": HOTELS_PER_SCALE * scale,
+        "collaborations": COLLABORATIONS_PER_SCALE * scale,
+    }
+
+
+def creator_email(index):
+    return f"scale-creator-{index:07d}@mock.com"
+
+
+def hotel_email(index):
+    return f"scale-hotel-{index:07d}@mock.com"
+
+
+# ---------------------------------------------------------------------------
+# Auth users
+# ---------------------------------------------------------------------------
+def password(email, seed=DEFAULT_SEED):
+    """Unique, reproducible password for a synthetic account (for login tests)."""
+    return "Pw-" + hashlib.sha256(f"{seed}:{email}".encode()).hexdigest()[:16]
+
+
+def users(scale, seed=DEFAULT_SEED):
+    """Yield auth user dicts shaped like ``seed_users.MOCK_USERS`` entries."""
+    counts = scaled_counts(scale)
+    for i in range(counts["creators"]):
+        rng = _rng(seed, "creator", i)
+        verified = rng.random() < 0.9
+        yield {
+            "email": creator_email(i),
+            "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            "type": "creator",
+            "status": "verified" if verified else "pending",
+            "email_verified": verified,
+            "avatar": f"https://i.pravatar.cc/150?img={rng.randint(1, 70)}",
+        }
+    for i in range(counts["hotels"]):
+        rng = _rng(seed, "hotel", i)
+        verified = rng.random() < 0.9
+        yield {
+            "email": hotel_email(i),
+            "name": f"{rng.choice(HOTEL_ADJECTIVES)} {rng.choice(HOTEL_NOUNS)}",
+            "type": "hotel",
+            "status": "verified" if verified else "pending",
+            "email_verified": verified,
+            "avatar": None,
+        }
+
+
+# ---------------------------------------------------------------------------
+# Creators
+# ---------------------------------------------------------------------------
+def _gender_split(rng):
+    other = rng.randint(1, 5)
+    female = rng.randint(25, 95 - other)
+    return {"female": female, "male": 100 - female - other, "other": other}
+
+
+def _platform(rng, name, handle):
+    return {
+        "name": name,
+        "handle": handle if name != "Facebook" else handle.lstrip("@").title(),
+        "followers": int(rng.lognormvariate(10.5, 1.2)) + 1000,
+        "engagement_rate": Decimal(f"{rng.uniform(1.0, 9.0):.1f}"),
+        "top_countries": _split(rng, COUNTRIES, rng.randint(3, 5)),
+        "top_age_groups": _split(rng, AGE_GROUPS, 4),
+        "gender_split": _gender_split(rng),
+    }
+
+
+def creator_profiles(scale, seed=DEFAULT_SEED):
+    """Yield ``(email, profile)`` pairs shaped like ``CREATOR_PROFILES.items()``."""
+    for i in range(scaled_counts(scale)["creators"]):
+        rng = _rng(seed, "creator", i)
+        # Re-draw the fields users() consumed so names line up with the auth row
+        rng.random()
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        slug = f"{first}{last}{i}".lower()
+        handle = f"@{slug}"
+        platforms = rng.sample(PLATFORMS, rng.randint(1, len(PLATFORMS)))
+        yield creator_email(i), {
+            "location": rng.choice(CREATOR_LOCATIONS),
+            "short_description": f"{rng.choice(CREATOR_TYPES)} creator sharing {rng.choice(CREATOR_TOPICS)}",
+            "portfolio_link": f"https://{slug}.example.com",
+            "phone": f"+1-555-{rng.randint(1000, 9999)}",
+            "profile_picture": f"https://i.pravatar.cc/300?img={rng.randint(1, 70)}",
+            "profile_complete": rng.random() < 0.85,
+            "creator_type": rng.choice(CREATOR_TYPES),
+            "platforms": [_platform(rng, name, handle) for name in platforms],
+        }
+
+
+# ---------------------------------------------------------------------------
+# Hotels, listings, offerings, requirements
+# ---------------------------------------------------------------------------
+def _offering(rng, collaboration_type):
+    offering = {
+        "collaboration_type": collaboration_type,
+        "availability_months": sorted(rng.sample(MONTHS, rng.randint(2, 6)), key=MONTHS.index),
+        "platforms": rng.sample(PLATFORMS, rng.randint(1, 3)),
+    }
+    if collaboration_type == "Free Stay":
+        min_nights = rng.randint(2, 4)
+        offering["free_stay_min_nights"] = min_nights
+        offering["free_stay_max_nights"] = min_nights + rng.randint(2, 7)
+    elif collaboration_type == "Paid":
+        offering["paid_max_amount"] = Decimal(rng.randrange(500, 10000, 250))
+    else:
+        offering["discount_percentage"] = rng.choice([10, 15, 20, 25, 30, 40, 50])
+    return offering
+
+
+def _requirements(rng):
+    age_min = rng.randint(18, 35)
+    return {
+        "platforms": rng.sample(PLATFORMS, rng.randint(1, 3)),
+        "min_followers": rng.choice([5000, 10000, 25000, 50000, 100000]),
+        "target_countries": rng.sample(COUNTRIES, rng.randint(2, 5)),
+        "target_age_min": age_min,
+        "target_age_max": age_min + rng.randint(10, 25),
+        "target_age_groups": sorted(rng.sample(AGE_GROUPS, rng.randint(1, 3)), key=AGE_GROUPS.index),
+        "creator_types": rng.sample(CREATOR_TYPES, rng.randint(1, 2)),
+    }
+
+
+def listing_names(seed, hotel_index):
+    """Return the listing names of one synthetic hotel (unique within the hotel)."""
+    rng = _rng(seed, "listings", hotel_index)
+    return rng.sample(LISTING_NAMES, rng.randint(1, 3))
+
+
+def hotel_profiles(scale, seed=DEFAULT_SEED):
+    """Yield ``(email, profile)`` pairs shaped like ``HOTEL_PROFILES.items()``."""
+    for i in range(scaled_counts(scale)["hotels"]):
+        rng = _rng(seed, "hotel", i)
+        rng.random()
+        name = f"{rng.choice(HOTEL_ADJECTIVES)} {rng.choice(HOTEL_NOUNS)}"
+        city, country = rng.choice(HOTEL_LOCATIONS)
+        listings = []
+        for listing_name in listing_names(seed, i):
+            types = rng.sample(COLLABORATION_TYPES, rng.randint(1, 2))
+            listings.append({
+                "name": listing_name,
+                "location": f"{city} - {rng.choice(LISTING_AREAS)}",
+                "description": f"{listing_name} at {name} in {city}",
+                "accommodation_type": rng.choice(ACCOMMODATION_TYPES),
+                "images": rng.sample(LISTING_IMAGES, rng.randint(1, 3)),
+                "status": "verified" if rng.random() < 0.8 else "pending",
+                "collaboration_offerings": [_offering(rng, t) for t in types],
+                "creator_requirements": _requirements(rng) if rng.random() < 0.9 else None,
+            })
+        yield hotel_email(i), {
+            "name": name,
+            "location": f"{city}, {country}",
+            "about": f"{name} is a {rng.choice(ACCOMMODATION_TYPES).lower()} in {city}, {country}.",
+            "website": f"https://hotel{i}.example.com",
+            "phone": f"+41-21-{rng.randint(100, 999)}-{rng.randint(1000, 9999)}",
+            "picture": rng.choice(LISTING_IMAGES),
+            "profile_complete": rng.random() < 0.9,
+            "listings": listings,
+        }
+
+
+# ---------------------------------------------------------------------------
+# Collaborations, deliverables, chat threads and ratings
+# ---------------------------------------------------------------------------
+def _deliverables(rng, platforms):
+    return [
+        {
+            "platform": platform,
+            "deliverables": [
+                {"type": t, "quantity": rng.randint(1, 8)}
+                for t in rng.sample(DELIVERABLE_TYPES[platform], rng.randint(1, len(DELIVERABLE_TYPES[platform])))
+            ],
+        }
+        for platform in platforms
+    ]
+
+
+def _chat(rng, status, start):
+    """Build a chat thread as (sender, content, message_type, created_at).
+
+    ``sender`` is "creator", "hotel" or None for system messages; the seeder
+    maps roles to user IDs.
+    """
+    if status == "pending":
+        return []
+    messages = []
+    at = start
+    for _ in range(rng.randint(2, 10)):
+        at += timedelta(minutes=rng.randint(5, 60 * 24))
+        if rng.random() < 0.5:
+            messages.append(("creator", rng.choice(CREATOR_LINES), "text", at))
+        else:
+            messages.append(("hotel", rng.choice(HOTEL_LINES), "text", at))
+    messages.append((None, SYSTEM_LINES[status], "system", at + timedelta(minutes=1)))
+    return messages
+
+
+def collaborations(scale, seed=DEFAULT_SEED):
+    """Yield collaboration dicts shaped like ``COLLABORATIONS`` entries.
+
+    Each dict additionally carries a client-side ``id`` plus the collaboration's
+    ``chat`` thread and optional ``review``, so chat and rating phases can
+    regenerate them from the same stream instead of holding them in memory.
+    """
+    counts = scaled_counts(scale)
+    statuses, weights = zip(*COLLABORATION_STATUSES)
+    for i in range(counts["collaborations"]):
+        rng = _rng(seed, "collaboration", i)
+        # The first len(statuses) collaborations cover every status once
+        status = statuses[i] if i < len(statuses) else rng.choices(statuses, weights)[0]
+        hotel_index = rng.randrange(counts["hotels"])
+        created = EPOCH + timedelta(days=rng.randint(0, 540), minutes=rng.randint(0, 60 * 24))
+        c = {
+            "id": _uuid(rng),
+            "creator_email": creator_email(rng.randrange(counts["creators"])),
+            "hotel_email": hotel_email(hotel_index),
+            "listing_name": rng.choice(listing_names(seed, hotel_index)),
+            "initiator_type": rng.choice(["creator", "hotel"]),
+            "status": status,
+            "platform_deliverables": _deliverables(rng, rng.sample(PLATFORMS, rng.randint(1, 2))),
+        }
+        stay_from = created.date() + timedelta(days=rng.randint(14, 180))
+        if c["initiator_type"] == "creator":
+            c["why_great_fit"] = f"My audience loves {rng.choice(CREATOR_TOPICS)} and this stay is a perfect match."
+            c["travel_date_from"] = stay_from
+            c["travel_date_to"] = stay_from + timedelta(days=rng.randint(2, 10))
+            c["preferred_months"] = [stay_from.strftime("%b")]
+            c["consent"] = True
+        else:
+            c["collaboration_type"] = rng.choice(COLLABORATION_TYPES)
+            if c["collaboration_type"] == "Free Stay":
+                c["free_stay_min_nights"] = rng.randint(2, 4)
+                c["free_stay_max_nights"] = c["free_stay_min_nights"] + rng.randint(2, 7)
+            elif c["collaboration_type"] == "Paid":
+                c["paid_amount"] = Decimal(rng.randrange(500, 10000, 250))
+            else:
+                c["discount_percentage"] = rng.choice([10, 15, 20, 25, 30, 40, 50])
+            c["preferred_date_from"] = stay_from
+            c["preferred_date_to"] = stay_from + timedelta(days=rng.randint(30, 120))
+        if status != "pending":
+            c["responded_at"] = created + timedelta(hours=rng.randint(1, 72))
+        if status in ("negotiating", "accepted", "completed"):
+            c["hotel_agreed_at"] = c["responded_at"]
+            c["creator_agreed_at"] = None if status == "negotiating" else c["responded_at"] + timedelta(hours=2)
+        if status == "completed":
+            c["completed_at"] = datetime.combine(stay_from, datetime.min.time()) + timedelta(days=rng.randint(12, 40))
+        c["term_last_updated_at"] = c.get("responded_at", created)
+        c["chat"] = _chat(rng, status, created)
+        if (status == "completed" and rng.random() < 0.8) or (status == "accepted" and rng.random() < 0.2):
+            c["review"] = {
+                "rating": rng.choices([1, 2, 3, 4, 5], [1, 1, 3, 8, 12])[0],
+                "comment": rng.choice(REVIEW_COMMENTS),
+            }
+        yield c
+
+
+# ---------------------------------------------------------------------------
+# PMS hotels, room types and occupancy-driven bookings
+# ---------------------------------------------------------------------------
+PMS_ROOM_TYPES = [
+    # (name, max_occupancy, size, base_rate range, bed_type)
+    ("Standard Room", 2, 22, (60, 140), "Queen Bed"),
+    ("Superior Room", 2, 28, (90, 200), "King Bed"),
+    ("Family Room", 4, 40, (120, 260), "King Bed + Sofa Bed"),
+    ("Junior Suite", 3, 45, (160, 350), "King Bed"),
+    ("Suite", 4, 65, (250, 600), "King Bed + Day Bed"),
+]
+COUNTRY_CURRENCIES = {"Switzerland": "CHF", "Mexico": "USD", "Morocco": "EUR", "South Africa": "USD"}
+GUEST_LAST_NAMES = [
+    "Mueller", "Thompson", "Dubois", "Rossi", "Garcia", "Smith", "Novak", "Jensen",
+    "Silva", "Kowalski", "Murphy", "Bernard", "Fischer", "Lopez", "Andersen",
+]
+# Length-of-stay distribution in nights
+STAY_LENGTHS = [(1, 18), (2, 24), (3, 20), (4, 13), (5, 9), (6, 6), (7, 7), (10, 2), (14, 1)]
+
+
+def pms_hotel_slug(index):
+    return f"scale-hotel-{index:07d}"
+
+
+def pms_hotels(count, seed=DEFAULT_SEED):
+    """Yield PMS hotels, each with room types shaped like ``seed_booking.ROOM_TYPES`` entries.
+
+    Hotel i belongs to the synthetic auth user ``hotel_email(i)``.
+    """
+    for i in range(count):
+        rng = _rng(seed, "hotel", i)
+        rng.random()
+        name = f"{rng.choice(HOTEL_ADJECTIVES)} {rng.choice(HOTEL_NOUNS)}"
+        _, country = rng.choice(HOTEL_LOCATIONS)
+        currency = COUNTRY_CURRENCIES.get(country, "EUR")
+        rooms = rng.sample(PMS_ROOM_TYPES, rng.randint(2, 4))
+        rooms.sort(key=PMS_ROOM_TYPES.index)
+        yield {
+            "slug": pms_hotel_slug(i),
+            "name": name,
+            "contact_email": hotel_email(i),
+            "user_email": hotel_email(i),
+            "room_types": [
+                {
+                    "name": room_name,
+                    "description": f"{room_name} at {name}",
+                    "short_description": f"{room_name} ({size} m²)",
+                    "max_occupancy": max_occupancy,
+                    "size": size,
+                    "base_rate": rng.randrange(rate_min, rate_max, 5),
+                    "currency": currency,
+                    "amenities": ["Free WiFi", "Flat-screen TV", "Air Conditioning"],
+                    "images": [rng.choice(LISTING_IMAGES)],
+                    "bed_type": bed_type,
+                    "features": [],
+                    "total_rooms": rng.randint(2, 30),
+                    "sort_order": sort_order,
+                }
+                for sort_order, (room_name, max_occupancy, size, (rate_min, rate_max), bed_type) in enumerate(rooms)
+            ],
+        }
+
+
+def target_occupancy(day, occupancy):
+    """Target share of rooms sold on ``day``: seasonal curve around ``occupancy``.
+
+    Peaks in mid-summer and around New Year, dips in November, and adds a
+    weekend bump (Friday/Saturday nights).
+    """
+    season = 0.2 * math.cos(2 * math.pi * (day.timetuple().tm_yday - 196) / 365)
+    holidays = 0.15 if (day.month == 12 and day.day >= 20) or (day.month == 1 and day.day <= 5) else 0.0
+    weekend = 0.1 if day.weekday() in (4, 5) else -0.03
+    return min(1.0, max(0.0, occupancy * (1 + season + holidays + weekend)))
+
+
+def bookings(room_type, hotel_index, room_index, start, days, occupancy, seed=DEFAULT_SEED, today=None):
+    """Yield bookings for one room type over ``days`` nights from ``start``.
+
+    Walks the horizon night by night and adds arrivals until the night reaches
+    its target occupancy. A stay is cut short at the first night that is
+    already full, so no night ever holds more than ``total_rooms`` bookings.
+    Only the per-night counters of this room type are held in memory.
+
+    ``room_type`` needs ``total_rooms``, ``max_occupancy``, ``base_rate`` and
+    ``currency``; yielded dicts match ``seed_booking.SAMPLE_BOOKINGS`` plus
+    ``nightly_rate`` and ``total_amount``. References ``VAY-<hex>`` are unique
+    per (hotel_index, room_index, sequence).
+    """
+    rng = _rng(seed, f"bookings:{hotel_index}", room_index)
+    today = today or datetime.now().date()
+    total_rooms = room_type["total_rooms"]
+    lengths, weights = zip(*STAY_LENGTHS)
+    sold = [0] * days
+    sequence = 0
+    for night in range(days):
+        day = start + timedelta(days=night)
+        target = round(total_rooms * target_occupancy(day, occupancy))
+        while sold[night] < target:
+            nights = 1
+            wanted = rng.choices(lengths, weights)[0]
+            while nights < wanted and night + nights < days and sold[night + nights] < total_rooms:
+                nights += 1
+            for n in range(night, night + nights):
+                sold[n] += 1
+
+            check_in = day
+            check_out = day + timedelta(days=nights)
+            adults = rng.randint(1, room_type["max_occupancy"])
+            first, last = rng.choice(FIRST_NAMES), rng.choice(GUEST_LAST_NAMES)
+            nightly_rate = Decimal(room_type["base_rate"])
+            yield {
+                "booking_reference": f"VAY-{hotel_index:05X}{room_index:X}{sequence:05X}",
+                "guest_first_name": first,
+                "guest_last_name": last,
+                "guest_email": f"{first}.{last}.{hotel_index}.{room_index}.{sequence}@example.com".lower(),
+                "guest_phone": f"+49 170 {rng.randint(1000000, 9999999)}",
+                "check_in": check_in,
+                "check_out": check_out,
+                "adults": adults,
+                "children": rng.randint(0, room_type["max_occupancy"] - adults),
+                "nightly_rate": nightly_rate,
+                "total_amount": nightly_rate * nights,
+                "currency": room_type["currency"],
+                "status": "pending" if check_in > today and rng.random() < 0.1 else "confirmed",
+            }
+            sequence += 1